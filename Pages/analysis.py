@@ -1,17 +1,26 @@
 import streamlit as st
 
-st.markdown("""
-    <style>
-        .block-container {
-            padding-top: 0rem !important;
-            padding-bottom: 6rem !important;
-        }
-        header {visibility: hidden;}
-    </style>
-""", unsafe_allow_html=True)
+from Pages.figure_store import figure_name, load_figure, load_manifest
+
+
+def _show_figure(category, fallback_image, manifest):
+    """
+    The CAAR figure built for a disaster category (python -m Pages.figures
+    build), or the exported image when none has been built yet.
+    """
+    spec, entry = load_figure(figure_name(category), manifest=manifest)
+    if spec is None:
+        st.image(fallback_image)
+        return
+    st.vega_lite_chart(spec, use_container_width=True)
+    st.caption(
+        f"{entry['kept']} of {entry['events']} event(s), {entry['model']} model, "
+        f"T{entry['window'][0]} to T+{entry['window'][1]}; built {entry['built_at']}."
+    )
 
 
 def show_analysis():
+    manifest = load_manifest()
     st.title("Disaster-Specific Results & Analysis")
 
     st.markdown("## Hurricanes")
@@ -25,7 +34,7 @@ def show_analysis():
     Hurricanes generate the strongest volatility for Solar and Oil & Gas, while regulated utilities remain resilient.
     """)
 
-    st.image("Pages/images/Hurricane.png")  # Replace or delete as needed
+    _show_figure("Hurricane", "Pages/images/Hurricane.png", manifest)
     st.markdown("---")
 
     # ----------------------------------------------------------------------
@@ -41,7 +50,7 @@ def show_analysis():
     Extreme cold exerts broad downward pressure on utilities while creating rebound opportunities for Oil & Gas through increased heating demand.
     """)
 
-    st.image("Pages/images/winterstorm.png")
+    _show_figure("Winter Storm", "Pages/images/winterstorm.png", manifest)
     st.markdown("---")
 
     # ----------------------------------------------------------------------
@@ -58,7 +67,7 @@ def show_analysis():
     Wildfires appear to strengthen renewable-energy sentiment while weakening expectations for fossil fuel firms.
     """)
 
-    st.image("Pages/images/Wildfire.png")
+    _show_figure("Wildfire", "Pages/images/Wildfire.png", manifest)
     st.markdown("---")
 
     # ----------------------------------------------------------------------
@@ -74,7 +83,7 @@ def show_analysis():
     Flood-related shocks are either temporary or already priced in, resulting in the smallest abnormal movements across industries.
     """)
 
-    st.image("Pages/images/flood.png")
+    _show_figure("Flood", "Pages/images/flood.png", manifest)
     st.markdown("---")
 
     # ----------------------------------------------------------------------
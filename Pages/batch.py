@@ -0,0 +1,375 @@
+import argparse
+import json
+import os
+import time
+
+from Pages.constituents import (
+    DEFAULT_HOLDINGS_PATH,
+    constituent_study,
+    cross_section_frame,
+    firm_interval_frame,
+    industry_caar,
+    load_holdings,
+)
+from Pages.intervals import make_windows, parse_window
+from Pages.intraday import (
+    MAX_WINDOW_SESSIONS,
+    bars_per_session,
+    default_window,
+    intraday_windows,
+    run_intraday_study,
+)
+from Pages.panel import panel_frame, panel_summary, panel_tests, study_panel
+from Pages.noaa_catalog import CATEGORIES, DEFAULT_CATALOG_PATH, EventCatalog
+from Pages.price_store import DEFAULT_DB_PATH, configure_price_store
+from Pages.providers import BAR_MINUTES, get_provider
+from Pages.scheduler import DEFAULT_MAX_WORKERS, DEFAULT_RATE, DownloadScheduler
+from Pages.result_cache import get_result_cache
+from Pages.significance import DEFAULT_RESAMPLES
+from Pages.trading_calendar import ALIGNMENT_POLICIES
+from Pages.study import (
+    BENCHMARK,
+    FIXED_WINDOW,
+    INTERVAL_WINDOWS,
+    MAX_EVENT_WINDOW,
+    car_long_frame,
+    disaster_events,
+    event_interval_frame,
+    industry_map,
+    interval_summary,
+    run_event_study,
+)
+
+# --------------------------------------------------------------
+# HEADLESS BATCH RUN: full event x industry grid -> files
+# --------------------------------------------------------------
+# Usage:
+#   python -m Pages.batch --out results/
+#   python -m Pages.batch --model market_model --significance --resamples 10000
+#   python -m Pages.batch --provider replay:fixtures/cassettes --price-db /tmp/p.sqlite
+#   python -m Pages.batch --catalog --category Wildfire --since 2010 --min-damage 1e8
+#   python -m Pages.batch --window=-1:1 --window=-10:20 --window=0:5
+#   python -m Pages.batch --pre 60 --post 120 --window=0:60 --window=0:120
+#   python -m Pages.batch --constituents data/holdings.csv
+#   python -m Pages.batch --provider synthetic --interval 5m --pre 12 --post 78
+#   python -m Pages.batch --catalog --min-damage 1e8 --panel
+
+
+def run_grid(event_labels=None, industries=None, model="market",
+             with_significance=False, n_resamples=DEFAULT_RESAMPLES, events=None,
+             alignment="nearest", windows=None, pre=FIXED_WINDOW, post=FIXED_WINDOW):
+    """
+    Run the event study for every event x industry in one pass, over the
+    event window [T-pre, T+post].
+    Returns the StudyResult from run_event_study().
+    """
+    events = disaster_events if events is None else events
+    event_labels = list(events) if event_labels is None else list(event_labels)
+    industries = list(industry_map) if industries is None else list(industries)
+    tickers = [industry_map[name] for name in industries]
+
+    return run_event_study(
+        event_labels,
+        tickers,
+        model,
+        with_significance=with_significance,
+        n_resamples=n_resamples,
+        events=events,
+        alignment=alignment,
+        windows=windows,
+        pre=pre,
+        post=post,
+    )
+
+
+def write_results(result, out_dir, meta=None, windows=None):
+    """
+    Write one grid run to `out_dir`:
+      car_long.csv          per-event CAR (t, Ticker, CAR, Industry, Event)
+      caar.csv              CAAR, index = t, columns = tickers
+      intervals.csv         interval averages (and p-values when computed)
+      event_intervals.csv   sum and average CAR per event x ticker x window
+      summary.json   run metadata, kept, skipped and failed events
+    """
+    os.makedirs(out_dir, exist_ok=True)
+
+    car_long_frame(
+        result.car_cube, result.kept, result.tickers, t_values=result.t_values
+    ).to_csv(os.path.join(out_dir, "car_long.csv"), index=False)
+    if result.caar is not None:
+        result.caar.to_csv(os.path.join(out_dir, "caar.csv"), index_label="t")
+        interval_summary(result.caar, result.significance, windows).to_csv(
+            os.path.join(out_dir, "intervals.csv"), index=False
+        )
+    event_interval_frame(
+        result.car_cube, result.kept, result.tickers, windows, t_values=result.t_values
+    ).to_csv(
+        os.path.join(out_dir, "event_intervals.csv"), index=False
+    )
+
+    summary = dict(meta or {})
+    summary.update({
+        "kept": result.kept,
+        "skipped": result.skipped,
+        "truncated": list(result.truncated),
+        "failed": list(result.failed),
+    })
+    with open(os.path.join(out_dir, "summary.json"), "w") as fh:
+        json.dump(summary, fh, indent=2)
+
+
+def write_panel(fit, out_dir):
+    """
+    Write the cross-event panel regression:
+      panel.csv         coefficients with clustered standard errors per window
+      panel_tests.csv   joint F-tests of each block of terms per window
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    panel_frame(fit).to_csv(os.path.join(out_dir, "panel.csv"), index=False)
+    panel_tests(fit).to_csv(os.path.join(out_dir, "panel_tests.csv"), index=False)
+
+
+def _window_days(text):
+    days = int(text)
+    if days < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return days
+
+
+def write_constituents(study, out_dir, windows=None):
+    """
+    Write a constituent-level run next to the ETF results:
+      constituent_caar.csv   holdings-weighted industry CAAR, index = t
+      cross_section.csv      cross-sectional statistics per industry x window
+      firm_intervals.csv     average CAR per stock x window across events
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    industry_caar(study).to_csv(os.path.join(out_dir, "constituent_caar.csv"), index_label="t")
+    cross_section_frame(study, windows).to_csv(
+        os.path.join(out_dir, "cross_section.csv"), index=False
+    )
+    firm_interval_frame(study, windows).to_csv(
+        os.path.join(out_dir, "firm_intervals.csv"), index=False
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the disaster event study without the dashboard."
+    )
+    parser.add_argument("--out", default="results", help="Output directory.")
+    parser.add_argument(
+        "--model", choices=["market", "market_model"], default="market",
+        help="Abnormal-return model.",
+    )
+    parser.add_argument(
+        "--alignment", choices=ALIGNMENT_POLICIES, default="nearest",
+        help="Trading day used as T=0 when the event date is not one.",
+    )
+    parser.add_argument(
+        "--pre", type=_window_days, default=None,
+        help=f"Trading days (bars with --interval) before T in the event window. "
+             f"Default: {FIXED_WINDOW} days, or one session of bars.",
+    )
+    parser.add_argument(
+        "--post", type=_window_days, default=None,
+        help=f"Trading days (bars with --interval) after T in the event window. "
+             f"Default: {FIXED_WINDOW} days, or two sessions of bars.",
+    )
+    parser.add_argument(
+        "--interval", choices=list(BAR_MINUTES), default=None,
+        help="Run an intraday study on bars of this size; event time, --pre, --post "
+             "and --window are then counted in bars.",
+    )
+    parser.add_argument(
+        "--event", action="append", dest="events",
+        help="Event label to include (repeatable). Default: every event.",
+    )
+    parser.add_argument(
+        "--industry", action="append", dest="industries",
+        help="Industry name to include (repeatable). Default: every industry.",
+    )
+    parser.add_argument(
+        "--significance", action="store_true",
+        help="Also run bootstrap and placebo significance tests.",
+    )
+    parser.add_argument("--resamples", type=int, default=DEFAULT_RESAMPLES)
+    parser.add_argument(
+        "--window", action="append", dest="windows", type=parse_window,
+        help="Interval window first:last in event days, or bars with --interval "
+             "(repeatable), e.g. --window=-1:1. Default: " + "; ".join(INTERVAL_WINDOWS)
+             + ", or the hour before T, the hour after T and the session after T.",
+    )
+    parser.add_argument(
+        "--provider", default=None,
+        help="Price provider spec: yfinance, local:<path>, record:<dir>, "
+             "replay:<dir>, auto:<dir>, synthetic or flaky:<rate>. "
+             "Default: $EVENT_STUDY_PROVIDER or yfinance.",
+    )
+    parser.add_argument("--price-db", default=DEFAULT_DB_PATH, help="Price store path.")
+    parser.add_argument(
+        "--panel", action="store_true",
+        help="Also regress event x industry window CAR on disaster category, region, "
+             "season and catalog covariates (standard errors clustered by event).",
+    )
+    parser.add_argument(
+        "--constituents", nargs="?", const=DEFAULT_HOLDINGS_PATH, default=None,
+        help="Also run a firm-level study of the holdings in this file "
+             f"(default {DEFAULT_HOLDINGS_PATH}).",
+    )
+    parser.add_argument(
+        "--fetch-workers", type=int, default=DEFAULT_MAX_WORKERS,
+        help="Concurrent price downloads.",
+    )
+    parser.add_argument(
+        "--fetch-rate", type=float, default=DEFAULT_RATE,
+        help="Maximum price downloads started per second.",
+    )
+
+    catalog = parser.add_argument_group("NOAA catalog (instead of the curated events)")
+    catalog.add_argument(
+        "--catalog", nargs="?", const=DEFAULT_CATALOG_PATH, default=None,
+        help="Use episodes from the Storm Events catalog at this path.",
+    )
+    catalog.add_argument("--category", action="append", choices=CATEGORIES)
+    catalog.add_argument("--state", action="append")
+    catalog.add_argument("--since")
+    catalog.add_argument("--until")
+    catalog.add_argument("--min-damage", type=float, default=0.0)
+    catalog.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.interval:
+        if args.significance or args.constituents:
+            parser.error("--significance and --constituents are daily-only; drop --interval")
+        default_pre, default_post = default_window(args.interval)
+        limit = MAX_WINDOW_SESSIONS * bars_per_session(args.interval)
+        unit = f"{args.interval} bars"
+    else:
+        default_pre = default_post = FIXED_WINDOW
+        limit, unit = MAX_EVENT_WINDOW, "trading days"
+    args.pre = default_pre if args.pre is None else args.pre
+    args.post = default_post if args.post is None else args.post
+    if max(args.pre, args.post) > limit:
+        parser.error(f"--pre and --post must be at most {limit} {unit}")
+
+    store = configure_price_store(
+        args.price_db,
+        get_provider(args.provider),
+        DownloadScheduler(max_workers=args.fetch_workers, rate=args.fetch_rate),
+    )
+
+    events = None
+    if args.catalog:
+        matches = EventCatalog(args.catalog).query(
+            args.category, args.since, args.until, args.min_damage, args.state, args.limit
+        )
+        events = EventCatalog.as_events(matches)
+
+    if args.windows:
+        windows = make_windows(args.windows)
+    elif args.interval:
+        windows = intraday_windows(args.interval, args.post)
+    else:
+        windows = INTERVAL_WINDOWS
+
+    started = time.perf_counter()
+    if args.interval:
+        result = run_intraday_study(
+            args.events or list(events or disaster_events),
+            [industry_map[name] for name in args.industries or industry_map],
+            args.interval, args.model, events, args.pre, args.post,
+        )
+    else:
+        result = run_grid(
+            args.events, args.industries, args.model, args.significance, args.resamples,
+            events, args.alignment, windows, args.pre, args.post,
+        )
+    elapsed = time.perf_counter() - started
+
+    study = None
+    if args.constituents:
+        started = time.perf_counter()
+        study = constituent_study(
+            args.events or list(events or disaster_events),
+            args.industries or list(industry_map),
+            load_holdings(args.constituents),
+            args.model, events, args.alignment, args.pre, args.post,
+        )
+        constituent_seconds = time.perf_counter() - started
+
+    fit = None
+    if args.panel and result.kept:
+        started = time.perf_counter()
+        fit = study_panel(
+            result, events or disaster_events, windows, args.catalog or DEFAULT_CATALOG_PATH
+        )
+        panel_seconds = time.perf_counter() - started
+
+    meta = {
+        "cache": get_result_cache().stats(),
+        "downloads": store.scheduler.stats(),
+        "events_source": args.catalog or "curated",
+        "model": args.model,
+        "alignment": args.alignment,
+        "benchmark": BENCHMARK,
+        "window": [-args.pre, args.post],
+        "interval": args.interval,
+        "bar_minutes": BAR_MINUTES.get(args.interval),
+        "intervals": {label: list(bounds) for label, bounds in windows.items()},
+        "tickers": result.tickers,
+        "significance": args.significance,
+        "resamples": args.resamples if args.significance else None,
+        "seconds": round(elapsed, 3),
+    }
+    if fit is not None:
+        meta["panel"] = {
+            "observations": fit.n_obs,
+            "events": fit.n_events,
+            "terms": len(fit.terms),
+            "omitted": fit.omitted,
+            "r2": panel_summary(fit)["R-squared"].round(4).tolist(),
+            "seconds": round(panel_seconds, 3),
+        }
+        write_panel(fit, args.out)
+    if study is not None:
+        meta["constituents"] = {
+            "holdings": args.constituents,
+            "stocks": len(study.matrix.tickers),
+            "holdings_rows": len(study.matrix.rows),
+            "kept": study.kept,
+            "skipped": study.skipped,
+            "failed": study.failed,
+            "car_mb": round(study.car.nbytes / 2**20, 2),
+            "seconds": round(constituent_seconds, 3),
+        }
+        write_constituents(study, args.out, windows)
+    write_results(result, args.out, meta, windows)
+
+    print(
+        f"{len(result.kept)} event(s) x {len(result.tickers)} ticker(s) in "
+        f"{elapsed:.2f}s -> {args.out}"
+    )
+    if result.truncated:
+        print("Truncated (not fetched): " + "; ".join(result.truncated))
+    if result.failed:
+        print("Download failed (retry later): " + "; ".join(result.failed))
+    if result.skipped:
+        print("Skipped (no data): " + "; ".join(result.skipped))
+    if fit is not None:
+        print(
+            f"Panel: {fit.n_obs} observation(s), {fit.n_events} event cluster(s) "
+            f"in {panel_seconds:.2f}s"
+        )
+    if study is not None:
+        print(
+            f"Constituents: {len(study.kept)} event(s) x {len(study.matrix.tickers)} stock(s) "
+            f"in {constituent_seconds:.2f}s"
+        )
+        if study.failed:
+            print("Constituent downloads failed (retry later): " + "; ".join(study.failed))
+    return 1 if result.failed or (study is not None and study.failed) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
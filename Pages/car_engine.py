@@ -0,0 +1,215 @@
+import warnings
+from collections import namedtuple
+
+import numpy as np
+
+# --------------------------------------------------------------
+# VECTORIZED CAR ENGINE (events x t x tickers)
+# --------------------------------------------------------------
+# Every event window is gathered from one aligned price matrix with fancy
+# indexing, so returns, abnormal returns, CAR and CAAR are a handful of
+# array operations no matter how many events are selected.
+
+CarTensor = namedtuple(
+    "CarTensor",
+    [
+        "t_values",  # (L,)  event time, e.g. -20..+20
+        "valid",     # (E,)  True where the full window exists
+        "returns",   # (E, L, N) simple returns, first row 0
+        "abnormal",  # (E, L, N) abnormal returns
+        "car",       # (E, L, N) cumulative abnormal return, percent
+        "caar",      # (L, N) mean CAR over valid events
+        "alpha",     # (E, N) market-model intercepts, None when market-adjusted
+        "beta",      # (E, N) market-model slopes, None when market-adjusted
+    ],
+    defaults=(None, None),
+)
+
+# Abnormal-return models
+#   market:       AR = R_i - R_m
+#   market_model: AR = R_i - (alpha_i + beta_i * R_m), fit per event + ticker
+ABNORMAL_MODELS = ("market", "market_model")
+
+# Pre-event estimation window for the market model, in trading days. It is
+# moved back for event windows starting before T-30 (see estimation_window)
+ESTIMATION_WINDOW = (-250, -30)
+MIN_ESTIMATION_OBS = 60
+
+
+def estimation_window(pre):
+    """
+    Market-model estimation window for an event window starting at T-pre:
+    ESTIMATION_WINDOW, shifted back (same length) so that it always ends
+    before T-pre and never overlaps the event window.
+    Returns (start, end) in trading days relative to T=0.
+    """
+    start, end = ESTIMATION_WINDOW
+    shift = min(0, -pre - 1 - end)
+    return start + shift, end + shift
+
+
+def gather_windows(price_matrix, event_idx, pre, post):
+    """
+    Cut [T-pre, T+post] around every event index out of `price_matrix`
+    (shape (dates, tickers)).
+    Returns:
+      windows: (events, pre + post + 1, tickers)
+      valid:   (events,) False where the window runs off either end
+    """
+    event_idx = np.asarray(event_idx, dtype=np.int64)
+    n_dates = price_matrix.shape[0]
+
+    offsets = np.arange(-pre, post + 1)
+    rows = event_idx[:, None] + offsets[None, :]
+    valid = (event_idx >= 0) & (rows[:, 0] >= 0) & (rows[:, -1] < n_dates)
+
+    windows = price_matrix[np.clip(rows, 0, n_dates - 1)]
+    return windows, valid
+
+
+def _raw_returns(windows):
+    """
+    Simple returns along the event-time axis; first row and gaps are NaN.
+    """
+    returns = np.full(windows.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[:, 1:] = windows[:, 1:] / windows[:, :-1] - 1.0
+    return returns
+
+
+def window_returns(windows):
+    """
+    Simple returns along the event-time axis. Matches
+    `pct_change().fillna(0.0)` on each window: first row and gaps are 0.
+    """
+    returns = _raw_returns(windows)
+    returns[np.isnan(returns)] = 0.0
+    return returns
+
+
+def market_model_params(price_matrix, event_idx, ticker_cols, bench_col,
+                        estimation=ESTIMATION_WINDOW):
+    """
+    OLS of ticker returns on benchmark returns over the estimation window,
+    for every event x ticker at once.
+
+    The per-regression normal equations are reduced to masked sums over the
+    (events, days, tickers) estimation array, so all regressions are solved
+    in the same handful of array operations.
+    Returns:
+      alpha, beta: (events, tickers), NaN where there are too few observations
+    """
+    est_start, est_end = estimation
+    windows, valid = gather_windows(price_matrix, event_idx, -est_start, est_end)
+    returns = _raw_returns(windows)
+
+    y = returns[:, :, ticker_cols]            # (E, D, N)
+    x = returns[:, :, [bench_col]]            # (E, D, 1)
+    mask = np.isfinite(y) & np.isfinite(x)
+    x = np.where(mask, x, 0.0)
+    y = np.where(mask, y, 0.0)
+
+    n = mask.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_mean = x.sum(axis=1) / n
+        y_mean = y.sum(axis=1) / n
+        x_dev = np.where(mask, x - x_mean[:, None, :], 0.0)
+        y_dev = np.where(mask, y - y_mean[:, None, :], 0.0)
+        beta = (x_dev * y_dev).sum(axis=1) / (x_dev ** 2).sum(axis=1)
+    alpha = y_mean - beta * x_mean
+
+    usable = valid[:, None] & (n >= MIN_ESTIMATION_OBS) & np.isfinite(beta)
+    alpha = np.where(usable, alpha, np.nan)
+    beta = np.where(usable, beta, np.nan)
+    return alpha, beta
+
+
+def compute_car_tensor(price_matrix, event_idx, ticker_cols, bench_col, pre=20, post=20,
+                       model="market", estimation=None):
+    """
+    Batched event study on one aligned price matrix.
+
+    price_matrix: (dates, columns) closes, benchmark included
+    event_idx:    (events,) row of T=0 for each event
+    ticker_cols:  columns to compute CAR for
+    bench_col:    column of the benchmark
+    model:        "market" (ticker - benchmark) or "market_model"
+                  (ticker - alpha - beta * benchmark, fit over `estimation`,
+                  by default estimation_window(pre))
+
+    CAR starts at 0 on the first day of the window in both models.
+    """
+    if model not in ABNORMAL_MODELS:
+        raise ValueError(f"Unknown abnormal-return model: {model}")
+
+    price_matrix = np.asarray(price_matrix, dtype=float)
+    windows, valid = gather_windows(price_matrix, event_idx, pre, post)
+    returns = window_returns(windows)
+    ticker_returns = returns[:, :, ticker_cols]
+    bench_returns = returns[:, :, [bench_col]]
+
+    alpha = beta = None
+    if model == "market":
+        abnormal = ticker_returns - bench_returns
+    else:
+        estimation = estimation_window(pre) if estimation is None else estimation
+        alpha, beta = market_model_params(
+            price_matrix, event_idx, ticker_cols, bench_col, estimation
+        )
+        expected = alpha[:, None, :] + beta[:, None, :] * bench_returns
+        abnormal = ticker_returns - expected
+        abnormal[:, 0, :] = np.where(np.isnan(abnormal[:, 0, :]), np.nan, 0.0)
+        valid = valid & np.isfinite(beta).any(axis=1)
+
+    car = np.cumsum(abnormal, axis=1) * 100  # percent
+
+    if valid.any():
+        with warnings.catch_warnings():
+            # all-NaN columns (ticker without an estimate) stay NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            caar = np.nanmean(car[valid], axis=0)
+    else:
+        caar = np.full(car.shape[1:], np.nan)
+
+    return CarTensor(
+        t_values=np.arange(-pre, post + 1),
+        valid=valid,
+        returns=ticker_returns,
+        abnormal=abnormal,
+        car=car,
+        caar=caar,
+        alpha=alpha,
+        beta=beta,
+    )
+
+
+def can_slice(model, pre, wide_pre):
+    """
+    True when CAR over [T-pre, ...] may be cut out of CAR computed over a
+    window starting at T-wide_pre: always under the market-adjusted model;
+    under the market model only when both windows share the same
+    estimation window, since alpha and beta depend on it.
+    """
+    return model == "market" or estimation_window(pre) == estimation_window(wide_pre)
+
+
+def slice_car(car, t_values, pre, post):
+    """
+    CAR over the narrower window [T-pre, T+post] from CAR over a window that
+    contains it, without going back to prices: the slice is re-based on its
+    first day, which is exactly what a fresh computation over the narrower
+    window starts from (abnormal returns inside the slice are unchanged, as
+    long as can_slice() holds).
+
+    car: (..., t, tickers) with t matching `t_values` (contiguous)
+    Returns (..., pre + post + 1, tickers)
+    """
+    car = np.asarray(car)
+    lo = -pre - t_values[0]
+    hi = post - t_values[0]
+    if lo < 0 or hi >= len(t_values):
+        raise ValueError(
+            f"Window T-{pre}..T+{post} is not inside T{t_values[0]:+d}..T{t_values[-1]:+d}"
+        )
+    window = car[..., lo:hi + 1, :]
+    return window - window[..., :1, :]
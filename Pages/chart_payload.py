@@ -0,0 +1,108 @@
+import os
+import warnings
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------------------
+# CHART PAYLOADS (server-side aggregation + compact frames)
+# --------------------------------------------------------------
+# Whatever is handed to st.altair_chart is serialized and shipped to the
+# browser, so the size of a chart must not grow with the number of events:
+#   - up to `max_lines` events (and MAX_CHART_POINTS rows) each event is a
+#     line; beyond that the events are summarized per (t, industry) as
+#     quantile bands, 41 rows per industry however many events there are
+#   - point markers are only drawn on small charts
+#   - frames are column-compact: categorical labels, small integer t and
+#     float32 values, which Arrow serializes as dictionaries and 4-byte
+#     floats instead of one repeated string per row
+
+MAX_EVENT_LINES = int(os.environ.get("EVENT_STUDY_MAX_EVENT_LINES", 25))
+MAX_CHART_POINTS = int(os.environ.get("EVENT_STUDY_MAX_CHART_POINTS", 20_000))
+POINT_MARKER_LIMIT = 1_500
+
+# Event-time ticks drawn on the x axis at most (wider windows skip days)
+MAX_AXIS_TICKS = 41
+
+# Quantiles drawn for large event sets: outer band, inner band, median
+BAND_QUANTILES = {"P10": 0.10, "P25": 0.25, "Median": 0.50, "P75": 0.75, "P90": 0.90}
+
+
+def compact_frame(df, float_digits=4):
+    """
+    Same rows with compact dtypes: labels as categoricals, integer columns
+    downcast, floats rounded to `float_digits` and stored as float32.
+    """
+    out = {}
+    for name, column in df.items():
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            out[name] = column
+        elif pd.api.types.is_integer_dtype(column.dtype):
+            out[name] = pd.to_numeric(column, downcast="integer")
+        elif pd.api.types.is_float_dtype(column.dtype):
+            out[name] = column.round(float_digits).astype(np.float32)
+        elif pd.api.types.is_bool_dtype(column.dtype):
+            out[name] = column
+        else:
+            out[name] = column.astype("category")
+    return pd.DataFrame(out, index=df.index)
+
+
+def event_time_axis(t_values):
+    """
+    Build a nice axis: ticks at every t (or every 5th, 10th, ... day on long
+    windows), labels like T-20, T, T+1, etc.
+    """
+    step = 1
+    for step in (1, 2, 5, 10, 20, 50, 100):
+        if len(t_values) <= MAX_AXIS_TICKS * step:
+            break
+    return alt.Axis(
+        values=[t for t in t_values if t % step == 0],
+        labelExpr=(
+            "datum.value === 0 ? 'T' : "
+            "datum.value < 0 ? 'T' + datum.value : 'T+' + datum.value"
+        ),
+        title="",  # no big 'T' under axis
+    )
+
+
+def event_chart_mode(n_events, n_tickers, n_t, max_lines=MAX_EVENT_LINES,
+                     max_points=MAX_CHART_POINTS):
+    """
+    How to draw per-event CAR.
+    Returns:
+      ("lines" or "bands", draw point markers)
+    """
+    rows = n_events * n_tickers * n_t
+    if n_events > max_lines or rows > max_points:
+        return "bands", False
+    return "lines", rows <= POINT_MARKER_LIMIT
+
+
+def quantile_band_frame(car_cube, t_values, tickers, ticker_to_industry,
+                        quantiles=BAND_QUANTILES):
+    """
+    Cross-event quantiles of CAR at every (t, ticker).
+    Returns compact long rows: t, Ticker, Industry, Events (count of finite
+    values), then one column per quantile.
+    """
+    car_cube = np.asarray(car_cube, dtype=float)
+    n_t, n_tickers = car_cube.shape[1:]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        q = np.nanquantile(car_cube, list(quantiles.values()), axis=0)  # (q, t, tickers)
+
+    ticker_col = pd.Categorical.from_codes(
+        np.repeat(np.arange(n_tickers), n_t), categories=pd.Index(tickers)
+    )
+    frame = {
+        "t": np.tile(np.asarray(t_values), n_tickers),
+        "Ticker": ticker_col,
+        "Industry": ticker_col.map(ticker_to_industry),
+        "Events": np.isfinite(car_cube).sum(axis=0).T.ravel(),
+    }
+    for i, name in enumerate(quantiles):
+        frame[name] = q[i].T.ravel()
+    return compact_frame(pd.DataFrame(frame))
@@ -0,0 +1,446 @@
+import argparse
+import os
+import warnings
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from Pages import perf
+from Pages.car_engine import compute_car_tensor, gather_windows
+from Pages.intervals import interval_sums
+from Pages.price_store import get_price_store
+from Pages.study import (
+    BENCHMARK,
+    FIXED_WINDOW,
+    INTERVAL_WINDOWS,
+    _transient_labels,
+    align_event_index,
+    disaster_events,
+    event_ranges,
+    event_t_values,
+    industry_map,
+    split_truncated,
+)
+
+# --------------------------------------------------------------
+# CONSTITUENT-LEVEL EVENT STUDY (industry ETFs -> member stocks)
+# --------------------------------------------------------------
+# A local holdings file expands every industry into its member stocks:
+#
+#   industry,ticker,weight
+#   XLU,NEE,12.1
+#   XLU,SO,7.9
+#   Oil & Gas,XOM,22.8
+#
+# `industry` is an industry name or its ETF ticker, weights are normalized
+# per industry (equal weights when the column is missing). Firm-level CAR
+# uses the same download ranges, calendar alignment, windows and
+# abnormal-return models as the ETF study, computed a block of tickers at a
+# time straight into one float32 (events, t, firms) array: 600 firms x 300
+# events x 41 days is ~30 MB. Industry aggregates are holdings-weighted sums
+# over a sparse (industries x firms) weight matrix kept in COO form.
+#
+# Usage:
+#   python -m Pages.constituents synthetic --per-industry 120 --out data/holdings.csv
+#   python -m Pages.batch --provider synthetic --constituents data/holdings.csv
+
+DEFAULT_HOLDINGS_PATH = os.environ.get(
+    "EVENT_STUDY_HOLDINGS", os.path.join("data", "holdings.csv")
+)
+
+CAR_DTYPE = np.float32
+
+# Tickers / events computed per step; bounds the float64 scratch arrays of
+# the CAR engine (the market-model estimation window is the largest)
+CHUNK_TICKERS = 32
+CHUNK_EVENTS = 256
+
+# A firm-event is used only when at least this share of the closes inside
+# its window exist (listings, delistings, suspended trading)
+MIN_FIRM_COVERAGE = 0.9
+
+HoldingsMatrix = namedtuple(
+    "HoldingsMatrix",
+    [
+        "industries",  # industry names, row order
+        "tickers",     # constituent tickers, column order
+        "rows",        # (nnz,) int32 industry row, sorted
+        "cols",        # (nnz,) int32 constituent column
+        "weights",     # (nnz,) float32, summing to 1 per industry
+    ],
+)
+
+ConstituentStudy = namedtuple(
+    "ConstituentStudy",
+    [
+        "matrix",     # HoldingsMatrix of the selected industries
+        "kept",       # usable event labels, in cube order
+        "skipped",    # event labels without usable price data
+        "truncated",  # event labels whose window runs off the calendar
+        "failed",     # event labels whose download kept failing
+        "car",        # (kept events, t, firms) float32 CAR in percent, NaN = no data
+        "t_values",   # event time of the car rows
+    ],
+)
+
+
+def holdings_exist(path=DEFAULT_HOLDINGS_PATH):
+    return os.path.exists(path)
+
+
+def load_holdings(path=DEFAULT_HOLDINGS_PATH):
+    """
+    Holdings from a CSV or Parquet file with columns industry (name or ETF
+    ticker), ticker and optionally weight.
+    Returns DataFrame: Industry, Ticker, Weight (non-positive weights dropped,
+    duplicates summed).
+    """
+    if path.endswith(".parquet"):
+        raw = pd.read_parquet(path)
+    else:
+        raw = pd.read_csv(path)
+    raw.columns = [str(c).strip().lower() for c in raw.columns]
+    missing = {"industry", "ticker"} - set(raw.columns)
+    if missing:
+        raise ValueError(f"Holdings file {path} has no column(s): {', '.join(sorted(missing))}")
+
+    etf_to_industry = {v: k for k, v in industry_map.items()}
+    industry = raw["industry"].astype(str).str.strip()
+    industry = industry.map(lambda name: etf_to_industry.get(name.upper(), name))
+    unknown = sorted(set(industry) - set(industry_map))
+    if unknown:
+        raise ValueError(f"Unknown industries in {path}: {', '.join(unknown)}")
+
+    weight = raw["weight"] if "weight" in raw.columns else 1.0
+    holdings = pd.DataFrame(
+        {
+            "Industry": industry,
+            "Ticker": raw["ticker"].astype(str).str.strip().str.upper(),
+            "Weight": pd.to_numeric(weight, errors="coerce"),
+        }
+    )
+    holdings = holdings[holdings["Weight"] > 0]
+    return holdings.groupby(["Industry", "Ticker"], as_index=False, sort=False)["Weight"].sum()
+
+
+def holdings_matrix(holdings, industries=None):
+    """
+    Sparse (industries x constituents) weight matrix in COO form, rows in
+    `industries` order (every industry with holdings by default), weights
+    normalized to sum to 1 per industry. A stock held by several industries
+    is one column.
+    """
+    if industries is None:
+        industries = [name for name in industry_map if name in set(holdings["Industry"])]
+    industries = [name for name in industries if name in set(holdings["Industry"])]
+    selected = holdings[holdings["Industry"].isin(industries)]
+
+    tickers = list(dict.fromkeys(selected["Ticker"]))
+    row_of = {name: i for i, name in enumerate(industries)}
+    col_of = {ticker: j for j, ticker in enumerate(tickers)}
+    rows = selected["Industry"].map(row_of).to_numpy(np.int32)
+    cols = selected["Ticker"].map(col_of).to_numpy(np.int32)
+    weights = selected["Weight"].to_numpy(float)
+
+    order = np.lexsort((cols, rows))
+    rows, cols, weights = rows[order], cols[order], weights[order]
+    totals = np.bincount(rows, weights=weights, minlength=len(industries))
+    weights = (weights / totals[rows]).astype(np.float32)
+    return HoldingsMatrix(industries, tickers, rows, cols, weights)
+
+
+# --------------------------------------------------------------
+# FIRM-LEVEL CAR
+# --------------------------------------------------------------
+def firm_event_cars(event_labels, tickers, model="market", events=None, alignment="nearest",
+                    pre=FIXED_WINDOW, post=FIXED_WINDOW, chunk_tickers=CHUNK_TICKERS,
+                    chunk_events=CHUNK_EVENTS):
+    """
+    CAR for every event x ticker. Prices for all tickers are fetched once
+    per merged time span; T=0 is aligned on the benchmark's trading days
+    (a stray quote from one of hundreds of stocks must not shift the
+    calendar), then CAR is computed chunk by chunk into a float32 array.
+    Firm-events with too few closes in the window are NaN.
+    Returns:
+      (car (events, t, tickers) float32, valid (events,) bool,
+       list of FailedFetch)
+    """
+    events = disaster_events if events is None else events
+    tickers = list(tickers)
+    n_t = pre + post + 1
+    car = np.full((len(event_labels), n_t, len(tickers)), np.nan, dtype=CAR_DTYPE)
+    valid = np.zeros(len(event_labels), dtype=bool)
+    if not len(event_labels) or not tickers:
+        return car, valid, []
+
+    starts, ends, cut = event_ranges(event_labels, model, events, alignment, pre, post)
+    ranges = [(s, e) for s, e, c in zip(starts, ends, cut) if not c]
+    with perf.span("load_prices", events=len(event_labels), tickers=len(tickers)) as fields:
+        prices, failures = get_price_store().fetch_many([*tickers, BENCHMARK], ranges)
+        prices = prices.reindex(columns=[*tickers, BENCHMARK])
+        prices = prices[prices[BENCHMARK].notna()]
+        fields["rows"] = len(prices)
+    if prices.empty:
+        return car, valid, failures
+
+    close = prices.to_numpy(float)
+    firms, bench = close[:, :-1], close[:, -1:]
+    event_index = align_event_index(
+        event_labels, prices.index, model, events, alignment, pre, post
+    )
+    _, valid = gather_windows(bench, event_index, pre, post)
+
+    with perf.span("firm_car_engine", events=len(event_labels), tickers=len(tickers)):
+        for first in range(0, len(event_labels), chunk_events):
+            rows = slice(first, first + chunk_events)
+            index = event_index[rows]
+            for lo in range(0, len(tickers), chunk_tickers):
+                cols = slice(lo, lo + chunk_tickers)
+                block = firms[:, cols]
+                k = block.shape[1]
+                tensor = compute_car_tensor(
+                    np.hstack([block, bench]), index, list(range(k)), k, pre, post, model
+                )
+                windows, _ = gather_windows(block, index, pre, post)
+                covered = np.isfinite(windows).mean(axis=1) >= MIN_FIRM_COVERAGE
+                usable = tensor.valid[:, None] & covered
+                car[rows, :, cols] = np.where(usable[:, None, :], tensor.car, np.nan)
+    return car, valid, failures
+
+
+def constituent_study(event_labels, industries=None, holdings=None, model="market",
+                      events=None, alignment="nearest", pre=FIXED_WINDOW, post=FIXED_WINDOW):
+    """
+    Firm-level event study for the constituents of `industries`, read from
+    `holdings` (DataFrame from load_holdings(), or the default file).
+    """
+    events = disaster_events if events is None else events
+    holdings = load_holdings() if holdings is None else holdings
+    matrix = holdings_matrix(holdings, industries)
+
+    with perf.span("align_events", events=len(event_labels)):
+        usable, truncated = split_truncated(list(event_labels), model, events, alignment, pre, post)
+    car, valid, failures = firm_event_cars(
+        usable, matrix.tickers, model, events, alignment, pre, post
+    )
+    has_data = valid & np.isfinite(car).any(axis=(1, 2))
+
+    starts, ends, _ = event_ranges(usable, model, events, alignment, pre, post)
+    transient = _transient_labels(usable, starts, ends, matrix.tickers, failures)
+    kept = [label for label, ok in zip(usable, has_data) if ok]
+    failed = [label for label, ok in zip(usable, has_data) if not ok and label in transient]
+    skipped = [
+        label for label, ok in zip(usable, has_data) if not ok and label not in transient
+    ]
+    perf.gauge("constituents.car_mb", round(car.nbytes / 2**20, 2))
+    return ConstituentStudy(
+        matrix, kept, skipped, truncated, failed, car[has_data], event_t_values(pre, post)
+    )
+
+
+# --------------------------------------------------------------
+# AGGREGATES + CROSS-SECTIONAL STATISTICS
+# --------------------------------------------------------------
+def weighted_aggregate(car, matrix, chunk_events=CHUNK_EVENTS):
+    """
+    Holdings-weighted industry CAR, sum_j w_ij * car_j, as one segment sum
+    over the COO entries. Weights are renormalized over the firms with a
+    finite CAR, so a missing stock does not drag its industry towards 0.
+    car: (events, t, firms) -> (events, t, industries) float32
+    """
+    car = np.asarray(car)
+    out = np.full(car.shape[:2] + (len(matrix.industries),), np.nan, dtype=CAR_DTYPE)
+    if not len(matrix.rows):
+        return out
+    starts = np.flatnonzero(np.r_[True, np.diff(matrix.rows) != 0])
+    present = matrix.rows[starts]
+
+    for first in range(0, len(car), chunk_events):
+        block = car[first:first + chunk_events][..., matrix.cols]  # (e, t, nnz)
+        finite = np.isfinite(block)
+        weighted = np.where(finite, block * matrix.weights, 0.0)
+        total = np.add.reduceat(weighted, starts, axis=-1)
+        norm = np.add.reduceat(np.where(finite, matrix.weights, 0.0), starts, axis=-1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[first:first + chunk_events][..., present] = np.where(norm > 0, total / norm, np.nan)
+    return out
+
+
+def industry_caar(study):
+    """
+    Mean holdings-weighted CAR across events.
+    Returns DataFrame with index = t, columns = industry ETF tickers (so the
+    ETF study's chart frames apply unchanged).
+    """
+    aggregate = weighted_aggregate(study.car, study.matrix)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(aggregate, axis=0) if len(aggregate) else np.nan
+    return pd.DataFrame(
+        np.broadcast_to(mean, (len(study.t_values), len(study.matrix.industries))),
+        index=study.t_values,
+        columns=[industry_map[name] for name in study.matrix.industries],
+    )
+
+
+def _window_means(car, t_values, windows, chunk_events=CHUNK_EVENTS):
+    """
+    Mean CAR inside every window, a chunk of events at a time.
+    Returns (events, windows, firms) float32.
+    """
+    out = np.empty((len(car), len(windows), car.shape[-1]), dtype=CAR_DTYPE)
+    for first in range(0, len(car), chunk_events):
+        out[first:first + chunk_events] = interval_sums(
+            car[first:first + chunk_events], t_values, windows
+        )[2]
+    return out
+
+
+def _moments(values, axis):
+    """
+    Count of finite values, mean, median, sample std and t-stat of the mean.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        n = np.isfinite(values).sum(axis=axis)
+        mean = np.nanmean(values, axis=axis)
+        median = np.nanmedian(values, axis=axis)
+        std = np.nanstd(values, axis=axis, ddof=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_stat = mean / (std / np.sqrt(n))
+    return n, mean, median, std, t_stat
+
+
+def cross_section_frame(study, windows=None):
+    """
+    Cross-sectional statistics of firm-level window CAR for every industry
+    and window, over all firm-event pairs.
+    Returns rows: Industry, Period, Firms, Observations, Mean CAR (%),
+    Median CAR (%), Std (%), t-stat, Positive (%), Weighted CAR (%).
+    """
+    windows = INTERVAL_WINDOWS if windows is None else windows
+    matrix = study.matrix
+    means = _window_means(study.car, study.t_values, windows)  # (E, W, N)
+    weighted = _window_means(
+        weighted_aggregate(study.car, matrix), study.t_values, windows
+    )  # (E, W, industries)
+
+    rows = []
+    for i, industry in enumerate(matrix.industries):
+        cols = matrix.cols[matrix.rows == i]
+        values = means[:, :, cols].transpose(1, 0, 2).reshape(len(windows), -1).astype(float)
+        n, mean, median, std, t_stat = _moments(values, axis=1)
+        _, weighted_mean, _, _, _ = _moments(weighted[:, :, i].T.astype(float), axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            positive = 100 * (values > 0).sum(axis=1) / n
+        firms = np.isfinite(means[:, :, cols]).any(axis=0).sum(axis=1)
+        for w, label in enumerate(windows):
+            if not n[w]:
+                continue
+            rows.append({
+                "Industry": industry,
+                "Period": label,
+                "Firms": int(firms[w]),
+                "Observations": int(n[w]),
+                "Mean CAR (%)": mean[w],
+                "Median CAR (%)": median[w],
+                "Std (%)": std[w],
+                "t-stat": t_stat[w],
+                "Positive (%)": positive[w],
+                "Weighted CAR (%)": weighted_mean[w],
+            })
+    columns = ["Industry", "Period", "Firms", "Observations", "Mean CAR (%)",
+               "Median CAR (%)", "Std (%)", "t-stat", "Positive (%)", "Weighted CAR (%)"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def firm_interval_frame(study, windows=None):
+    """
+    Average CAR of every constituent inside every window across events.
+    Returns long rows: Industry, Ticker, Weight (%), Period, Events,
+    Average CAR (%), t-stat (one set per holding, so a stock held by two
+    industries appears under both).
+    """
+    windows = INTERVAL_WINDOWS if windows is None else windows
+    matrix = study.matrix
+    means = _window_means(study.car, study.t_values, windows).astype(float)
+    n, mean, _, _, t_stat = _moments(means, axis=0)  # (W, N)
+
+    n_windows, nnz = len(windows), len(matrix.cols)
+    entry = np.repeat(np.arange(nnz), n_windows)
+    window = np.tile(np.arange(n_windows), nnz)
+    col = matrix.cols[entry]
+    frame = pd.DataFrame(
+        {
+            "Industry": pd.Categorical.from_codes(
+                matrix.rows[entry], categories=pd.Index(matrix.industries)
+            ),
+            "Ticker": pd.Categorical.from_codes(col, categories=pd.Index(matrix.tickers)),
+            "Weight (%)": 100 * matrix.weights[entry].astype(float),
+            "Period": pd.Categorical.from_codes(window, categories=pd.Index(list(windows))),
+            "Events": n[window, col],
+            "Average CAR (%)": mean[window, col],
+            "t-stat": t_stat[window, col],
+        }
+    )
+    return frame[frame["Events"] > 0].reset_index(drop=True)
+
+
+# --------------------------------------------------------------
+# SYNTHETIC HOLDINGS (scale testing with the synthetic provider)
+# --------------------------------------------------------------
+def synthetic_holdings(per_industry=100, seed=0):
+    """
+    Made-up holdings: `per_industry` tickers per industry with Zipf-like
+    weights, about a tenth of them shared with the next industry.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    names = list(industry_map)
+    for i, name in enumerate(names):
+        etf = industry_map[name]
+        tickers = [f"{etf}{j:03d}" for j in range(per_industry)]
+        shared = [f"{industry_map[names[(i + 1) % len(names)]]}{j:03d}"
+                  for j in range(per_industry // 10)]
+        members = tickers + shared
+        weights = 1.0 / np.arange(1, len(members) + 1) ** 0.8
+        frames.append(pd.DataFrame({
+            "industry": etf,
+            "ticker": members,
+            "weight": np.round(100 * rng.permutation(weights) / weights.sum(), 4),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Constituent holdings files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    synthetic = sub.add_parser("synthetic", help="Write a made-up holdings file.")
+    synthetic.add_argument("--per-industry", type=int, default=100)
+    synthetic.add_argument("--seed", type=int, default=0)
+    synthetic.add_argument("--out", default=DEFAULT_HOLDINGS_PATH)
+
+    show = sub.add_parser("show", help="Summarize a holdings file.")
+    show.add_argument("path", nargs="?", default=DEFAULT_HOLDINGS_PATH)
+
+    args = parser.parse_args(argv)
+    if args.command == "synthetic":
+        directory = os.path.dirname(args.out)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        synthetic_holdings(args.per_industry, args.seed).to_csv(args.out, index=False)
+        print(f"{args.per_industry} holding(s) per industry -> {args.out}")
+        return 0
+
+    matrix = holdings_matrix(load_holdings(args.path))
+    counts = np.bincount(matrix.rows, minlength=len(matrix.industries))
+    for name, count in zip(matrix.industries, counts):
+        print(f"{name:<28} {count:5d} holding(s)")
+    print(f"{len(matrix.tickers)} distinct stock(s), {len(matrix.rows)} holding(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,392 @@
+import argparse
+import datetime as dt
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from Pages.car_engine import can_slice, slice_car
+from Pages.noaa_catalog import CATEGORIES, DEFAULT_CATALOG_PATH, EventCatalog
+from Pages.trading_calendar import ALIGNMENT_POLICIES
+
+# --------------------------------------------------------------
+# MEMORY-MAPPED CAR CUBE STORE
+# --------------------------------------------------------------
+# A precompute step writes the full (event x t x ticker) CAR and abnormal
+# return arrays for one configuration as .npy files, plus a JSON index of
+# event labels, dates, categories and tickers:
+#
+#   data/cubes/<model>-<alignment>/
+#       meta.json      config + event and ticker indexes
+#       car.npy        (events, t, tickers) float32, percent
+#       abnormal.npy   (events, t, tickers) float32
+#       valid.npy      (events,) bool
+#
+# Queries open the arrays with mmap_mode="r": a subset CAAR touches only the
+# selected rows, nothing is fetched, and every process mapping the same
+# files shares one copy in the OS page cache. A cube built over a long
+# window serves any window inside it: the CAR rows are sliced and re-based
+# (see car_engine.slice_car), nothing is recomputed. Under the market model
+# that only holds while the narrower window keeps the cube's estimation
+# window (see car_engine.can_slice); otherwise covers() is False.
+#
+# Usage:
+#   python -m Pages.cube_store build --model market_model
+#   python -m Pages.cube_store build --pre 60 --post 120
+#   python -m Pages.cube_store build --catalog --category Wildfire --min-damage 1e8
+#   python -m Pages.cube_store query --category Wildfire \
+#       --industry "Renewable Energy (Solar)" --industry "Oil & Gas"
+
+DEFAULT_CUBE_DIR = os.environ.get("EVENT_STUDY_CUBE_DIR", os.path.join("data", "cubes"))
+
+# Events computed (and held in RAM) per step while building
+BUILD_CHUNK_EVENTS = 256
+
+CUBE_DTYPE = np.float32
+
+
+def cube_path(model="market", alignment="nearest", root=DEFAULT_CUBE_DIR):
+    return os.path.join(root, f"{model}-{alignment}")
+
+
+def build_cube(path, event_labels, tickers, model="market", alignment="nearest",
+               events=None, categories=None, chunk_events=BUILD_CHUNK_EVENTS,
+               pre=None, post=None):
+    """
+    Compute CAR and abnormal returns over [T-pre, T+post] (the default event
+    window unless given) for every event x ticker and write them to `path`.
+    Events are processed `chunk_events` at a time straight into the mapped
+    output files, so memory stays flat however many events there are. The
+    finished directory is swapped in with renames only, so `path` always
+    holds a complete cube (the old one until the new one replaces it).
+    Returns the CarCube.
+    """
+    from Pages.study import (
+        BENCHMARK,
+        FIXED_WINDOW,
+        disaster_categories,
+        disaster_events,
+        event_t_values,
+        fetch_event_cars,
+        load_event_prices,
+        split_truncated,
+    )
+
+    pre = FIXED_WINDOW if pre is None else pre
+    post = FIXED_WINDOW if post is None else post
+    t_values = event_t_values(pre, post)
+    events = disaster_events if events is None else events
+    categories = disaster_categories if categories is None else categories
+    tickers = list(tickers)
+    usable, truncated = split_truncated(list(event_labels), model, events, alignment, pre, post)
+
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    shape = (len(usable), len(t_values), len(tickers))
+    car = np.lib.format.open_memmap(os.path.join(tmp, "car.npy"), "w+", CUBE_DTYPE, shape)
+    abnormal = np.lib.format.open_memmap(
+        os.path.join(tmp, "abnormal.npy"), "w+", CUBE_DTYPE, shape
+    )
+    valid = np.zeros(len(usable), dtype=bool)
+
+    for first in range(0, len(usable), chunk_events):
+        labels = usable[first:first + chunk_events]
+        rows = slice(first, first + len(labels))
+        prices = load_event_prices(
+            labels, [*tickers, BENCHMARK], model, events, alignment, pre, post
+        )
+        tensor, _, _ = fetch_event_cars(
+            labels, tickers, prices, model, events, alignment, pre, post
+        )
+        if tensor is None:
+            car[rows] = abnormal[rows] = np.nan
+            continue
+        car[rows] = np.where(tensor.valid[:, None, None], tensor.car, np.nan)
+        abnormal[rows] = np.where(tensor.valid[:, None, None], tensor.abnormal, np.nan)
+        valid[rows] = tensor.valid
+
+    car.flush()
+    abnormal.flush()
+    del car, abnormal
+    np.save(os.path.join(tmp, "valid.npy"), valid)
+
+    meta = {
+        "model": model,
+        "alignment": alignment,
+        "benchmark": BENCHMARK,
+        "pre": pre,
+        "post": post,
+        "t_values": t_values,
+        "tickers": tickers,
+        "events": usable,
+        "dates": [str(events[label]) for label in usable],
+        "categories": [categories.get(label) for label in usable],
+        "truncated": truncated,
+        "created": dt.datetime.now().isoformat(timespec="seconds"),
+    }
+    with open(os.path.join(tmp, "meta.json"), "w") as fh:
+        json.dump(meta, fh, indent=2)
+
+    # Move the old cube aside rather than deleting it in place: a reader
+    # that already mapped its files keeps them, and a crash leaves either
+    # cube whole
+    old = path + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return CarCube(path)
+
+
+class CarCube:
+    """
+    Read side of one precomputed cube. Arrays are memory-mapped on first
+    use; pickling sends only the path, so worker processes map the same
+    files instead of copying them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as fh:
+            self.meta = json.load(fh)
+        self.events = self.meta["events"]
+        self.tickers = self.meta["tickers"]
+        self.t_values = self.meta["t_values"]
+        self._event_row = {label: i for i, label in enumerate(self.events)}
+        self._ticker_col = {ticker: j for j, ticker in enumerate(self.tickers)}
+        self._arrays = {}
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def __len__(self):
+        return len(self.events)
+
+    def _array(self, name):
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.path, name + ".npy"), mmap_mode="r")
+        return self._arrays[name]
+
+    @property
+    def car(self):
+        return self._array("car")
+
+    @property
+    def abnormal(self):
+        return self._array("abnormal")
+
+    @property
+    def valid(self):
+        return self._array("valid")
+
+    @property
+    def window(self):
+        """
+        (pre, post) event window the cube was built over.
+        """
+        return -self.t_values[0], self.t_values[-1]
+
+    def covers(self, model, alignment, pre, post, benchmark):
+        """
+        True when the cube has this configuration, its window contains
+        [T-pre, T+post] and slicing it gives the same CAR as a fresh
+        computation over that window.
+        """
+        meta = self.meta
+        cube_pre, cube_post = self.window
+        return (
+            (meta["model"], meta["alignment"], meta["benchmark"]) == (model, alignment, benchmark)
+            and pre <= cube_pre
+            and post <= cube_post
+            and can_slice(model, pre, cube_pre)
+        )
+
+    # ---------- index selection ----------
+    def select(self, event_labels=None, categories=None, tickers=None, events=None):
+        """
+        Rows and columns for a subset. `event_labels` and `categories` are
+        combined with AND; with `events` (label -> date) given, rows whose
+        stored date differs are dropped. Only valid events are returned.
+        Returns:
+          (row indices, column indices)
+        """
+        valid = np.asarray(self.valid)
+        if event_labels is None:
+            rows = np.flatnonzero(valid)
+        else:
+            rows = np.array(
+                [self._event_row[label] for label in event_labels if label in self._event_row],
+                dtype=np.int64,
+            )
+            rows = rows[valid[rows]]
+        if categories is not None:
+            wanted = set(categories)
+            rows = rows[[self.meta["categories"][r] in wanted for r in rows]]
+        if events is not None:
+            dates = self.meta["dates"]
+            rows = rows[[str(events.get(self.events[r])) == dates[r] for r in rows]]
+
+        tickers = self.tickers if tickers is None else tickers
+        cols = np.array([self._ticker_col[t] for t in tickers], dtype=np.int64)
+        return rows.astype(np.int64), cols
+
+    def has_tickers(self, tickers):
+        return all(t in self._ticker_col for t in tickers)
+
+    def car_subset(self, rows, cols, pre=None, post=None):
+        """
+        (rows, t, cols) float64 copy of the selected CAR, over the cube's
+        own window or, when given, the narrower [T-pre, T+post].
+        Raises ValueError when the narrower window would need its own
+        market-model fit.
+        """
+        block = np.asarray(self.car[rows][:, :, cols], dtype=float)
+        if pre is None and post is None:
+            return block
+        cube_pre, cube_post = self.window
+        pre = cube_pre if pre is None else pre
+        post = cube_post if post is None else post
+        if not can_slice(self.meta["model"], pre, cube_pre):
+            raise ValueError(
+                f"T-{pre} uses another estimation window than the cube's T-{cube_pre}; "
+                "build a cube for this window."
+            )
+        return slice_car(block, self.t_values, pre, post)
+
+    def caar(self, rows, cols, chunk_events=BUILD_CHUNK_EVENTS, pre=None, post=None):
+        """
+        Mean CAR over `rows`, accumulated a chunk of rows at a time so only
+        that chunk is paged in. `pre` / `post` narrow the window as in
+        car_subset().
+        Returns DataFrame with index = t, columns = tickers.
+        """
+        cube_pre, cube_post = self.window
+        pre = cube_pre if pre is None else pre
+        post = cube_post if post is None else post
+        total = np.zeros((pre + post + 1, len(cols)))
+        count = np.zeros_like(total)
+        for first in range(0, len(rows), chunk_events):
+            block = self.car_subset(rows[first:first + chunk_events], cols, pre, post)
+            finite = np.isfinite(block)
+            total += np.where(finite, block, 0.0).sum(axis=0)
+            count += finite.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = total / count
+        return pd.DataFrame(
+            mean, index=range(-pre, post + 1), columns=[self.tickers[c] for c in cols]
+        )
+
+
+_cube_cache = {}
+_cube_lock = threading.Lock()
+
+
+def get_car_cube(model="market", alignment="nearest", root=DEFAULT_CUBE_DIR):
+    """
+    The precomputed cube for (model, alignment), or None when none has been
+    built. Reopened when the directory is rebuilt.
+    """
+    path = cube_path(model, alignment, root)
+    meta_path = os.path.join(path, "meta.json")
+    try:
+        stamp = os.stat(meta_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    with _cube_lock:
+        cached = _cube_cache.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, CarCube(path))
+            _cube_cache[path] = cached
+        return cached[1]
+
+
+def main(argv=None):
+    from Pages.price_store import DEFAULT_DB_PATH, configure_price_store
+    from Pages.providers import get_provider
+    from Pages.study import disaster_categories, disaster_events, industry_map
+
+    parser = argparse.ArgumentParser(description="Precomputed CAR cubes.")
+    parser.add_argument("--root", default=DEFAULT_CUBE_DIR)
+    parser.add_argument("--model", choices=["market", "market_model"], default="market")
+    parser.add_argument("--alignment", choices=ALIGNMENT_POLICIES, default="nearest")
+    parser.add_argument("--pre", type=int, default=None,
+                        help="Trading days before T (build: window size; query: slice).")
+    parser.add_argument("--post", type=int, default=None,
+                        help="Trading days after T (build: window size; query: slice).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Compute and write a cube.")
+    build.add_argument("--industry", action="append", dest="industries",
+                       choices=list(industry_map))
+    build.add_argument("--provider", default=None)
+    build.add_argument("--price-db", default=DEFAULT_DB_PATH)
+    build.add_argument("--catalog", nargs="?", const=DEFAULT_CATALOG_PATH, default=None,
+                       help="Use episodes from the Storm Events catalog at this path.")
+    build.add_argument("--category", action="append", choices=CATEGORIES)
+    build.add_argument("--since")
+    build.add_argument("--until")
+    build.add_argument("--min-damage", type=float, default=0.0)
+    build.add_argument("--limit", type=int, default=None)
+
+    query = sub.add_parser("query", help="Subset CAAR from a built cube.")
+    query.add_argument("--category", action="append", choices=CATEGORIES)
+    query.add_argument("--event", action="append", dest="events")
+    query.add_argument("--industry", action="append", dest="industries",
+                       choices=list(industry_map))
+
+    args = parser.parse_args(argv)
+    path = cube_path(args.model, args.alignment, args.root)
+
+    if args.command == "build":
+        configure_price_store(args.price_db, get_provider(args.provider))
+        events, categories = disaster_events, disaster_categories
+        if args.catalog:
+            matches = EventCatalog(args.catalog).query(
+                args.category, args.since, args.until, args.min_damage, None, args.limit
+            )
+            events = EventCatalog.as_events(matches)
+            categories = EventCatalog.as_categories(matches)
+        industries = args.industries or list(industry_map)
+        tickers = [industry_map[name] for name in industries]
+
+        cube = build_cube(path, list(events), tickers, args.model, args.alignment,
+                          events, categories, pre=args.pre, post=args.post)
+        print(
+            f"{int(np.sum(cube.valid))}/{len(cube)} usable event(s) x "
+            f"{len(cube.tickers)} ticker(s) -> {path}"
+        )
+        return 0
+
+    cube = get_car_cube(args.model, args.alignment, args.root)
+    if cube is None:
+        print(f"No cube at {path}; run the build command first.")
+        return 1
+    tickers = [industry_map[name] for name in args.industries or list(industry_map)]
+    cube_pre, cube_post = cube.window
+    if (args.pre or 0) > cube_pre or (args.post or 0) > cube_post:
+        print(f"The cube covers T-{cube_pre}..T+{cube_post}; rebuild it with a wider window.")
+        return 1
+    if args.pre is not None and not can_slice(args.model, args.pre, cube_pre):
+        print(f"The cube's market model is fit before T-{cube_pre}; "
+              f"build one with --pre {args.pre}.")
+        return 1
+    rows, cols = cube.select(args.events, args.category, tickers)
+    caar = cube.caar(rows, cols, pre=args.pre, post=args.post)
+    print(f"CAAR over {len(rows)} event(s):")
+    with pd.option_context("display.width", 160):
+        print(caar.round(3).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,222 +1,419 @@
+import datetime as dt
+import os
+
 import streamlit as st
-import pandas as pd
 import numpy as np
-import yfinance as yf
-import datetime as dt
+import pandas as pd
 import altair as alt
 
-# --------------------------------------------------------------
-# GLOBAL STYLING (tightens top padding, hides default header)
-# --------------------------------------------------------------
-st.markdown(
-    """
-    <style>
-        .block-container {
-            padding-top: 0rem !important;
-            padding-bottom: 6rem !important;
-        }
-        header {visibility: hidden;}
-    </style>
-    """,
-    unsafe_allow_html=True,
+from Pages import perf
+from Pages.car_engine import ESTIMATION_WINDOW, can_slice, slice_car
+from Pages.chart_payload import (
+    MAX_EVENT_LINES,
+    compact_frame,
+    event_chart_mode,
+    event_time_axis,
+    quantile_band_frame,
+)
+from Pages.constituents import (
+    DEFAULT_HOLDINGS_PATH,
+    constituent_study,
+    cross_section_frame,
+    firm_interval_frame,
+    holdings_exist,
+    industry_caar,
+    load_holdings,
+)
+from Pages.intervals import format_windows, parse_windows
+from Pages.noaa_catalog import CATEGORIES, EventCatalog
+from Pages.panel import panel_frame, panel_summary, panel_tests, study_panel
+from Pages.perf import PERF_LOG_PATH, PerfRecorder
+from Pages.significance import DEFAULT_RESAMPLES
+from Pages.study import (
+    FIXED_WINDOW,
+    INTERVAL_WINDOWS,
+    MAX_EVENT_WINDOW,
+    assemble_study,
+    cached_event_cars,
+    caar_long_frame,
+    car_long_frame,
+    disaster_events,
+    event_interval_frame,
+    event_t_values,
+    industry_map,
+    interval_summary,
+    significance,
+    split_truncated,
 )
 
-# --------------------------------------------------------------
-# NATURAL DISASTERS + DATES
-# --------------------------------------------------------------
-disaster_events = {
-    # Hurricanes
-    "Hurricane Ida (Aug 29, 2021)": "2021-08-29",
-    "Hurricane Harvey (Aug 25, 2017)": "2017-08-25",
-    "Hurricane Irma (Sep 10, 2017)": "2017-09-10",
-    # Winter Storms
-    "Texas Winter Storm (Feb 13, 2021)": "2021-02-13",
-    "Winter Storm Elliott (Dec 21, 2022)": "2022-12-21",
-    "Winter Storm Jonas (Jan 22, 2016)": "2016-01-22",
-    # Wildfires
-    "California Wildfires Start (Aug 14, 2020)": "2020-08-14",
-    "Camp Fire California (Nov 8, 2018)": "2018-11-08",
-    "Dixie Fire California (Jul 13, 2021)": "2021-07-13",
-    # Floods
-    "Louisiana Flooding (Aug 12, 2016)": "2016-08-12",
-    "Midwest Flooding (Mar 14, 2019)": "2019-03-14",
-    "Houston Flooding (May 7, 2019)": "2019-05-07",
+# Sidebar label -> abnormal-return model understood by the CAR engine
+ABNORMAL_MODEL_OPTIONS = {
+    "Market-adjusted (ticker − SPY)": "market",
+    (
+        f"Market model (α + β·SPY, estimated T{ESTIMATION_WINDOW[0]} "
+        f"to T{ESTIMATION_WINDOW[1]}, earlier for longer windows)"
+    ): "market_model",
 }
 
-# --------------------------------------------------------------
-# INDUSTRIES (ETF REPRESENTATIVES)
-# --------------------------------------------------------------
-industry_map = {
-    "Electric Utilities": "XLU",
-    "Multi-Utilities": "IDU",
-    "Renewable Energy (Solar)": "TAN",
-    "Water Utilities": "PHO",
-    "Oil & Gas": "XLE",
+# Sidebar label -> trading-calendar alignment policy
+ALIGNMENT_OPTIONS = {
+    "Nearest trading day": "nearest",
+    "Next trading day": "next",
+    "Previous trading day": "previous",
 }
 
-BENCHMARK = "SPY"
-FIXED_WINDOW = 20  # T-20 to T+20
-T_VALUES = list(range(-FIXED_WINDOW, FIXED_WINDOW + 1))  # [-20, ..., +20]
-
 
-def _fetch_event_car(event_label, tickers):
+def select_events(default=("Hurricane Ida (Aug 29, 2021)",)):
     """
-    For a single event:
-      - download data
-      - cut to T-20..T+20 around event
-      - compute CAR for each ticker vs benchmark
+    Sidebar event picker: the curated list (starting from `default`), or a
+    NOAA Storm Events catalog query when a catalog has been built
+    (python -m Pages.noaa_catalog build).
     Returns:
-      DataFrame with index = t (-20..+20), columns = tickers
-      or None if data is unusable.
+      (selected event labels, label -> ISO date mapping)
     """
-    event_date = pd.to_datetime(disaster_events[event_label])
+    catalog = EventCatalog()
+    source = "Curated events"
+    if catalog.exists():
+        source = st.sidebar.radio(
+            "Event source:", ["Curated events", "NOAA Storm Events catalog"], index=0
+        )
 
-    # Wider calendar window to guarantee enough trading days
-    start_dt = event_date - dt.timedelta(days=FIXED_WINDOW * 2)
-    end_dt = event_date + dt.timedelta(days=FIXED_WINDOW * 2)
+    if source == "Curated events":
+        selected = st.sidebar.multiselect(
+            "Select One or More Natural Disasters:",
+            options=list(disaster_events.keys()),
+            default=list(default),
+        )
+        return selected, disaster_events
 
-    data = yf.download(tickers, start=start_dt, end=end_dt, progress=False)
-    if data.empty:
-        return None
+    categories = st.sidebar.multiselect("Disaster categories:", CATEGORIES, default=CATEGORIES)
+    years = st.sidebar.slider("Years:", 1996, dt.date.today().year, (2010, dt.date.today().year))
+    min_damage = st.sidebar.number_input(
+        "Minimum damage ($ millions):", min_value=0.0, value=100.0, step=50.0
+    )
+    limit = int(
+        st.sidebar.number_input("Largest N episodes:", min_value=1, max_value=10_000, value=200)
+    )
 
-    close_prices = data["Close"].dropna(how="all")
-    trading_dates = close_prices.index
+    matches = catalog.query(
+        categories=categories,
+        start=f"{years[0]}-01-01",
+        end=f"{years[1]}-12-31",
+        min_damage=min_damage * 1e6,
+        limit=limit,
+    )
+    st.sidebar.write(f"**{len(matches)}** catalogued episode(s) match.")
+    events = EventCatalog.as_events(matches)
+    return list(events), events
+
+
+def _cube_column(entry, model, pre, post):
+    """
+    One session-cube entry served for the window [T-pre, T+post]. Entries
+    fit over a different estimation window (market model) are not reused.
+    Returns:
+      (found, CAR column or None)
+    """
+    if entry is None:
+        return False, None
+    entry_pre, entry_post, column = entry
+    if not can_slice(model, pre, entry_pre):
+        return False, None
+    if column is None:
+        # No data over a window implies none over any window containing it
+        return pre >= entry_pre and post >= entry_post, None
+    if pre <= entry_pre and post <= entry_post:
+        if (pre, post) == (entry_pre, entry_post):
+            return True, column
+        t_values = event_t_values(entry_pre, entry_post)
+        return True, slice_car(column[:, None], t_values, pre, post)[:, 0]
+    return False, None
+
+
+def _session_study(event_labels, tickers, model, alignment, events, pre, post):
+    """
+    StudyResult for the selection, served from the session's CAR cube.
+
+    The cube maps (event, date, ticker) -> (pre, post, CAR) per (model,
+    alignment). A narrower window is sliced out of the stored CAR; only the
+    (event, ticker) pairs not covered are computed, grouped so that e.g.
+    one new industry costs one bulk load for the existing events. Widening
+    the window recomputes from the price store, which downloads only the
+    extra days. Events whose download failed are not stored, so the next
+    rerun retries them.
+    """
+    cubes = st.session_state.setdefault("event_study_cubes", {})
+    cube = cubes.setdefault((model, alignment), {})
+
+    with perf.span("align_events", events=len(event_labels)):
+        usable, truncated = split_truncated(event_labels, model, events, alignment, pre, post)
+
+    # Serve what the cube covers; group the rest by the tickers still missing
+    columns = {}
+    missing = {}
+    for label in usable:
+        need = []
+        for t in tickers:
+            found, column = _cube_column(
+                cube.get((label, events[label], t)), model, pre, post
+            )
+            if found:
+                columns[(label, t)] = column
+            else:
+                need.append(t)
+        if need:
+            missing.setdefault(tuple(need), []).append(label)
+    n_missing = sum(len(need) * len(labels) for need, labels in missing.items())
+    perf.count("session_cube.hits", len(usable) * len(tickers) - n_missing)
+    perf.count("session_cube.misses", n_missing)
+
+    failed = []
+    for need, labels in missing.items():
+        computed, need_failed = cached_event_cars(
+            labels, list(need), model, events, alignment, pre, post
+        )
+        failed.extend(need_failed)
+        for label in labels:
+            if label in need_failed:
+                continue
+            cars = computed[label]
+            for j, ticker in enumerate(need):
+                column = None if cars is None else cars[:, j]
+                columns[(label, ticker)] = column
+                cube[(label, events[label], ticker)] = (pre, post, column)
+
+    car_by_event = {}
+    for label in usable:
+        row = [columns.get((label, t)) for t in tickers]
+        if all(c is None for c in row):
+            car_by_event[label] = None
+        else:
+            car_by_event[label] = np.column_stack(
+                [np.full(pre + post + 1, np.nan) if c is None else c for c in row]
+            )
 
-    # Nearest trading day to the event date
-    event_index = trading_dates.get_indexer([event_date], method="nearest")[0]
+    return assemble_study(usable, tickers, car_by_event, truncated, failed, pre, post)
 
-    start_slice = event_index - FIXED_WINDOW
-    end_slice = event_index + FIXED_WINDOW
 
-    # Require full window – otherwise skip this event
-    if start_slice < 0 or end_slice >= len(trading_dates):
-        return None
+def _session_significance(result, model, n_resamples, events, windows):
+    """
+    Significance for the current cube; the last answer is kept in session
+    state so presentation-only reruns do not resample again.
+    """
+    pre, post = -result.t_values[0], result.t_values[-1]
+    key = (model, tuple(result.kept), tuple(result.tickers), n_resamples,
+           tuple(windows.values()), pre, post)
+    cached = st.session_state.get("event_study_significance")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    stats = significance(
+        result.car_cube, result.tickers, model, n_resamples, events, windows, pre, post
+    )
+    st.session_state["event_study_significance"] = (key, stats)
+    return stats
 
-    window_prices = close_prices.iloc[start_slice : end_slice + 1].copy()
-    window_prices.index = T_VALUES  # numeric t = -20..+20
 
-    # Returns, abnormal returns, CAR
-    returns = window_prices.pct_change().fillna(0.0)
-    benchmark_returns = returns[BENCHMARK]
-    abnormal = returns[tickers].sub(benchmark_returns, axis=0)
-    abnormal_cum = abnormal.cumsum() * 100  # percent
+def _session_panel(result, model, alignment, events, windows):
+    """
+    Panel regression for the current cube; the last fit is kept in session
+    state so presentation-only reruns (e.g. picking another window's
+    coefficients) do not estimate it again.
+    """
+    pre, post = -result.t_values[0], result.t_values[-1]
+    key = (model, alignment, tuple(result.kept), tuple(events[label] for label in result.kept),
+           tuple(result.tickers), tuple(windows.items()), pre, post)
+    cached = st.session_state.get("event_study_panel")
+    if cached is not None and cached[0] == key:
+        return cached[1]
 
-    # index is numeric t
-    return abnormal_cum
+    fit = study_panel(result, events, windows)
+    st.session_state["event_study_panel"] = (key, fit)
+    return fit
 
 
-def _event_time_axis():
+def _session_constituents(event_labels, industries, model, alignment, events, pre, post):
     """
-    Build a nice axis: ticks at t = -20..+20, labels like T-20, T, T+1, etc.
+    Constituent-level study for the selection; the last one is kept in
+    session state (until the holdings file changes) so presentation-only
+    reruns do not reload hundreds of price series.
     """
-    return alt.Axis(
-        values=T_VALUES,
-        labelExpr=(
-            "datum.value === 0 ? 'T' : "
-            "datum.value < 0 ? 'T' + datum.value : 'T+' + datum.value"
-        ),
-        title="",  # no big 'T' under axis
+    key = (tuple(event_labels), tuple(events[label] for label in event_labels),
+           tuple(industries), model, alignment, pre, post,
+           os.stat(DEFAULT_HOLDINGS_PATH).st_mtime_ns)
+    cached = st.session_state.get("event_study_constituents")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    study = constituent_study(
+        event_labels, industries, load_holdings(DEFAULT_HOLDINGS_PATH), model, events,
+        alignment, pre, post,
     )
+    # Failed downloads are retried on the next rerun
+    if not study.failed:
+        st.session_state["event_study_constituents"] = (key, study)
+    return study
 
 
 # --------------------------------------------------------------
-# MAIN PAGE FUNCTION
+# RESULTS (run with a PerfRecorder active)
 # --------------------------------------------------------------
-def show_event_study():
-    st.title("Natural Disaster Impact on U.S. Utility Industries")
-    st.write(
-        """
-        This dashboard explores how different utility-related industries reacted to major U.S. natural disasters
-        using an event study methodology.
+def _report_dropped(result):
+    """
+    Warn about truncated, failed and skipped events.
+    Returns False (after an error) when no event is usable.
+    """
+    if result.truncated:
+        st.warning(
+            "The following events were not fetched because their window runs past "
+            "the available trading days:\n- " + "\n- ".join(result.truncated)
+        )
 
-        You can now select multiple disasters and view the average **Cumulative Abnormal Return (CAAR)**
-        across those events, or overlay each event's **CAR** separately.
-        """
-    )
-    st.write("---")
+    if result.failed:
+        st.warning(
+            "Price downloads kept failing for the following events (network or "
+            "rate limit); they will be retried on the next run:\n- "
+            + "\n- ".join(result.failed)
+        )
 
-    # ---------- SIDEBAR CONTROLS ----------
-    selected_industries = st.sidebar.multiselect(
-        "Select Industries:",
-        options=list(industry_map.keys()),
-        default=["Electric Utilities"],
-    )
+    if result.skipped:
+        st.warning(
+            "The following events were skipped because no usable price data exists:\n- "
+            + "\n- ".join(result.skipped)
+        )
 
-    selected_disasters = st.sidebar.multiselect(
-        "Select One or More Natural Disasters:",
-        options=list(disaster_events.keys()),
-        default=["Hurricane Ida (Aug 29, 2021)"],
-    )
+    if not result.kept:
+        st.error("No usable events after filtering. Try different selections.")
+        return False
+    return True
 
-    if not selected_industries:
-        st.sidebar.warning("Select at least one industry.")
-    if not selected_disasters:
-        st.sidebar.warning("Select at least one disaster.")
 
-    chart_mode = st.sidebar.radio(
-        "How do you want to visualize the events?",
-        ["Average across events (CAAR)", "Show each event separately (CAR)"],
-        index=0,
-    )
+def _render_constituents(selected_disasters, selected_industries, events, model, alignment,
+                         pre, post, windows):
+    """
+    Firm-level view: every selected industry expanded into its holdings,
+    with the holdings-weighted industry CAAR, cross-sectional statistics and
+    per-stock window averages.
+    """
+    ticker_to_industry = {v: k for k, v in industry_map.items()}
 
-    st.sidebar.write(f"Event window: **T-{FIXED_WINDOW} to T+{FIXED_WINDOW}**")
+    with st.spinner("Computing constituent-level event study..."):
+        with perf.span("constituent_study", events=len(selected_disasters)) as fields:
+            study = _session_constituents(
+                selected_disasters, selected_industries, model, alignment, events, pre, post
+            )
+            fields.update(kept=len(study.kept), stocks=len(study.matrix.tickers))
 
-    if not (selected_industries and selected_disasters):
+    missing = [name for name in selected_industries if name not in study.matrix.industries]
+    if missing:
+        st.warning("No holdings listed for: " + ", ".join(missing))
+    if not study.matrix.tickers or not _report_dropped(study):
         return
 
-    if not st.sidebar.button("Run Analysis"):
-        return
+    st.subheader(
+        f"Holdings-weighted industry CAAR: {len(study.matrix.tickers)} stock(s), "
+        f"{len(study.kept)} event(s)"
+    )
+    with perf.span("weighted_caar") as fields:
+        caar_long = compact_frame(caar_long_frame(industry_caar(study), ticker_to_industry))
+        fields["rows"] = len(caar_long)
+
+    x_scale = alt.Scale(domain=[-pre, post])
+    event_rule = alt.Chart(pd.DataFrame({"t": [0]})).mark_rule(
+        color="red", strokeDash=[4, 4], strokeWidth=2
+    ).encode(x=alt.X("t:Q", scale=x_scale))
+    caar_chart = (
+        alt.Chart(caar_long)
+        .mark_line(point=len(study.t_values) <= 61)
+        .encode(
+            x=alt.X("t:Q", scale=x_scale, axis=event_time_axis(study.t_values)),
+            y=alt.Y("CAR:Q", title="Holdings-weighted CAAR (%)"),
+            color=alt.Color("Industry:N", title="Industry"),
+            tooltip=["t", "Industry", "CAR"],
+        )
+    )
+    with perf.span("render_weighted_caar"):
+        st.altair_chart(caar_chart + event_rule, use_container_width=True)
 
-    # ---------- PREP COMMON OBJECTS ----------
-    industry_tickers = [industry_map[i] for i in selected_industries]
-    ticker_to_industry = {v: k for k, v in industry_map.items()}
-    all_tickers = list(set(industry_tickers + [BENCHMARK]))
+    st.subheader("Cross-section of firm-level CAR by window")
+    st.caption(
+        "One observation per stock and event; the t-stat is the cross-sectional mean "
+        "over its standard error. Weighted CAR uses the holdings weights."
+    )
+    with perf.span("cross_section", windows=len(windows)):
+        cross = cross_section_frame(study, windows)
+    st.dataframe(cross.round(3), use_container_width=True, hide_index=True)
 
-    # ---------- LOOP OVER EVENTS, COLLECT CAR ----------
-    event_car_dict = {}
-    skipped = []
+    with st.expander("Average CAR by stock and window"):
+        with perf.span("firm_intervals") as fields:
+            firms = firm_interval_frame(study, windows)
+            fields["rows"] = len(firms)
+        st.dataframe(firms.round(3), use_container_width=True, hide_index=True)
 
-    for event_label in selected_disasters:
-        abnormal_cum = _fetch_event_car(event_label, all_tickers)
-        if abnormal_cum is None:
-            skipped.append(event_label)
-            continue
-        event_car_dict[event_label] = abnormal_cum[industry_tickers]  # keep only industries
 
-    if skipped:
-        st.warning(
-            "The following events were skipped due to insufficient or missing data:\n- "
-            + "\n- ".join(skipped)
-        )
+def _render_study(selected_disasters, selected_industries, events, chart_mode, model,
+                  alignment, pre, post, windows, run_tests, n_resamples, max_lines):
+    """
+    Compute (or reuse) the study for the sidebar selection and draw every
+    chart. Each stage is timed on the active PerfRecorder.
+    """
+    # ---------- PREP COMMON OBJECTS ----------
+    industry_tickers = [industry_map[i] for i in selected_industries]
+    ticker_to_industry = {v: k for k, v in industry_map.items()}
 
-    if not event_car_dict:
-        st.error("No usable events after filtering. Try different selections.")
+    # ---------- CAR CUBE FROM SESSION STATE, COMPUTING ONLY NEW SLICES ----------
+    with st.spinner("Computing event study..."):
+        with perf.span("study", events=len(selected_disasters)) as fields:
+            result = _session_study(
+                selected_disasters, industry_tickers, model, alignment, events, pre, post
+            )
+            fields.update(kept=len(result.kept), skipped=len(result.skipped))
+        if run_tests and result.kept:
+            with perf.span("significance", resamples=n_resamples):
+                result = result._replace(
+                    significance=_session_significance(
+                        result, model, n_resamples, events, windows
+                    )
+                )
+
+    if not _report_dropped(result):
         return
 
+    significance = result.significance
+    caar_wide = result.caar
+
     # =====================================================================
     # CHART 1: CAAR OR MULTI-EVENT CAR (x = numeric t)
     # =====================================================================
 
-    x_scale = alt.Scale(domain=[-FIXED_WINDOW, FIXED_WINDOW])
+    t_values = result.t_values
+    x_scale = alt.Scale(domain=[-pre, post])
 
     if chart_mode == "Average across events (CAAR)":
         st.subheader(
-            f"Average Cumulative Abnormal Return (CAAR) across {len(event_car_dict)} event(s)"
+            f"Average Cumulative Abnormal Return (CAAR) across {len(result.kept)} event(s)"
         )
 
-        # Stack [events, T-window, industries] and average over events
-        stacked = np.stack([df.values for df in event_car_dict.values()], axis=0)
-        mean_vals = np.nanmean(stacked, axis=0)  # shape (41, num_industries)
-
-        caar_wide = pd.DataFrame(mean_vals, index=T_VALUES, columns=industry_tickers)
-
         # Long format
-        caar_long = (
-            caar_wide.reset_index()
-            .rename(columns={"index": "t"})
-            .melt("t", var_name="Ticker", value_name="CAR")
-        )
-        caar_long["Industry"] = caar_long["Ticker"].map(ticker_to_industry)
+        with perf.span("melt_caar") as fields:
+            caar_long = compact_frame(caar_long_frame(caar_wide, ticker_to_industry))
+            fields["rows"] = len(caar_long)
+
+        layers = []
+        if significance is not None:
+            # 95% bootstrap band, same (t, Ticker) order as the melt above
+            caar_long["Lower"] = significance["lower"].T.ravel()
+            caar_long["Upper"] = significance["upper"].T.ravel()
+            layers.append(
+                alt.Chart(caar_long)
+                .mark_area(opacity=0.15)
+                .encode(
+                    x=alt.X("t:Q", scale=x_scale),
+                    y="Lower:Q",
+                    y2="Upper:Q",
+                    color=alt.Color("Industry:N", title="Industry"),
+                )
+            )
 
         # Red vertical line at t = 0
         event_rule = alt.Chart(pd.DataFrame({"t": [0]})).mark_rule(
@@ -227,98 +424,120 @@ def show_event_study():
             alt.Chart(caar_long)
             .mark_line(point=True)
             .encode(
-                x=alt.X("t:Q", scale=x_scale, axis=_event_time_axis()),
+                x=alt.X("t:Q", scale=x_scale, axis=event_time_axis(t_values)),
                 y=alt.Y("CAR:Q", title="Average Cumulative Abnormal Return (%)"),
                 color=alt.Color("Industry:N", title="Industry"),
                 tooltip=["t", "Industry", "CAR"],
             )
         )
 
-        st.altair_chart(caar_chart + event_rule, use_container_width=True)
-
-        base_for_intervals = caar_wide
+        perf.gauge("payload_rows.caar_chart", len(caar_long) * (len(layers) + 1))
+        with perf.span("render_caar_chart"):
+            st.altair_chart(alt.layer(*layers, caar_chart, event_rule), use_container_width=True)
 
     else:
         st.subheader(
-            f"Cumulative Abnormal Returns (CAR) for {len(event_car_dict)} event(s)"
+            f"Cumulative Abnormal Returns (CAR) for {len(result.kept)} event(s)"
         )
 
-        # Long dataframe: (t, Industry, Event)
-        long_rows = []
-        for event_label, df in event_car_dict.items():
-            temp = (
-                df.reset_index()
-                .rename(columns={"index": "t"})
-                .melt("t", var_name="Ticker", value_name="CAR")
-            )
-            temp["Industry"] = temp["Ticker"].map(ticker_to_industry)
-            temp["Event"] = event_label
-            long_rows.append(temp)
-
-        all_events_long = pd.concat(long_rows, ignore_index=True)
-
         event_rule = alt.Chart(pd.DataFrame({"t": [0]})).mark_rule(
             color="red", strokeDash=[4, 4], strokeWidth=2
         ).encode(x=alt.X("t:Q", scale=x_scale))
 
-        car_chart = (
-            alt.Chart(all_events_long)
-            .mark_line(point=True)
-            .encode(
-                x=alt.X("t:Q", scale=x_scale, axis=_event_time_axis()),
-                y=alt.Y("CAR:Q", title="Cumulative Abnormal Return (%)"),
+        mode, show_points = event_chart_mode(
+            len(result.kept), len(industry_tickers), len(t_values), max_lines
+        )
+
+        if mode == "lines":
+            # Long dataframe: (t, Industry, Event)
+            with perf.span("melt_events") as fields:
+                all_events_long = compact_frame(
+                    car_long_frame(
+                        result.car_cube, result.kept, industry_tickers, ticker_to_industry,
+                        t_values,
+                    )
+                )
+                fields["rows"] = len(all_events_long)
+
+            car_chart = (
+                alt.Chart(all_events_long)
+                .mark_line(point=show_points)
+                .encode(
+                    x=alt.X("t:Q", scale=x_scale, axis=event_time_axis(t_values)),
+                    y=alt.Y("CAR:Q", title="Cumulative Abnormal Return (%)"),
+                    color=alt.Color("Industry:N", title="Industry"),
+                    strokeDash=alt.StrokeDash(
+                        "Event:N", legend=alt.Legend(title="Event")
+                    ),
+                    tooltip=["t", "Industry", "Event", "CAR"],
+                )
+            )
+            payload_rows = len(all_events_long)
+        else:
+            # Too many events to draw one by one: quantile bands per industry
+            st.caption(
+                f"More than {max_lines} events: showing the median CAR with "
+                "25–75% and 10–90% bands across events instead of individual lines."
+            )
+            with perf.span("quantile_bands", events=len(result.kept)) as fields:
+                bands = quantile_band_frame(
+                    result.car_cube, t_values, industry_tickers, ticker_to_industry
+                )
+                fields["rows"] = len(bands)
+
+            base = alt.Chart(bands).encode(
+                x=alt.X("t:Q", scale=x_scale, axis=event_time_axis(t_values)),
                 color=alt.Color("Industry:N", title="Industry"),
-                strokeDash=alt.StrokeDash(
-                    "Event:N", legend=alt.Legend(title="Event")
+            )
+            car_chart = alt.layer(
+                base.mark_area(opacity=0.12).encode(
+                    y=alt.Y("P10:Q", title="Cumulative Abnormal Return (%)"), y2="P90:Q"
+                ),
+                base.mark_area(opacity=0.25).encode(y="P25:Q", y2="P75:Q"),
+                base.mark_line().encode(
+                    y="Median:Q",
+                    tooltip=["t", "Industry", "Events", "P10", "P25", "Median", "P75", "P90"],
                 ),
-                tooltip=["t", "Industry", "Event", "CAR"],
             )
-        )
+            payload_rows = len(bands)
 
-        st.altair_chart(car_chart + event_rule, use_container_width=True)
-
-        # For the interval bars, still use the average across events
-        stacked = np.stack([df.values for df in event_car_dict.values()], axis=0)
-        mean_vals = np.nanmean(stacked, axis=0)
-        base_for_intervals = pd.DataFrame(mean_vals, index=T_VALUES, columns=industry_tickers)
+        perf.gauge("payload_rows.car_chart", payload_rows)
+        with perf.span("render_car_chart", mode=mode):
+            st.altair_chart(car_chart + event_rule, use_container_width=True)
 
     # =====================================================================
     # CHART 2: INTERVAL SUMMARY BARS (BASED ON AVERAGE CAR INSIDE WINDOWS)
     # =====================================================================
     st.subheader("Average CAR Across Key Windows")
 
-    # Window definitions for "Option B"
-    interval_windows = {
-        "T-5 → T": list(range(-5, 1)),        # -5, -4, -3, -2, -1, 0
-        "T → T+3": list(range(0, 4)),         # 0, 1, 2, 3
-        "T → T+10": list(range(0, 11)),       # 0 → 10
-    }
+    if significance is not None:
+        st.caption(
+            f"p-values: two-sided, from {n_resamples:,} bootstrap resamples of the events "
+            "and from placebo events on non-disaster days."
+        )
 
+    # Interval bars always use the average across events
+    with perf.span("intervals", windows=len(windows)):
+        summary = interval_summary(caar_wide, significance, windows)
+    perf.gauge("payload_rows.interval_bars", len(summary))
 
     for industry_name in selected_industries:
         ticker = industry_map[industry_name]
 
-        # FIXED — use the index from base_for_intervals
-        series = base_for_intervals[ticker].reindex(base_for_intervals.index)
-
-        rows = []
-        for label, window_points in interval_windows.items():
-
-            # Ensure all points exist
-            if not all(pt in series.index.tolist() for pt in window_points):
+        perf_df = summary[summary["Ticker"] == ticker].drop(columns="Ticker")
+        for label in windows:
+            if label not in perf_df["Period"].values:
                 st.warning(f"Not enough data for interval '{label}' for {industry_name}.")
-                continue
-
-            avg_val = series.loc[window_points].mean()
-            rows.append([label, avg_val])
 
-        if not rows:
+        if perf_df.empty:
             continue
 
-        perf_df = pd.DataFrame(rows, columns=["Period", "Average CAR (%)"])
         perf_df["Color"] = perf_df["Average CAR (%)"].apply(
             lambda x: "green" if x >= 0 else "red"
         )
+        perf_df["Label"] = perf_df.apply(
+            lambda r: f"p={r['Bootstrap p']:.3f} / {r['Placebo p']:.3f}", axis=1
+        )
 
         st.write(f"### {industry_name}")
 
@@ -328,15 +547,232 @@ def show_event_study():
             .encode(
                 x=alt.X(
                     "Period:N",
-                    sort=["T-5 → T", "T → T+3", "T → T+10"],
+                    sort=list(windows),
                     title="Window",
                 ),
                 y=alt.Y("Average CAR (%):Q", title="Average CAR (percentage points)"),
                 color=alt.Color("Color:N", scale=None, legend=None),
-                tooltip=["Period", "Average CAR (%)"],
+                tooltip=["Period", "Average CAR (%)", "Bootstrap p", "Placebo p"],
+            )
+        )
+
+        if significance is not None:
+            bar_chart = bar_chart + bar_chart.mark_text(dy=-8).encode(
+                text="Label:N", color=alt.value("black")
+            )
+
+        with perf.span("render_interval_chart", industry=ticker):
+            st.altair_chart(bar_chart, use_container_width=True)
+
+    with st.expander("Sum and average CAR by event and window"):
+        with perf.span("event_intervals") as fields:
+            per_event = event_interval_frame(
+                result.car_cube, result.kept, result.tickers, windows, ticker_to_industry,
+                t_values,
             )
+            fields["rows"] = len(per_event)
+        st.dataframe(per_event.drop(columns="Ticker"), use_container_width=True, hide_index=True)
+
+    with st.expander("Panel regression on disaster attributes"):
+        _render_panel(result, model, alignment, events, windows)
+
+
+def _render_panel(result, model, alignment, events, windows):
+    """
+    Window CAR of every event x industry regressed on disaster category,
+    region, season and (catalog events) damage and deaths.
+    """
+    if len(result.kept) < 3:
+        st.info("Select at least three events to estimate the panel regression.")
+        return
+    with perf.span("panel", events=len(result.kept)) as fields:
+        fit = _session_panel(result, model, alignment, events, windows)
+        fields["observations"] = fit.n_obs
+
+    st.write(
+        "Average CAR inside each window, one observation per event and industry, regressed "
+        "on industry intercepts plus disaster category, region and season fixed effects "
+        "(and log damage and deaths for catalog episodes). Standard errors are clustered by "
+        "event; base levels are the first category, region and season present."
+    )
+    if fit.omitted:
+        st.caption("Left out (missing for some events, one level only, or collinear): "
+                   + ", ".join(fit.omitted))
+    st.dataframe(panel_summary(fit), use_container_width=True, hide_index=True)
+
+    st.write("Joint tests: does each group of terms explain window CAR?")
+    st.dataframe(panel_tests(fit), use_container_width=True, hide_index=True)
+
+    coefficients = panel_frame(fit)
+    period = st.selectbox("Coefficients for window:", list(fit.windows), key="panel_window")
+    st.dataframe(
+        coefficients[coefficients["Period"] == period].drop(columns="Period"),
+        use_container_width=True, hide_index=True,
+    )
+
+
+def _performance_panel(recorder):
+    """
+    Optional sidebar breakdown of the last run, plus its JSON lines export.
+    """
+    if PERF_LOG_PATH:
+        recorder.write_jsonl(PERF_LOG_PATH)
+
+    with st.sidebar.expander("Performance"):
+        st.write(f"Total: **{recorder.total_seconds * 1000:,.0f} ms**")
+        st.dataframe(pd.DataFrame(recorder.span_table()), hide_index=True)
+        stats = {**recorder.counters, **recorder.gauges}
+        if stats:
+            st.dataframe(
+                pd.DataFrame({"Metric": list(stats), "Value": list(stats.values())}),
+                hide_index=True,
+            )
+        st.download_button(
+            "Download JSON lines",
+            recorder.to_jsonl(),
+            file_name=f"event_study_perf_{recorder.run_id}.jsonl",
+            mime="application/json",
         )
 
-        st.altair_chart(bar_chart, use_container_width=True)
 
+# --------------------------------------------------------------
+# MAIN PAGE FUNCTION
+# --------------------------------------------------------------
+def show_event_study():
+    st.title("Natural Disaster Impact on U.S. Utility Industries")
+    st.write(
+        """
+        This dashboard explores how different utility-related industries reacted to major U.S. natural disasters
+        using an event study methodology.
 
+        You can now select multiple disasters and view the average **Cumulative Abnormal Return (CAAR)**
+        across those events, or overlay each event's **CAR** separately.
+        """
+    )
+    st.write("---")
+
+    # ---------- SIDEBAR CONTROLS ----------
+    selected_industries = st.sidebar.multiselect(
+        "Select Industries:",
+        options=list(industry_map.keys()),
+        default=["Electric Utilities"],
+    )
+
+    constituents = False
+    if holdings_exist(DEFAULT_HOLDINGS_PATH):
+        constituents = st.sidebar.checkbox(
+            "Expand industries into constituent stocks",
+            value=False,
+            help=f"Firm-level CARs for the holdings listed in {DEFAULT_HOLDINGS_PATH}.",
+        )
+
+    selected_disasters, events = select_events()
+
+    if not selected_industries:
+        st.sidebar.warning("Select at least one industry.")
+    if not selected_disasters:
+        st.sidebar.warning("Select at least one disaster.")
+
+    chart_mode = st.sidebar.radio(
+        "How do you want to visualize the events?",
+        ["Average across events (CAAR)", "Show each event separately (CAR)"],
+        index=0,
+    )
+    max_lines = MAX_EVENT_LINES
+    if chart_mode == "Show each event separately (CAR)":
+        max_lines = int(
+            st.sidebar.number_input(
+                "Individual lines up to (events):",
+                min_value=1,
+                max_value=500,
+                value=MAX_EVENT_LINES,
+                help="Larger selections are drawn as quantile bands across events.",
+            )
+        )
+
+    model_label = st.sidebar.radio(
+        "Abnormal return model:",
+        list(ABNORMAL_MODEL_OPTIONS.keys()),
+        index=0,
+    )
+    model = ABNORMAL_MODEL_OPTIONS[model_label]
+
+    alignment = st.sidebar.selectbox(
+        "Align T=0 to the:",
+        list(ALIGNMENT_OPTIONS.keys()),
+        index=0,
+        help="How event dates that fall on weekends or holidays map to a trading day.",
+    )
+    alignment = ALIGNMENT_OPTIONS[alignment]
+
+    st.sidebar.write("Event window (trading days):")
+    pre_col, post_col = st.sidebar.columns(2)
+    pre = int(
+        pre_col.number_input(
+            "Before T:", min_value=1, max_value=MAX_EVENT_WINDOW, value=FIXED_WINDOW
+        )
+    )
+    post = int(
+        post_col.number_input(
+            "After T:", min_value=1, max_value=MAX_EVENT_WINDOW, value=FIXED_WINDOW
+        )
+    )
+
+    windows_text = st.sidebar.text_input(
+        "Interval windows:",
+        value=format_windows(INTERVAL_WINDOWS),
+        help="Any number of first:last event days separated by ';', e.g. -1:1; -10:20.",
+    )
+    try:
+        windows = parse_windows(windows_text) or INTERVAL_WINDOWS
+    except ValueError as exc:
+        st.sidebar.error(f"{exc}. Using the default windows.")
+        windows = INTERVAL_WINDOWS
+
+    run_tests = st.sidebar.checkbox(
+        "Significance tests (bootstrap + placebo)",
+        value=False,
+        help="95% bootstrap band on the CAAR chart and p-values on the interval bars.",
+    )
+    n_resamples = DEFAULT_RESAMPLES
+    if run_tests:
+        n_resamples = int(
+            st.sidebar.number_input(
+                "Resamples:", min_value=500, max_value=100_000, value=DEFAULT_RESAMPLES, step=500
+            )
+        )
+
+    if not (selected_industries and selected_disasters):
+        return
+
+    # The button starts the analysis once; after that results live in session
+    # state and later widget changes re-render (or fill in new slices) on
+    # their own
+    if st.sidebar.button("Run Analysis"):
+        st.session_state["event_study_active"] = True
+    if not st.session_state.get("event_study_active"):
+        return
+
+    recorder = PerfRecorder(
+        "event_study",
+        model=model,
+        alignment=alignment,
+        window=[-pre, post],
+        chart_mode=chart_mode,
+        events=len(selected_disasters),
+        tickers=len(selected_industries),
+        windows=len(windows),
+        constituents=constituents,
+    )
+    with recorder.activate():
+        if constituents:
+            _render_constituents(
+                selected_disasters, selected_industries, events, model, alignment,
+                pre, post, windows,
+            )
+        else:
+            _render_study(
+                selected_disasters, selected_industries, events, chart_mode, model,
+                alignment, pre, post, windows, run_tests, n_resamples, max_lines,
+            )
+    _performance_panel(recorder)
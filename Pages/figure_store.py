@@ -0,0 +1,58 @@
+import json
+import os
+
+# --------------------------------------------------------------
+# BUILT FIGURE ARTIFACTS (read side, JSON only)
+# --------------------------------------------------------------
+# The Analysis page only reads what `python -m Pages.figures build` wrote,
+# so this module stays free of the data and charting stack:
+#
+#   data/figures/
+#       manifest.json         figure name -> input hash, file, title, counts
+#       hurricane.vl.json     one Vega-Lite spec per category
+
+DEFAULT_FIGURE_DIR = os.environ.get("EVENT_STUDY_FIGURE_DIR", os.path.join("data", "figures"))
+MANIFEST_NAME = "manifest.json"
+
+
+def figure_name(category):
+    return category.lower().replace(" ", "-")
+
+
+def load_manifest(root=DEFAULT_FIGURE_DIR):
+    """
+    Built figures: name -> entry (key, file, title, events, kept, ...), or
+    an empty dict when nothing has been built.
+    """
+    try:
+        with open(os.path.join(root, MANIFEST_NAME)) as fh:
+            return json.load(fh)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def load_figure(name, root=DEFAULT_FIGURE_DIR, manifest=None):
+    """
+    Vega-Lite spec and manifest entry of a built figure.
+    Returns:
+      (spec dict, entry), or (None, None) when it has not been built
+    """
+    manifest = load_manifest(root) if manifest is None else manifest
+    entry = manifest.get(name)
+    if entry is None:
+        return None, None
+    try:
+        with open(os.path.join(root, entry["file"])) as fh:
+            return json.load(fh), entry
+    except FileNotFoundError:
+        return None, None
+
+
+def write_artifact(path, payload):
+    """
+    Write JSON atomically, so a page never reads a half-written file.
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(payload, fh)
+    os.replace(tmp, path)
@@ -0,0 +1,372 @@
+import argparse
+import datetime as dt
+import hashlib
+import json
+import os
+import warnings
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from Pages import perf
+from Pages.car_engine import compute_car_tensor
+from Pages.chart_payload import compact_frame, event_time_axis
+from Pages.figure_store import (
+    DEFAULT_FIGURE_DIR,
+    MANIFEST_NAME,
+    figure_name,
+    load_manifest,
+    write_artifact,
+)
+from Pages.noaa_catalog import CATEGORIES, DEFAULT_CATALOG_PATH, EventCatalog
+from Pages.price_store import get_price_store
+from Pages.significance import bootstrap_caar, confidence_band
+from Pages.study import (
+    BENCHMARK,
+    FIXED_WINDOW,
+    _transient_labels,
+    align_event_index,
+    caar_long_frame,
+    disaster_categories,
+    disaster_events,
+    event_ranges,
+    event_t_values,
+    industry_map,
+)
+from Pages.trading_calendar import ALIGNMENT_POLICIES
+
+# --------------------------------------------------------------
+# ANALYSIS FIGURES (build stage + content-hash cache)
+# --------------------------------------------------------------
+# One CAAR figure per disaster category, computed from the event-study
+# engine and written as a Vega-Lite spec (data inlined) the Analysis page
+# draws without computing anything (layout in figure_store).
+#
+# A figure's hash covers everything it is drawn from: event labels and
+# dates, tickers, model, alignment, window, resamples, the figure code
+# version and a digest of the stored prices it reads. A build loads the
+# prices once (from the local store; only missing days are downloaded),
+# hashes each figure's slice and recomputes only figures whose hash
+# changed, so a rebuild with nothing new is a store read and a few hashes.
+# Stale figures are computed over a process pool when the resampling work
+# is large enough to pay for it.
+#
+# Usage:
+#   python -m Pages.figures build
+#   python -m Pages.figures build --model market_model --resamples 5000
+#   python -m Pages.figures build --catalog --min-damage 1e8 --limit 200
+#   python -m Pages.figures show
+
+# Bump when the figure code changes, so every figure is redrawn once
+FIGURE_VERSION = 1
+
+FIGURE_RESAMPLES = 2_000
+
+# Below this many resampled values (events x t x tickers x resamples,
+# summed over stale figures) a process pool costs more than it saves
+PARALLEL_MIN_WORK = 50_000_000
+
+FigureSpec = namedtuple(
+    "FigureSpec",
+    ["name", "title", "event_labels", "tickers", "model", "alignment", "pre", "post"],
+)
+BuildReport = namedtuple("BuildReport", ["built", "skipped", "failed"])
+
+
+def figure_specs(categories=None, tickers=None, model="market", alignment="nearest",
+                 pre=FIXED_WINDOW, post=FIXED_WINDOW, event_categories=None):
+    """
+    One FigureSpec per disaster category, over the events of that category
+    (`event_categories` maps event label -> category; the curated events by
+    default).
+    """
+    event_categories = disaster_categories if event_categories is None else event_categories
+    tickers = list(industry_map.values()) if tickers is None else list(tickers)
+    specs = []
+    for category in categories or CATEGORIES:
+        labels = [label for label, c in event_categories.items() if c == category]
+        if labels:
+            specs.append(FigureSpec(
+                figure_name(category), category, labels, tickers, model, alignment, pre, post
+            ))
+    return specs
+
+
+# --------------------------------------------------------------
+# CONTENT HASHES
+# --------------------------------------------------------------
+def _frame_digest(prices):
+    """
+    sha256 of a price frame's columns, dates and values.
+    """
+    digest = hashlib.sha256()
+    digest.update("\x1f".join(map(str, prices.columns)).encode())
+    digest.update(prices.index.to_numpy("datetime64[ns]").view(np.int64).tobytes())
+    digest.update(np.ascontiguousarray(prices.to_numpy(float)).tobytes())
+    return digest.hexdigest()
+
+
+def figure_key(spec, events, prices, n_resamples):
+    """
+    Hash of every input of one figure; `prices` is the slice it is drawn
+    from.
+    """
+    inputs = {
+        "version": FIGURE_VERSION,
+        "spec": spec._asdict(),
+        "dates": [events[label] for label in spec.event_labels],
+        "benchmark": BENCHMARK,
+        "resamples": n_resamples,
+        "prices": _frame_digest(prices),
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+# --------------------------------------------------------------
+# COMPUTE + DRAW
+# --------------------------------------------------------------
+def _figure_caar(matrix, event_index, ticker_cols, bench_col, pre, post, model, n_resamples):
+    """
+    CAAR and 95% bootstrap band of one figure.
+    Returns dict with "caar", "lower", "upper" (t, tickers) and "kept"
+    (events,) bool.
+    """
+    tensor = compute_car_tensor(matrix, event_index, ticker_cols, bench_col, pre, post, model)
+    car = tensor.car[tensor.valid]
+    shape = (pre + post + 1, len(ticker_cols))
+    result = {"caar": np.full(shape, np.nan), "lower": np.full(shape, np.nan),
+              "upper": np.full(shape, np.nan), "kept": tensor.valid}
+    if len(car):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            result["caar"] = np.nanmean(car, axis=0)
+            if n_resamples and len(car) > 1:
+                boot = bootstrap_caar(car, n_resamples, seed=0, workers=1)
+                result["lower"], result["upper"] = confidence_band(boot)
+    return result
+
+
+def figure_chart(spec, stats):
+    """
+    Altair chart of one figure: CAAR per industry with its bootstrap band
+    and the event-day rule, on the dashboard's event-time axis.
+    """
+    t_values = event_t_values(spec.pre, spec.post)
+    ticker_to_industry = {v: k for k, v in industry_map.items()}
+    caar = pd.DataFrame(stats["caar"], index=t_values, columns=spec.tickers)
+    data = caar_long_frame(caar, ticker_to_industry)
+    data["Lower"] = stats["lower"].T.ravel()
+    data["Upper"] = stats["upper"].T.ravel()
+    data = compact_frame(data)
+
+    x_scale = alt.Scale(domain=[-spec.pre, spec.post])
+    x = alt.X("t:Q", scale=x_scale, axis=event_time_axis(t_values))
+    color = alt.Color("Industry:N", title="Industry")
+    band = alt.Chart(data).mark_area(opacity=0.15).encode(
+        x=x, y="Lower:Q", y2="Upper:Q", color=color
+    )
+    lines = alt.Chart(data).mark_line(point=True).encode(
+        x=x,
+        y=alt.Y("CAR:Q", title="Average Cumulative Abnormal Return (%)"),
+        color=color,
+        tooltip=["t", "Industry", "CAR", "Lower", "Upper"],
+    )
+    event_rule = alt.Chart(pd.DataFrame({"t": [0]})).mark_rule(
+        color="red", strokeDash=[4, 4], strokeWidth=2
+    ).encode(x=alt.X("t:Q", scale=x_scale))
+    return alt.layer(band, lines, event_rule).properties(
+        title=f"{spec.title}: CAAR across {int(np.sum(stats['kept']))} event(s)"
+    )
+
+
+# --------------------------------------------------------------
+# BUILD
+# --------------------------------------------------------------
+def _spec_ranges(spec, events):
+    starts, ends, truncated = event_ranges(
+        spec.event_labels, spec.model, events, spec.alignment, spec.pre, spec.post
+    )
+    return [(s, e) for s, e, cut in zip(starts, ends, truncated) if not cut]
+
+
+def _slice_prices(prices, spec, ranges):
+    """
+    Rows of the shared price frame inside one figure's event ranges, with
+    its tickers and the benchmark: exactly what the figure is drawn from.
+    """
+    columns = list(dict.fromkeys([*spec.tickers, BENCHMARK]))
+    dates = prices.index
+    rows = np.zeros(len(dates), dtype=bool)
+    for start, end in ranges:
+        rows |= (dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))
+    return prices.loc[rows].reindex(columns=columns).dropna(how="all")
+
+
+def build_figures(specs, root=DEFAULT_FIGURE_DIR, events=None, n_resamples=FIGURE_RESAMPLES,
+                  workers=None, force=False):
+    """
+    Build every figure whose inputs changed since the last build (all of
+    them with `force`). Figures whose price downloads kept failing keep
+    their previous artifact and are reported as failed.
+    Returns BuildReport of figure names.
+    """
+    events = disaster_events if events is None else events
+    os.makedirs(root, exist_ok=True)
+    manifest = load_manifest(root)
+
+    ranges = {spec.name: _spec_ranges(spec, events) for spec in specs}
+    tickers = list(dict.fromkeys(t for spec in specs for t in spec.tickers))
+    all_ranges = [r for spec_ranges in ranges.values() for r in spec_ranges]
+    with perf.span("figure_prices", figures=len(specs)) as fields:
+        if all_ranges:
+            prices, failures = get_price_store().fetch_many(tickers, all_ranges)
+        else:
+            prices, failures = pd.DataFrame(), []
+        fields["rows"] = len(prices)
+
+    stale, skipped, failed = [], [], []
+    with perf.span("figure_hashes", figures=len(specs)):
+        for spec in specs:
+            spec_ranges = ranges[spec.name]
+            starts, ends = [s for s, _ in spec_ranges], [e for _, e in spec_ranges]
+            if _transient_labels(spec.event_labels, starts, ends, spec.tickers, failures):
+                failed.append(spec.name)
+                continue
+            sliced = _slice_prices(prices, spec, spec_ranges)
+            key = figure_key(spec, events, sliced, n_resamples)
+            entry = manifest.get(spec.name)
+            if (not force and entry is not None and entry["key"] == key
+                    and os.path.exists(os.path.join(root, entry["file"]))):
+                skipped.append(spec.name)
+            else:
+                stale.append((spec, sliced, key))
+
+    # Align T=0 in the parent; workers only see arrays
+    tasks = []
+    for spec, sliced, _ in stale:
+        names = list(sliced.columns)
+        event_index = align_event_index(
+            spec.event_labels, sliced.index, spec.model, events, spec.alignment,
+            spec.pre, spec.post,
+        )
+        tasks.append((
+            sliced.to_numpy(float), event_index, [names.index(t) for t in spec.tickers],
+            names.index(BENCHMARK), spec.pre, spec.post, spec.model, n_resamples,
+        ))
+
+    work = sum(
+        len(spec.event_labels) * (spec.pre + spec.post + 1) * len(spec.tickers) * n_resamples
+        for spec, _, _ in stale
+    )
+    workers = workers or os.cpu_count() or 1
+    parallel = workers > 1 and len(tasks) > 1 and work >= PARALLEL_MIN_WORK
+    with perf.span("figure_compute", figures=len(tasks), workers=workers if parallel else 1):
+        if parallel:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                results = list(pool.map(_figure_caar, *zip(*tasks)))
+        else:
+            results = [_figure_caar(*task) for task in tasks]
+
+    built = []
+    with perf.span("figure_write", figures=len(stale)):
+        for (spec, _, key), stats in zip(stale, results):
+            file_name = f"{spec.name}.vl.json"
+            write_artifact(os.path.join(root, file_name), figure_chart(spec, stats).to_dict())
+            manifest[spec.name] = {
+                "key": key,
+                "file": file_name,
+                "title": spec.title,
+                "events": len(spec.event_labels),
+                "kept": int(np.sum(stats["kept"])),
+                "tickers": spec.tickers,
+                "model": spec.model,
+                "alignment": spec.alignment,
+                "window": [-spec.pre, spec.post],
+                "resamples": n_resamples,
+                "built_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+            }
+            built.append(spec.name)
+        if built:
+            write_artifact(os.path.join(root, MANIFEST_NAME), manifest)
+
+    return BuildReport(built, skipped, failed)
+
+
+def main(argv=None):
+    from Pages.price_store import DEFAULT_DB_PATH, configure_price_store
+    from Pages.providers import get_provider
+
+    parser = argparse.ArgumentParser(description="Analysis page figures.")
+    parser.add_argument("--root", default=DEFAULT_FIGURE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Rebuild figures whose inputs changed.")
+    build.add_argument("--category", action="append", choices=CATEGORIES)
+    build.add_argument("--industry", action="append", dest="industries",
+                       choices=list(industry_map))
+    build.add_argument("--model", choices=["market", "market_model"], default="market")
+    build.add_argument("--alignment", choices=ALIGNMENT_POLICIES, default="nearest")
+    build.add_argument("--pre", type=int, default=FIXED_WINDOW)
+    build.add_argument("--post", type=int, default=FIXED_WINDOW)
+    build.add_argument("--resamples", type=int, default=FIGURE_RESAMPLES)
+    build.add_argument("--workers", type=int, default=None)
+    build.add_argument("--force", action="store_true", help="Rebuild every figure.")
+    build.add_argument("--provider", default=None)
+    build.add_argument("--price-db", default=DEFAULT_DB_PATH)
+    build.add_argument("--catalog", nargs="?", const=DEFAULT_CATALOG_PATH, default=None,
+                       help="Use episodes from the Storm Events catalog at this path.")
+    build.add_argument("--since")
+    build.add_argument("--until")
+    build.add_argument("--min-damage", type=float, default=0.0)
+    build.add_argument("--limit", type=int, default=None,
+                       help="Largest N catalog episodes per category.")
+
+    sub.add_parser("show", help="List built figures.")
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        manifest = load_manifest(args.root)
+        if not manifest:
+            print(f"No figures under {args.root}; run the build command first.")
+            return 1
+        for name, entry in manifest.items():
+            print(
+                f"{name:<14} {entry['kept']}/{entry['events']} event(s)  "
+                f"{entry['model']}/{entry['alignment']}  built {entry['built_at']}  "
+                f"{entry['key'][:12]}"
+            )
+        return 0
+
+    configure_price_store(args.price_db, get_provider(args.provider))
+    events, event_categories = disaster_events, disaster_categories
+    if args.catalog:
+        catalog = EventCatalog(args.catalog)
+        events, event_categories = {}, {}
+        for category in args.category or CATEGORIES:
+            matches = catalog.query(
+                [category], args.since, args.until, args.min_damage, None, args.limit
+            )
+            events.update(EventCatalog.as_events(matches))
+            event_categories.update(EventCatalog.as_categories(matches))
+    tickers = [industry_map[name] for name in args.industries or list(industry_map)]
+    specs = figure_specs(args.category, tickers, args.model, args.alignment, args.pre,
+                         args.post, event_categories)
+
+    recorder = perf.PerfRecorder("figures")
+    with recorder.activate():
+        report = build_figures(specs, args.root, events, args.resamples, args.workers,
+                               args.force)
+    print(
+        f"built {len(report.built)}, unchanged {len(report.skipped)}, "
+        f"failed {len(report.failed)} in {recorder.total_seconds:.2f}s -> {args.root}"
+    )
+    for name in report.failed:
+        print(f"  {name}: price downloads kept failing; the previous figure is kept")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+import re
+
+import numpy as np
+
+# --------------------------------------------------------------
+# PREFIX-SUM INTERVAL ENGINE
+# --------------------------------------------------------------
+# A window is an inclusive event-time range (start, end), e.g. (-1, 1) for
+# T-1..T+1. With one cumulative sum along the event-time axis, the sum of CAR
+# inside any window is a difference of two rows:
+#     sum(car[lo..hi]) = prefix[hi + 1] - prefix[lo]
+# so every window x event x ticker comes out of a single fancy-indexed
+# subtraction, however many windows are requested.
+
+DEFAULT_WINDOWS = ((-5, 0), (0, 3), (0, 10))
+
+_BOUND = r"\s*(?:T\s*)?([+-]?\s*\d+)?\s*"
+_WINDOW_RE = re.compile(r"^\(?" + _BOUND + r"(?::|,|\.\.|→|to)" + _BOUND + r"\)?$")
+
+
+def _t_label(t):
+    if t == 0:
+        return "T"
+    return f"T{t:+d}"
+
+
+def window_label(start, end):
+    """
+    Display label of a window, e.g. (-5, 0) -> "T-5 → T".
+    """
+    return f"{_t_label(start)} → {_t_label(end)}"
+
+
+def make_windows(bounds):
+    """
+    {label: (start, end)} from an iterable of (start, end) pairs, in order,
+    without duplicates.
+    """
+    windows = {}
+    for start, end in bounds:
+        start, end = int(start), int(end)
+        if start > end:
+            raise ValueError(f"Window starts after it ends: ({start}, {end})")
+        windows[window_label(start, end)] = (start, end)
+    return windows
+
+
+def parse_window(text):
+    """
+    One window from text: "-1:1", "T-10:T+20", "(-1, 1)" or "0..3". A
+    missing bound means T.
+    """
+    match = _WINDOW_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"Cannot read window '{text}'; use e.g. -1:1 or T-10:T+20")
+    start, end = (int(g.replace(" ", "")) if g else 0 for g in match.groups())
+    return start, end
+
+
+def parse_windows(text):
+    """
+    Several windows separated by ";" or new lines, e.g. "-5:0; 0:3; -1:1".
+    Returns {label: (start, end)}.
+    """
+    parts = [p for p in re.split(r"[;\n]+", text) if p.strip()]
+    return make_windows(parse_window(p) for p in parts)
+
+
+def format_windows(windows):
+    """
+    Inverse of parse_windows(), for prefilling text inputs.
+    """
+    return "; ".join(f"{start}:{end}" for start, end in windows.values())
+
+
+def window_positions(t_values, windows):
+    """
+    Row range of every window on the event-time axis.
+    Returns:
+      (lo, hi, inside) int arrays; `inside` is False for windows that reach
+      past the available event time.
+    """
+    t0, t1 = t_values[0], t_values[-1]
+    bounds = np.array(list(windows.values()), dtype=np.int64).reshape(-1, 2)
+    inside = (bounds[:, 0] >= t0) & (bounds[:, 1] <= t1)
+    lo = np.clip(bounds[:, 0] - t0, 0, len(t_values) - 1)
+    hi = np.clip(bounds[:, 1] - t0, 0, len(t_values) - 1)
+    return lo, hi, inside
+
+
+def interval_sums(car, t_values, windows):
+    """
+    Sum, count of finite values and mean of CAR inside every window.
+
+    car: (..., t, tickers), with t matching `t_values` (contiguous)
+    Returns:
+      (sums, counts, means), each (..., windows, tickers). NaNs are skipped;
+      windows outside `t_values`, or without a finite value, have count 0
+      and NaN sum and mean.
+    """
+    car = np.asarray(car, dtype=float)
+    finite = np.isfinite(car)
+    lo, hi, inside = window_positions(t_values, windows)
+
+    zero = np.zeros(car.shape[:-2] + (1,) + car.shape[-1:])
+    prefix = np.concatenate([zero, np.cumsum(np.where(finite, car, 0.0), axis=-2)], axis=-2)
+    counts_prefix = np.concatenate([zero, np.cumsum(finite, axis=-2)], axis=-2)
+
+    sums = prefix[..., hi + 1, :] - prefix[..., lo, :]
+    counts = counts_prefix[..., hi + 1, :] - counts_prefix[..., lo, :]
+
+    counts = np.where(inside[:, None], counts, 0)
+    sums = np.where(counts == 0, np.nan, sums)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / counts
+    return sums, counts, means
+
+
+def interval_means(car, t_values, windows):
+    """
+    Mean CAR inside every window.
+    Returns (..., windows, tickers).
+    """
+    return interval_sums(car, t_values, windows)[2]
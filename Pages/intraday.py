@@ -0,0 +1,234 @@
+import datetime as dt
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from Pages import perf
+from Pages.car_engine import compute_car_tensor
+from Pages.intervals import make_windows
+from Pages.price_store import get_price_store
+from Pages.providers import BAR_MINUTES, SESSION_MINUTES, SESSION_OPEN
+from Pages.study import (
+    BENCHMARK,
+    _transient_labels,
+    assemble_study,
+    disaster_events,
+)
+from Pages.trading_calendar import projected_trading_days
+
+# --------------------------------------------------------------
+# INTRADAY EVENT STUDY (minute / 5-minute bars)
+# --------------------------------------------------------------
+# Same CAR / CAAR / interval outputs as the daily study, with event time
+# counted in bars: t = -12 on 5-minute bars is one hour before T. T=0 is
+# the first bar starting at or after the event time; an event without a
+# time of day (a plain date) starts at that day's open, and one outside
+# the regular session moves to the next open. Returns between the last bar
+# of a session and the first of the next include the overnight move.
+#
+# Events are processed `chunk_events` at a time: each chunk reads only the
+# sessions around its own events from the price store (bars table, see
+# Pages/price_store.py) as float32, computes CAR and keeps it as float32,
+# so memory grows with the chunk size, not with the number of events.
+#
+# Usage:
+#   python -m Pages.batch --provider synthetic --interval 5m
+#   python -m Pages.batch --interval 1m --pre 60 --post 390 --window=0:60
+
+CAR_DTYPE = np.float32
+
+# Events per chunk
+CHUNK_EVENTS = int(os.environ.get("EVENT_STUDY_INTRADAY_CHUNK", 32))
+
+# Market-model estimation window: this many sessions of bars right before
+# the event window
+ESTIMATION_SESSIONS = 5
+
+# Longest pre / post event window, in sessions
+MAX_WINDOW_SESSIONS = 10
+
+
+def bars_per_session(interval):
+    return SESSION_MINUTES // BAR_MINUTES[interval]
+
+
+def bars_per_hour(interval):
+    return 60 // BAR_MINUTES[interval]
+
+
+def bar_hours(t_values, interval):
+    """
+    Event time in bars -> hours from T.
+    """
+    return np.asarray(t_values) * BAR_MINUTES[interval] / 60.0
+
+
+def default_window(interval):
+    """
+    (pre, post) in bars: one session before T, two sessions after.
+    """
+    per_session = bars_per_session(interval)
+    return per_session, 2 * per_session
+
+
+def intraday_windows(interval, post=None):
+    """
+    Default interval windows in bars: the hour before T, the hour after T
+    and the session after T (when the event window reaches that far).
+    """
+    hour, session = bars_per_hour(interval), bars_per_session(interval)
+    post = default_window(interval)[1] if post is None else post
+    return make_windows([(-hour, 0), (0, min(hour, post)), (0, min(session, post))])
+
+
+def intraday_estimation(interval, pre):
+    """
+    Market-model estimation window in bars, ending right before T-pre.
+    """
+    return (-pre - ESTIMATION_SESSIONS * bars_per_session(interval), -pre - 1)
+
+
+def event_timestamp(value):
+    """
+    Event time as a naive exchange-local Timestamp; a plain date means the
+    open of that day.
+    """
+    stamp = pd.Timestamp(value)
+    if stamp.tz is not None:
+        stamp = stamp.tz_convert("America/New_York").tz_localize(None)
+    if stamp == stamp.normalize():
+        stamp = stamp + pd.Timedelta(hours=SESSION_OPEN.hour, minutes=SESSION_OPEN.minute)
+    return stamp
+
+
+def intraday_ranges(event_labels, interval="5m", model="market", events=None, pre=None,
+                    post=None):
+    """
+    Sessions each event needs: its T session, enough sessions before it
+    for T-pre (and the estimation window under the market model) and
+    enough after it for T+post. Events whose sessions are not all closed
+    yet are cut.
+    Returns:
+      (event times, T sessions, starts, ends, cut) lists
+    """
+    events = disaster_events if events is None else events
+    default_pre, default_post = default_window(interval)
+    pre = default_pre if pre is None else pre
+    post = default_post if post is None else post
+
+    lead = -intraday_estimation(interval, pre)[0] if model == "market_model" else pre
+    per_session = bars_per_session(interval)
+    before = math.ceil(lead / per_session) + 1
+    after = math.ceil(post / per_session) + 1
+
+    times = [event_timestamp(events[label]) for label in event_labels]
+    if not times:
+        return [], [], [], [], []
+    slack = pd.Timedelta(days=2 * max(before, after) + 10)
+    sessions = projected_trading_days(min(times) - slack, max(times) + slack)
+    last_bars = sessions + pd.Timedelta(
+        minutes=SESSION_OPEN.hour * 60 + SESSION_OPEN.minute + SESSION_MINUTES
+        - BAR_MINUTES[interval]
+    )
+
+    last_final = pd.Timestamp(dt.date.today() - dt.timedelta(days=1))
+    # first session whose last bar starts at or after the event: T=0 is the
+    # first bar starting at or after it, so an event after the last bar
+    # start belongs to the next session
+    positions = last_bars.searchsorted(pd.DatetimeIndex(times), side="left")
+    t_sessions, starts, ends, cut = [], [], [], []
+    for pos in positions:
+        t_sessions.append(sessions[pos])
+        starts.append(sessions[pos - before].date())
+        ends.append(sessions[pos + after].date())
+        cut.append(sessions[pos + after] > last_final)
+    return times, t_sessions, starts, ends, cut
+
+
+def _chunk_cars(times, t_sessions, starts, ends, bars, tickers, interval, model, pre, post):
+    """
+    CAR of one chunk of events on its bar matrix (columns = tickers +
+    benchmark). An event whose window (or estimation window) is not inside
+    its own sessions, or whose T bar is missing, gets None.
+    Returns list of (pre + post + 1, tickers) float32 arrays or None.
+    """
+    index = bars.index.to_numpy()
+    event_idx = np.searchsorted(index, pd.DatetimeIndex(times).to_numpy())
+    event_idx = np.where(event_idx < len(index), event_idx, -1)
+
+    estimation = intraday_estimation(interval, pre)
+    tensor = compute_car_tensor(
+        bars.to_numpy(), event_idx, list(range(len(tickers))), len(tickers),
+        pre, post, model, estimation,
+    )
+
+    lead = -estimation[0] if model == "market_model" else pre
+    first = np.clip(event_idx - lead, 0, len(index) - 1)
+    last = np.clip(event_idx + post, 0, len(index) - 1)
+    bar_days = pd.DatetimeIndex(index).normalize()
+    usable = (
+        tensor.valid
+        & (event_idx - lead >= 0)
+        & (bar_days[np.clip(event_idx, 0, len(index) - 1)] == pd.DatetimeIndex(t_sessions))
+        & (bar_days[first] >= pd.DatetimeIndex(starts))
+        & (bar_days[last] <= pd.DatetimeIndex(ends))
+    )
+    return [
+        tensor.car[i].astype(CAR_DTYPE) if usable[i] else None
+        for i in range(len(times))
+    ]
+
+
+def run_intraday_study(event_labels, tickers, interval="5m", model="market", events=None,
+                       pre=None, post=None, chunk_events=CHUNK_EVENTS):
+    """
+    Intraday event study over [T-pre, T+post] bars of `interval`, streamed
+    `chunk_events` events at a time.
+    Returns a StudyResult (t_values in bars, CAR as float32) usable by the
+    same interval and output functions as the daily study.
+    """
+    if interval not in BAR_MINUTES:
+        raise ValueError(f"Unknown bar interval: {interval}")
+    events = disaster_events if events is None else events
+    tickers = list(tickers)
+    default_pre, default_post = default_window(interval)
+    pre = default_pre if pre is None else pre
+    post = default_post if post is None else post
+
+    times, t_sessions, starts, ends, cut = intraday_ranges(
+        event_labels, interval, model, events, pre, post
+    )
+    truncated = [label for label, c in zip(event_labels, cut) if c]
+    usable = [i for i, c in enumerate(cut) if not c]
+
+    store = get_price_store()
+    columns = [*tickers, BENCHMARK]
+    car_by_event, failed = {}, set()
+    for lo in range(0, len(usable), chunk_events):
+        chunk = usable[lo:lo + chunk_events]
+        labels = [event_labels[i] for i in chunk]
+        chunk_starts = [starts[i] for i in chunk]
+        chunk_ends = [ends[i] for i in chunk]
+        with perf.span("intraday_chunk", events=len(chunk), interval=interval) as fields:
+            bars, failures = store.fetch_bars(
+                columns, interval, list(zip(chunk_starts, chunk_ends))
+            )
+            bars = bars.reindex(columns=columns)
+            fields["rows"] = len(bars)
+            failed |= _transient_labels(labels, chunk_starts, chunk_ends, tickers, failures)
+            if bars.empty:
+                continue
+            cars = _chunk_cars(
+                [times[i] for i in chunk], [t_sessions[i] for i in chunk],
+                chunk_starts, chunk_ends, bars, tickers, interval, model, pre, post,
+            )
+        for label, car in zip(labels, cars):
+            car_by_event[label] = car
+
+    kept = [event_labels[i] for i in usable]
+    failed = [label for label in failed if car_by_event.get(label) is None]
+    result = assemble_study(kept, tickers, car_by_event, truncated, failed, pre, post)
+    perf.gauge("intraday.car_mb", round(result.car_cube.nbytes / 2**20, 2))
+    return result
@@ -0,0 +1,557 @@
+import argparse
+import datetime as dt
+import json
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from contextlib import closing, contextmanager
+
+import numpy as np
+import pandas as pd
+
+from Pages import perf
+from Pages.car_engine import ABNORMAL_MODELS, compute_car_tensor, window_returns
+from Pages.price_store import get_price_store
+from Pages.study import BENCHMARK, FIXED_WINDOW, MAX_EVENT_WINDOW, industry_map, lead_days
+from Pages.trading_calendar import ALIGNMENT_POLICIES, get_trading_calendar
+
+# --------------------------------------------------------------
+# LIVE EVENT MONITOR (append-only CAR for events still unfolding)
+# --------------------------------------------------------------
+# A batch study skips every event whose T+post day has not happened yet. A
+# watch instead follows such an event one trading day at a time:
+#   - the first update (once T=0 has closed) computes CAR from T-pre to the
+#     last closed day with the regular engine, and freezes what the next
+#     day needs: the last closes, the last CAR and (market model) alpha and
+#     beta, which only depend on the estimation window before T=0
+#   - every later update downloads only the days after the last one stored
+#     and extends CAR from that state: O(new days x tickers), nothing
+#     before is recomputed or reread
+#   - the running CAAR is a (t, ticker) sum and count over all watches,
+#     bumped by every appended row
+# Several updaters may run at once (two page sessions, a scheduled update):
+# each append claims its watch in one write transaction and only goes
+# through if the watch is still where the updater found it, so a day is
+# never appended (or counted in the CAAR) twice.
+# A watch is complete once it reaches T+post. Updates are meant to run once
+# per trading day (the page does it on first view, or schedule
+# `python -m Pages.live update`); a watch already checked today is skipped.
+#
+# One monitor file holds one configuration (tickers, model, alignment,
+# window), so every watch contributes to the same CAAR:
+#
+#   data/live.sqlite
+#       config      key -> JSON value
+#       watches     label, event date, status, T=0 day, horizon reached and
+#                   the frozen state of the last day
+#       live_car    (label, t, ticker) -> date, abnormal return, CAR
+#       live_caar   (t, ticker) -> CAR sum, events
+#
+# Usage:
+#   python -m Pages.live configure --model market_model --pre 20 --post 60
+#   python -m Pages.live add "Hurricane Milton (Oct 9, 2024)" 2024-10-09
+#   python -m Pages.live update
+#   python -m Pages.live show
+
+DEFAULT_LIVE_PATH = os.environ.get("EVENT_STUDY_LIVE_DB", os.path.join("data", "live.sqlite"))
+DEFAULT_LIVE_POST = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS config (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS watches (
+    label      TEXT PRIMARY KEY,
+    event_date TEXT NOT NULL,
+    status     TEXT NOT NULL,      -- pending, live, complete, no_data
+    t0         TEXT,               -- trading day of T=0
+    reached    INTEGER,            -- last t stored
+    last_date  TEXT,               -- trading day of `reached`
+    last_close TEXT,               -- JSON closes on last_date (tickers + benchmark)
+    last_car   TEXT,               -- JSON CAR on last_date (tickers)
+    alpha      TEXT,               -- JSON market-model intercepts
+    beta       TEXT,               -- JSON market-model slopes
+    checked_on TEXT,
+    added      TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS live_car (
+    label    TEXT NOT NULL,
+    t        INTEGER NOT NULL,
+    ticker   TEXT NOT NULL,
+    date     TEXT NOT NULL,
+    abnormal REAL,
+    car      REAL,
+    PRIMARY KEY (label, t, ticker)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS live_caar (
+    t       INTEGER NOT NULL,
+    ticker  TEXT NOT NULL,
+    car_sum REAL NOT NULL,
+    n       INTEGER NOT NULL,
+    PRIMARY KEY (t, ticker)
+) WITHOUT ROWID;
+"""
+
+LiveConfig = namedtuple("LiveConfig", ["tickers", "model", "alignment", "pre", "post"])
+UpdateReport = namedtuple("UpdateReport", ["appended", "pending", "no_data", "failed"])
+
+DEFAULT_LIVE_CONFIG = LiveConfig(
+    list(industry_map.values()), "market", "nearest", FIXED_WINDOW, DEFAULT_LIVE_POST
+)
+
+
+def _dumps(values):
+    return json.dumps([None if not np.isfinite(v) else float(v) for v in values])
+
+
+def _loads(text):
+    return np.array([np.nan if v is None else v for v in json.loads(text)], dtype=float)
+
+
+class LiveMonitor:
+    """
+    Watches on events still unfolding, extended one trading day at a time.
+    """
+
+    def __init__(self, path=DEFAULT_LIVE_PATH, store=None):
+        self.path = path
+        self._store = store
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """
+        Connection that commits (or rolls back) and is closed on exit.
+        """
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            yield conn
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Write transaction that holds the database write lock from its first
+        statement (BEGIN IMMEDIATE), across processes as well as threads.
+        """
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    @property
+    def store(self):
+        return self._store or get_price_store()
+
+    # ---------- configuration ----------
+    @property
+    def config(self):
+        with self._connect() as conn:
+            rows = dict(conn.execute("SELECT key, value FROM config").fetchall())
+        if not rows:
+            return DEFAULT_LIVE_CONFIG
+        return LiveConfig(**{key: json.loads(value) for key, value in rows.items()})
+
+    def configure(self, tickers=None, model=None, alignment=None, pre=None, post=None):
+        """
+        Set the monitor's configuration (unset fields keep their value).
+        Raises ValueError once watches have data: their CAR and the running
+        CAAR would mix configurations.
+        """
+        current = self.config
+        config = LiveConfig(
+            list(tickers) if tickers is not None else current.tickers,
+            model or current.model,
+            alignment or current.alignment,
+            int(pre) if pre is not None else current.pre,
+            int(post) if post is not None else current.post,
+        )
+        if config.model not in ABNORMAL_MODELS:
+            raise ValueError(f"Unknown abnormal-return model: {config.model}")
+        if config.alignment not in ALIGNMENT_POLICIES:
+            raise ValueError(f"Unknown alignment policy: {config.alignment}")
+        if not (1 <= config.pre <= MAX_EVENT_WINDOW and 1 <= config.post <= MAX_EVENT_WINDOW):
+            raise ValueError(f"Event window must be 1 to {MAX_EVENT_WINDOW} days either side of T")
+
+        with self._lock, self._connect() as conn:
+            (stored,) = conn.execute("SELECT COUNT(*) FROM live_car").fetchone()
+            if stored and config != current:
+                raise ValueError(
+                    "Watches already hold CAR for the current configuration; "
+                    "use a new monitor file for a different one."
+                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in config._asdict().items()],
+            )
+        return config
+
+    # ---------- watches ----------
+    def add(self, label, event_date):
+        """
+        Start watching an event; it is filled in on the next update.
+        """
+        event_date = pd.Timestamp(event_date).date().isoformat()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO watches (label, event_date, status, added) VALUES (?, ?, 'pending', ?)",
+                (label, event_date, dt.date.today().isoformat()),
+            )
+
+    def remove(self, label):
+        """
+        Stop watching an event and take its rows out of the running CAAR.
+        """
+        with self._lock, self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT t, ticker, car FROM live_car WHERE label = ? AND car IS NOT NULL",
+                (label,),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE live_caar SET car_sum = car_sum - ?, n = n - 1 WHERE t = ? AND ticker = ?",
+                [(car, t, ticker) for t, ticker, car in rows],
+            )
+            conn.execute("DELETE FROM live_caar WHERE n <= 0")
+            conn.execute("DELETE FROM live_car WHERE label = ?", (label,))
+            conn.execute("DELETE FROM watches WHERE label = ?", (label,))
+
+    def watches(self):
+        """
+        One row per watch: Event, Date, Status, T=0, Horizon (last t
+        reached), Last day, Checked.
+        """
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                "SELECT label, event_date, status, t0, reached, last_date, checked_on "
+                "FROM watches ORDER BY event_date DESC",
+                conn,
+            )
+        return df.rename(columns={
+            "label": "Event", "event_date": "Date", "status": "Status", "t0": "T=0",
+            "reached": "Horizon", "last_date": "Last day", "checked_on": "Checked",
+        })
+
+    def car(self, label):
+        """
+        CAR of one watch so far (index = t, columns = tickers).
+        """
+        with self._connect() as conn:
+            long = pd.read_sql_query(
+                "SELECT t, ticker, car FROM live_car WHERE label = ?", conn, params=[label]
+            )
+        wide = long.pivot(index="t", columns="ticker", values="car")
+        wide.columns.name = None
+        return wide.reindex(columns=self.config.tickers)
+
+    def caar(self):
+        """
+        Running CAAR over every watch.
+        Returns:
+          (CAAR DataFrame, events DataFrame), index = t, columns = tickers;
+          t beyond the shortest watch averages only the watches reaching it.
+        """
+        with self._connect() as conn:
+            long = pd.read_sql_query("SELECT t, ticker, car_sum, n FROM live_caar", conn)
+        tickers = self.config.tickers
+        sums = long.pivot(index="t", columns="ticker", values="car_sum").reindex(columns=tickers)
+        counts = long.pivot(index="t", columns="ticker", values="n").reindex(columns=tickers)
+        sums.columns.name = counts.columns.name = None
+        return sums / counts, counts.fillna(0).astype(int)
+
+    # ---------- daily update ----------
+    def update(self, as_of=None, force=False):
+        """
+        Extend every unfinished watch up to `as_of` (default: the last
+        closed trading day). Watches already checked today are skipped
+        unless `force`.
+        Returns UpdateReport: appended (label -> new days), pending,
+        no_data and failed labels. A watch another updater moved on in the
+        meantime is left to it and not reported.
+        """
+        today = dt.date.today()
+        as_of = today - dt.timedelta(days=1) if as_of is None else pd.Timestamp(as_of).date()
+        as_of = min(as_of, today - dt.timedelta(days=1))
+        config = self.config
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT label, event_date, status, reached, last_date, last_close, last_car, "
+                "alpha, beta, checked_on FROM watches WHERE status IN ('pending', 'live')"
+            ).fetchall()
+
+        report = UpdateReport({}, [], [], [])
+        with self._lock, perf.span("live_update", watches=len(rows)) as fields:
+            for label, event_date, status, reached, last_date, *state, checked_on in rows:
+                if checked_on == today.isoformat() and not force:
+                    continue
+                if status == "pending":
+                    outcome = self._start(label, event_date, config, as_of)
+                else:
+                    outcome = self._extend(label, reached, last_date, state, config, as_of)
+                if outcome is None:
+                    continue
+                if outcome == "failed":
+                    report.failed.append(label)
+                    continue
+                if outcome == "pending":
+                    report.pending.append(label)
+                elif outcome == "no_data":
+                    report.no_data.append(label)
+                elif outcome:
+                    report.appended[label] = outcome
+                with self._connect() as conn:
+                    conn.execute(
+                        "UPDATE watches SET checked_on = ? WHERE label = ?",
+                        (today.isoformat(), label),
+                    )
+            fields["days"] = sum(report.appended.values())
+        return report
+
+    def _prices(self, config, start, end):
+        """
+        Closes (tickers + benchmark) over [start, end], downloading only
+        the days the price store does not hold yet.
+        Returns (DataFrame, transient failure?)
+        """
+        columns = list(dict.fromkeys([*config.tickers, BENCHMARK]))
+        prices, failures = self.store.fetch_many(columns, [(start, end)])
+        prices = prices.reindex(columns=columns).dropna(how="all")
+        prices = prices[prices.index <= pd.Timestamp(end)]
+        return prices, any(f.status == "transient" for f in failures)
+
+    def _start(self, label, event_date, config, as_of):
+        """
+        First fill of a pending watch, once its T=0 day has closed.
+        Returns new days appended, "pending", "no_data", "failed" or None
+        (another updater started it first).
+        """
+        lead = lead_days(config.model, config.pre)
+        calendar = get_trading_calendar(self.store, BENCHMARK)
+        pos = calendar.align(pd.to_datetime([event_date]), config.alignment)[0]
+        if pos < 0 or pd.Timestamp(calendar.dates[pos]).date() > as_of:
+            return "pending"
+        if pos - lead < 0:
+            return "no_data"
+        t0 = pd.Timestamp(calendar.dates[pos])
+        starts, _, _ = calendar.fetch_ranges(
+            pd.to_datetime([event_date]), lead, 0, config.alignment
+        )
+
+        prices, transient = self._prices(config, pd.Timestamp(starts[0]).date(), as_of)
+        t0_row = prices.index.get_indexer([t0])[0]
+        if t0_row < 0 or t0_row - lead < 0:
+            return "failed" if transient else "no_data"
+
+        reached = min(config.post, len(prices) - 1 - t0_row)
+        names = list(prices.columns)
+        matrix = prices.to_numpy(float)
+        tensor = compute_car_tensor(
+            matrix, [t0_row], [names.index(t) for t in config.tickers],
+            names.index(BENCHMARK), config.pre, reached, config.model,
+        )
+        if not tensor.valid[0]:
+            return "failed" if transient else "no_data"
+
+        window = prices.iloc[t0_row - config.pre:t0_row + reached + 1]
+        if transient and window.isna().to_numpy().any():
+            return "failed"
+        alpha = beta = None
+        if config.model == "market_model":
+            alpha, beta = tensor.alpha[0], tensor.beta[0]
+        appended = self._append(
+            label, None, config, tensor.t_values, window.index, tensor.abnormal[0],
+            tensor.car[0], _last_closes(matrix[:t0_row + reached + 1]), alpha, beta,
+            t0=t0.date().isoformat(),
+        )
+        return len(tensor.t_values) if appended else None
+
+    def _extend(self, label, reached, last_date, state, config, as_of):
+        """
+        Append the days after `last_date` to a live watch from its frozen
+        state: returns from the last closes, abnormal returns with the
+        frozen alpha/beta, CAR from the last CAR.
+        A new day missing a close is only taken when nothing failed
+        transiently (the ticker simply has no price that day); its return is
+        then 0 as in the batch engine, and the frozen close stays the last
+        one known.
+        Returns new days appended (0 when there are none), "failed" or None
+        (another updater extended it first).
+        """
+        last_close, last_car, alpha, beta = state
+        start = dt.date.fromisoformat(last_date) + dt.timedelta(days=1)
+        if start > as_of:
+            return 0
+        prices, transient = self._prices(config, start, as_of)
+        new = prices.iloc[:config.post - reached]
+        if new.empty:
+            return "failed" if transient else 0
+        if transient and new.isna().to_numpy().any():
+            return "failed"
+
+        names = list(new.columns)
+        closes = np.vstack([_loads(last_close), new.to_numpy(float)])
+        returns = window_returns(closes[None])[0, 1:]
+        ticker_returns = returns[:, [names.index(t) for t in config.tickers]]
+        bench_returns = returns[:, [names.index(BENCHMARK)]]
+        if config.model == "market":
+            abnormal = ticker_returns - bench_returns
+        else:
+            abnormal = ticker_returns - (_loads(alpha) + _loads(beta) * bench_returns)
+        car = _loads(last_car) + np.cumsum(abnormal, axis=0) * 100
+
+        t_values = np.arange(reached + 1, reached + 1 + len(new))
+        appended = self._append(
+            label, reached, config, t_values, new.index, abnormal, car, _last_closes(closes)
+        )
+        return len(new) if appended else None
+
+    def _append(self, label, expected, config, t_values, dates, abnormal, car, last_close,
+                alpha=None, beta=None, t0=None):
+        """
+        Write new (t, ticker) rows, bump the running CAAR by them and move
+        the watch's frozen state to the last new day, all in one transaction
+        that first checks the watch is still unfinished at `expected` (the
+        last t the rows extend; None for a pending watch).
+        Returns False, writing nothing, when it is not.
+        """
+        rows, caar_rows = [], []
+        for i, t in enumerate(t_values):
+            day = pd.Timestamp(dates[i]).date().isoformat()
+            for j, ticker in enumerate(config.tickers):
+                value = car[i, j]
+                finite = bool(np.isfinite(value))
+                ar = abnormal[i, j]
+                rows.append((label, int(t), ticker, day,
+                             float(ar) if np.isfinite(ar) else None,
+                             float(value) if finite else None))
+                if finite:
+                    caar_rows.append((int(t), ticker, float(value)))
+
+        reached = int(t_values[-1])
+        status = "complete" if reached >= config.post else "live"
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT status, reached FROM watches WHERE label = ?", (label,)
+            ).fetchone()
+            wanted = ("pending", None) if expected is None else ("live", expected)
+            if row is None or tuple(row) != wanted:
+                return False
+            conn.executemany(
+                "INSERT OR REPLACE INTO live_car (label, t, ticker, date, abnormal, car) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.executemany(
+                "INSERT INTO live_caar (t, ticker, car_sum, n) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT (t, ticker) DO UPDATE SET car_sum = car_sum + excluded.car_sum, "
+                "n = n + 1",
+                caar_rows,
+            )
+            conn.execute(
+                "UPDATE watches SET status = ?, reached = ?, last_date = ?, last_close = ?, "
+                "last_car = ? WHERE label = ?",
+                (status, reached, pd.Timestamp(dates[len(t_values) - 1]).date().isoformat(),
+                 _dumps(last_close), _dumps(car[-1]), label),
+            )
+            if t0 is not None:
+                conn.execute(
+                    "UPDATE watches SET t0 = ?, alpha = ?, beta = ? WHERE label = ?",
+                    (t0, None if alpha is None else _dumps(alpha),
+                     None if beta is None else _dumps(beta), label),
+                )
+        return True
+
+
+def _last_closes(closes):
+    """
+    Last finite close of every column of a (days, columns) array: the state
+    the next day's returns start from, so a day without a price never
+    freezes a NaN close.
+    """
+    closes = np.asarray(closes, dtype=float)
+    last = np.full(closes.shape[1], np.nan)
+    for row in closes:
+        last = np.where(np.isfinite(row), row, last)
+    return last
+
+
+def main(argv=None):
+    from Pages.price_store import DEFAULT_DB_PATH, configure_price_store
+    from Pages.providers import get_provider
+
+    parser = argparse.ArgumentParser(description="Live event monitor.")
+    parser.add_argument("--path", default=DEFAULT_LIVE_PATH)
+    parser.add_argument("--provider", default=None)
+    parser.add_argument("--price-db", default=DEFAULT_DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    configure = sub.add_parser("configure", help="Tickers, model, alignment and window.")
+    configure.add_argument("--industry", action="append", dest="industries",
+                           choices=list(industry_map))
+    configure.add_argument("--model", choices=ABNORMAL_MODELS)
+    configure.add_argument("--alignment", choices=ALIGNMENT_POLICIES)
+    configure.add_argument("--pre", type=int)
+    configure.add_argument("--post", type=int)
+
+    add = sub.add_parser("add", help="Start watching an event.")
+    add.add_argument("label")
+    add.add_argument("date")
+
+    remove = sub.add_parser("remove", help="Stop watching an event.")
+    remove.add_argument("label")
+
+    update = sub.add_parser("update", help="Append the trading days since the last update.")
+    update.add_argument("--as-of", default=None)
+    update.add_argument("--force", action="store_true")
+
+    sub.add_parser("show", help="Watches and the running CAAR.")
+    args = parser.parse_args(argv)
+
+    configure_price_store(args.price_db, get_provider(args.provider))
+    monitor = LiveMonitor(args.path)
+
+    if args.command == "configure":
+        tickers = [industry_map[name] for name in args.industries] if args.industries else None
+        print(monitor.configure(tickers, args.model, args.alignment, args.pre, args.post))
+    elif args.command == "add":
+        monitor.add(args.label, args.date)
+    elif args.command == "remove":
+        monitor.remove(args.label)
+    elif args.command == "update":
+        recorder = perf.PerfRecorder("live_update")
+        with recorder.activate():
+            report = monitor.update(args.as_of, args.force)
+        for label, days in report.appended.items():
+            print(f"{label}: +{days} day(s)")
+        for name in ("pending", "no_data", "failed"):
+            for label in getattr(report, name):
+                print(f"{label}: {name}")
+        print(f"updated in {recorder.total_seconds:.2f}s")
+    else:
+        with pd.option_context("display.width", 160):
+            print(monitor.watches().to_string(index=False))
+            caar, counts = monitor.caar()
+            if not caar.empty:
+                print("\nRunning CAAR (last 5 days reached):")
+                print(caar.tail().round(3).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
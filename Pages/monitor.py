@@ -0,0 +1,169 @@
+import datetime as dt
+
+import streamlit as st
+import pandas as pd
+import altair as alt
+
+from Pages import perf
+from Pages.chart_payload import compact_frame, event_time_axis
+from Pages.event_study import ABNORMAL_MODEL_OPTIONS, ALIGNMENT_OPTIONS
+from Pages.live import DEFAULT_LIVE_PATH, LiveMonitor
+from Pages.perf import PERF_LOG_PATH, PerfRecorder
+from Pages.study import MAX_EVENT_WINDOW, caar_long_frame, event_t_values, industry_map
+
+
+def _partial_chart(caar_wide, counts, pre, post, title):
+    """
+    CAR/CAAR so far on the full [T-pre, T+post] axis, so the part of the
+    window still to come stays visible as empty space.
+    """
+    ticker_to_industry = {v: k for k, v in industry_map.items()}
+    data = caar_long_frame(caar_wide, ticker_to_industry)
+    tooltip = ["t", "Industry", "CAR"]
+    if counts is not None:
+        data["Events"] = counts.reindex(index=caar_wide.index).melt()["value"].to_numpy()
+        tooltip.append("Events")
+    data = compact_frame(data.dropna(subset=["CAR"]))
+
+    x_scale = alt.Scale(domain=[-pre, post])
+    lines = alt.Chart(data).mark_line(point=True).encode(
+        x=alt.X("t:Q", scale=x_scale, axis=event_time_axis(event_t_values(pre, post))),
+        y=alt.Y("CAR:Q", title=title),
+        color=alt.Color("Industry:N", title="Industry"),
+        tooltip=tooltip,
+    )
+    rules = alt.Chart(
+        pd.DataFrame({"t": [0, int(caar_wide.index.max())], "Day": ["T", "Reached"]})
+    ).mark_rule(strokeDash=[4, 4], strokeWidth=2).encode(
+        x=alt.X("t:Q", scale=x_scale),
+        color=alt.Color("Day:N", scale=alt.Scale(range=["red", "gray"]), legend=None),
+    )
+    return lines + rules
+
+
+def _configure_sidebar(monitor, config, has_data):
+    """
+    Monitor configuration; locked once watches hold CAR.
+    """
+    models = {v: k for k, v in ABNORMAL_MODEL_OPTIONS.items()}
+    alignments = {v: k for k, v in ALIGNMENT_OPTIONS.items()}
+    with st.sidebar.expander("Monitor configuration", expanded=not has_data):
+        if has_data:
+            st.caption("Locked: watches already hold CAR for this configuration.")
+        names = [k for k, v in industry_map.items() if v in config.tickers]
+        industries = st.multiselect(
+            "Industries:", list(industry_map), default=names, disabled=has_data
+        )
+        model = st.radio(
+            "Abnormal return model:", list(ABNORMAL_MODEL_OPTIONS),
+            index=list(ABNORMAL_MODEL_OPTIONS).index(models[config.model]), disabled=has_data,
+        )
+        alignment = st.selectbox(
+            "Align T=0 to the:", list(ALIGNMENT_OPTIONS),
+            index=list(ALIGNMENT_OPTIONS).index(alignments[config.alignment]),
+            disabled=has_data,
+        )
+        pre_col, post_col = st.columns(2)
+        pre = pre_col.number_input("Before T:", 1, MAX_EVENT_WINDOW, config.pre, disabled=has_data)
+        post = post_col.number_input("After T:", 1, MAX_EVENT_WINDOW, config.post,
+                                     disabled=has_data)
+        if not has_data and st.button("Save configuration") and industries:
+            try:
+                monitor.configure(
+                    [industry_map[name] for name in industries],
+                    ABNORMAL_MODEL_OPTIONS[model], ALIGNMENT_OPTIONS[alignment], pre, post,
+                )
+            except ValueError as exc:
+                st.error(str(exc))
+
+
+# --------------------------------------------------------------
+# MAIN PAGE FUNCTION
+# --------------------------------------------------------------
+def show_live_monitor():
+    st.title("Live Event Monitor")
+    st.write(
+        """
+        Follow a disaster that is still unfolding. Each trading day only the new closes are
+        downloaded and appended: every watched event's CAR and the running **CAAR** are extended
+        from where they stopped, up to the horizon reached so far.
+        """
+    )
+    st.write("---")
+
+    monitor = LiveMonitor(DEFAULT_LIVE_PATH)
+    watches = monitor.watches()
+    config = monitor.config
+    _configure_sidebar(monitor, config, watches["Horizon"].notna().any())
+    config = monitor.config
+
+    # ---------- ADD / REMOVE WATCHES ----------
+    st.sidebar.write("Watch an event:")
+    label = st.sidebar.text_input("Event name:", placeholder="Hurricane Milton (Oct 9, 2024)")
+    event_date = st.sidebar.date_input("Event date:", value=dt.date.today())
+    if st.sidebar.button("Watch event") and label:
+        if label in set(watches["Event"]):
+            st.sidebar.error(f"'{label}' is already watched.")
+        else:
+            monitor.add(label, event_date)
+    if len(watches):
+        dropped = st.sidebar.selectbox("Stop watching:", ["—", *watches["Event"]])
+        if dropped != "—" and st.sidebar.button("Remove"):
+            monitor.remove(dropped)
+
+    force = st.sidebar.button("Update now", help="Check every watch again, even if checked today.")
+
+    # ---------- DAILY APPEND ----------
+    recorder = PerfRecorder("live_monitor", force=force)
+    with recorder.activate():
+        with st.spinner("Appending new trading days..."):
+            report = monitor.update(force=force)
+    if PERF_LOG_PATH:
+        recorder.write_jsonl(PERF_LOG_PATH)
+
+    for name, days in report.appended.items():
+        st.success(f"{name}: {days} new trading day(s) appended.")
+    if report.failed:
+        st.warning(
+            "Price downloads kept failing for the following events; they will be retried "
+            "on the next update:\n- " + "\n- ".join(report.failed)
+        )
+
+    watches = monitor.watches()
+    if watches.empty:
+        st.info("No event is being watched yet. Add one in the sidebar.")
+        return
+
+    table = watches.copy()
+    table["Horizon"] = [
+        "" if pd.isna(h) else f"T{int(h):+d} of T+{config.post}" for h in table["Horizon"]
+    ]
+    st.dataframe(table, use_container_width=True, hide_index=True)
+    st.caption(
+        f"{', '.join(config.tickers)} vs benchmark; {config.model} model, {config.alignment} "
+        f"trading day, T-{config.pre} to T+{config.post}. Pending watches start once their "
+        "T=0 day has closed."
+    )
+
+    # ---------- RUNNING CAAR ----------
+    caar, counts = monitor.caar()
+    if caar.empty:
+        return
+    st.subheader(f"Running CAAR across {int(watches['Horizon'].notna().sum())} event(s)")
+    with perf.span("render_live_caar"):
+        st.altair_chart(
+            _partial_chart(caar, counts, config.pre, config.post,
+                           "Average Cumulative Abnormal Return (%)"),
+            use_container_width=True,
+        )
+    st.caption("Days past the shortest watch average only the events that have reached them.")
+
+    # ---------- ONE WATCH ----------
+    started = watches.loc[watches["Horizon"].notna(), "Event"].tolist()
+    chosen = st.selectbox("Event:", started)
+    car = monitor.car(chosen)
+    st.subheader(f"{chosen}: CAR through T{int(car.index.max()):+d}")
+    st.altair_chart(
+        _partial_chart(car, None, config.pre, config.post, "Cumulative Abnormal Return (%)"),
+        use_container_width=True,
+    )
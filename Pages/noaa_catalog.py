@@ -0,0 +1,369 @@
+import argparse
+import glob
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+# --------------------------------------------------------------
+# NOAA STORM EVENTS CATALOG
+# --------------------------------------------------------------
+# Streams the NOAA Storm Events "details" bulk files
+# (StormEvents_details-ftp_v1.0_dYYYY_cYYYYMMDD.csv.gz, downloaded from
+# https://www.ncei.noaa.gov/pub/data/swdi/stormevents/csvfiles/) in chunks and
+# collapses them into one row per storm episode, stored in a small SQLite
+# index queried by category and date.
+#
+# Usage:
+#   python -m Pages.noaa_catalog build data/noaa/StormEvents_details-*.csv.gz
+#   python -m Pages.noaa_catalog query --category Hurricane --min-damage 1e9
+
+DEFAULT_CATALOG_PATH = os.environ.get(
+    "EVENT_STUDY_CATALOG", os.path.join("data", "storm_events.sqlite")
+)
+
+# NOAA EVENT_TYPE -> dashboard disaster category
+EVENT_TYPE_CATEGORIES = {
+    "Hurricane": "Hurricane",
+    "Hurricane (Typhoon)": "Hurricane",
+    "Tropical Storm": "Hurricane",
+    "Tropical Depression": "Hurricane",
+    "Storm Surge/Tide": "Hurricane",
+    "Winter Storm": "Winter Storm",
+    "Blizzard": "Winter Storm",
+    "Ice Storm": "Winter Storm",
+    "Heavy Snow": "Winter Storm",
+    "Extreme Cold/Wind Chill": "Winter Storm",
+    "Wildfire": "Wildfire",
+    "Flood": "Flood",
+    "Flash Flood": "Flood",
+    "Coastal Flood": "Flood",
+    "Lakeshore Flood": "Flood",
+}
+CATEGORIES = ["Hurricane", "Winter Storm", "Wildfire", "Flood"]
+
+# Only the columns we need are parsed; the narratives dominate file size
+USECOLS = [
+    "EPISODE_ID",
+    "BEGIN_YEARMONTH",
+    "BEGIN_DAY",
+    "END_YEARMONTH",
+    "END_DAY",
+    "STATE",
+    "EVENT_TYPE",
+    "DAMAGE_PROPERTY",
+    "DAMAGE_CROPS",
+    "DEATHS_DIRECT",
+]
+DTYPES = {
+    "EPISODE_ID": "float64",  # a few old rows have no episode
+    "BEGIN_YEARMONTH": "int32",
+    "BEGIN_DAY": "int8",
+    "END_YEARMONTH": "int32",
+    "END_DAY": "int8",
+    "STATE": "category",
+    "EVENT_TYPE": "category",
+    "DAMAGE_PROPERTY": "string",
+    "DAMAGE_CROPS": "string",
+    "DEATHS_DIRECT": "float32",
+}
+CHUNK_ROWS = 200_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodes (
+    episode_id  INTEGER PRIMARY KEY,
+    category    TEXT NOT NULL,
+    begin_date  TEXT NOT NULL,
+    end_date    TEXT NOT NULL,
+    damage      REAL NOT NULL,
+    deaths      INTEGER NOT NULL,
+    states      TEXT NOT NULL,
+    n_reports   INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS episodes_category_date ON episodes (category, begin_date);
+CREATE INDEX IF NOT EXISTS episodes_date ON episodes (begin_date);
+"""
+
+_DAMAGE_SCALE = {"K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+
+
+def parse_damage(values):
+    """
+    NOAA damage strings ("10.00K", "1.5M", "2B", "") -> dollars.
+    """
+    values = values.fillna("").str.strip().str.upper()
+    suffix = values.str[-1:]
+    scale = suffix.map(_DAMAGE_SCALE).astype("float64")
+    numeric = values.where(scale.isna(), values.str[:-1])
+    amount = pd.to_numeric(numeric, errors="coerce").fillna(0.0)
+    return (amount * scale.fillna(1.0)).to_numpy()
+
+
+def _iso(yyyymmdd):
+    return pd.to_datetime(yyyymmdd.astype(str), format="%Y%m%d").dt.strftime("%Y-%m-%d")
+
+
+def _yyyymmdd(yearmonth, day):
+    return yearmonth.astype("int64") * 100 + day.astype("int64")
+
+
+def _reduce_chunk(chunk, categories, states):
+    """
+    Filter one chunk and collapse it to per-(episode, category) partials.
+    """
+    category = chunk["EVENT_TYPE"].astype(str).map(EVENT_TYPE_CATEGORIES)
+    keep = category.isin(categories) & chunk["EPISODE_ID"].notna()
+    if states:
+        keep &= chunk["STATE"].astype(str).isin(states)
+    chunk = chunk[keep]
+    if chunk.empty:
+        return None
+
+    return (
+        pd.DataFrame(
+            {
+                "episode_id": chunk["EPISODE_ID"].astype("int64").to_numpy(),
+                "category": category[keep].to_numpy(),
+                "begin": _yyyymmdd(chunk["BEGIN_YEARMONTH"], chunk["BEGIN_DAY"]).to_numpy(),
+                "end": _yyyymmdd(chunk["END_YEARMONTH"], chunk["END_DAY"]).to_numpy(),
+                "damage": parse_damage(chunk["DAMAGE_PROPERTY"]) + parse_damage(chunk["DAMAGE_CROPS"]),
+                "deaths": chunk["DEATHS_DIRECT"].fillna(0).to_numpy(),
+                "state": chunk["STATE"].astype(str).str.title().to_numpy(),
+                "n_reports": 1,
+            }
+        )
+        .groupby(["episode_id", "category"], sort=False)
+        .agg(
+            begin=("begin", "min"),
+            end=("end", "max"),
+            damage=("damage", "sum"),
+            deaths=("deaths", "sum"),
+            states=("state", lambda s: ",".join(sorted(set(s)))),
+            n_reports=("n_reports", "sum"),
+        )
+        .reset_index()
+    )
+
+
+def _fold(partials):
+    """
+    Merge partial aggregates; an episode can straddle chunk boundaries.
+    """
+    return (
+        pd.concat(partials, ignore_index=True)
+        .groupby(["episode_id", "category"], sort=False)
+        .agg(
+            begin=("begin", "min"),
+            end=("end", "max"),
+            damage=("damage", "sum"),
+            deaths=("deaths", "sum"),
+            states=("states", lambda s: ",".join(sorted(set(",".join(s).split(","))))),
+            n_reports=("n_reports", "sum"),
+        )
+        .reset_index()
+    )
+
+
+def _combine(partials):
+    """
+    Final merge: one row per episode, labelled with the category that
+    carries the most damage.
+    """
+    merged = _fold(partials).sort_values(
+        ["episode_id", "damage", "n_reports"], ascending=[True, False, False]
+    )
+    return merged.drop_duplicates("episode_id", keep="first")
+
+
+def build_catalog(paths, catalog_path=DEFAULT_CATALOG_PATH, categories=None,
+                  states=None, min_damage=0.0, chunk_rows=CHUNK_ROWS):
+    """
+    Stream NOAA details files into the episode index at `catalog_path`.
+
+    Memory is bounded by `chunk_rows` plus one small partial aggregate per
+    chunk, so the full multi-decade file set (millions of rows) can be
+    ingested on a laptop. Episodes already in the catalog are replaced when
+    they are ingested again and kept otherwise, so separate runs (say one per
+    decade of files) add up; delete the file to start over.
+    Returns the number of episodes written.
+    """
+    categories = set(categories or CATEGORIES)
+    states = {s.upper() for s in states} if states else None
+
+    partials = []
+    for path in paths:
+        reader = pd.read_csv(
+            path,
+            usecols=USECOLS,
+            dtype=DTYPES,
+            chunksize=chunk_rows,
+            compression="infer",
+        )
+        for chunk in reader:
+            partial = _reduce_chunk(chunk, categories, states)
+            if partial is not None:
+                partials.append(partial)
+
+        # Fold per file so the partial list never grows with the row count
+        if len(partials) > 1:
+            partials = [_fold(partials)]
+
+    if not partials:
+        return 0
+
+    episodes = _combine(partials)
+    episodes = episodes[episodes["damage"] >= min_damage]
+
+    rows = list(
+        zip(
+            episodes["episode_id"].astype(int),
+            episodes["category"],
+            _iso(episodes["begin"]),
+            _iso(episodes["end"]),
+            episodes["damage"].astype(float),
+            episodes["deaths"].astype(int),
+            episodes["states"],
+            episodes["n_reports"].astype(int),
+        )
+    )
+
+    directory = os.path.dirname(catalog_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with closing(sqlite3.connect(catalog_path)) as conn, conn:
+        conn.executescript(_SCHEMA)
+        conn.executemany(
+            "INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+    return len(rows)
+
+
+def _label(row):
+    date = pd.Timestamp(row.begin_date)
+    states = row.states.split(",")
+    where = ", ".join(states[:2]) + (f" +{len(states) - 2}" if len(states) > 2 else "")
+    return f"{row.category}: {where} ({date.strftime('%b')} {date.day}, {date.year}) #{row.episode_id}"
+
+
+class EventCatalog:
+    """
+    Read side of the episode index.
+    """
+
+    def __init__(self, path=DEFAULT_CATALOG_PATH):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def query(self, categories=None, start=None, end=None, min_damage=0.0,
+              states=None, limit=None):
+        """
+        Episodes matching the filters, largest damage first.
+        Returns DataFrame with one row per episode and a `label` column.
+        """
+        where = ["damage >= ?"]
+        params = [float(min_damage)]
+        if categories:
+            where.append(f"category IN ({','.join('?' for _ in categories)})")
+            params.extend(categories)
+        if start is not None:
+            where.append("begin_date >= ?")
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+        if end is not None:
+            where.append("begin_date <= ?")
+            params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+        if states:
+            # `states` is a comma-separated list; match whole names only
+            wanted = sorted({s.title() for s in states})
+            where.append(
+                "(" + " OR ".join("instr(',' || states || ',', ?) > 0" for _ in wanted) + ")"
+            )
+            params.extend(f",{s}," for s in wanted)
+
+        sql = f"SELECT * FROM episodes WHERE {' AND '.join(where)} ORDER BY damage DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+
+        df["label"] = [_label(row) for row in df.itertuples()]
+        return df.reset_index(drop=True)
+
+    def episodes(self, episode_ids):
+        """
+        Episodes by id, in no particular order.
+        Returns DataFrame with one row per episode found and a `label` column.
+        """
+        ids = [int(i) for i in dict.fromkeys(episode_ids)]
+        frames = []
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            for first in range(0, len(ids), 500):
+                chunk = ids[first:first + 500]
+                frames.append(pd.read_sql_query(
+                    f"SELECT * FROM episodes WHERE episode_id IN ({','.join('?' for _ in chunk)})",
+                    conn,
+                    params=chunk,
+                ))
+        if not frames:
+            return pd.DataFrame(columns=["episode_id", "category", "begin_date", "label"])
+        df = pd.concat(frames, ignore_index=True)
+        df["label"] = [_label(row) for row in df.itertuples()]
+        return df
+
+    @staticmethod
+    def as_events(df):
+        """
+        label -> ISO date, the same shape as `disaster_events`.
+        """
+        return dict(zip(df["label"], df["begin_date"]))
+
+    @staticmethod
+    def as_categories(df):
+        """
+        label -> disaster category.
+        """
+        return dict(zip(df["label"], df["category"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NOAA Storm Events catalog.")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Ingest NOAA details CSV files.")
+    build.add_argument("paths", nargs="+", help="Files or glob patterns.")
+    build.add_argument("--category", action="append", choices=CATEGORIES)
+    build.add_argument("--state", action="append")
+    build.add_argument("--min-damage", type=float, default=0.0)
+    build.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+
+    query = sub.add_parser("query", help="List catalogued episodes.")
+    query.add_argument("--category", action="append", choices=CATEGORIES)
+    query.add_argument("--state", action="append")
+    query.add_argument("--since")
+    query.add_argument("--until")
+    query.add_argument("--min-damage", type=float, default=0.0)
+    query.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        paths = sorted({p for pattern in args.paths for p in glob.glob(pattern)})
+        n = build_catalog(
+            paths, args.catalog, args.category, args.state, args.min_damage, args.chunk_rows
+        )
+        print(f"{n} episode(s) from {len(paths)} file(s) -> {args.catalog}")
+    else:
+        df = EventCatalog(args.catalog).query(
+            args.category, args.since, args.until, args.min_damage, args.state, args.limit
+        )
+        with pd.option_context("display.width", 160, "display.max_colwidth", 60):
+            print(df[["label", "begin_date", "damage", "deaths"]].to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
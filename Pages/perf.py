@@ -0,0 +1,161 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+# --------------------------------------------------------------
+# HOT-PATH INSTRUMENTATION
+# --------------------------------------------------------------
+# A PerfRecorder collects timing spans, counters and gauges for one run of
+# the pipeline. It is activated for the current context, so library code
+# just calls the module-level span()/count()/gauge() helpers; with no active
+# recorder they cost one ContextVar lookup and record nothing.
+#
+# Every run can be exported as JSON lines, one object per span / counter /
+# gauge plus a summary, e.g. for a log pipeline:
+#   {"type": "span", "run": "3f2a...", "name": "load_prices", "seconds": 0.41, ...}
+# Set EVENT_STUDY_PERF_LOG to a file path to append every dashboard run.
+
+PERF_LOG_PATH = os.environ.get("EVENT_STUDY_PERF_LOG")
+
+_current = contextvars.ContextVar("perf_recorder", default=None)
+
+
+class PerfRecorder:
+    """
+    Spans, counters and gauges for one pipeline run.
+    """
+
+    def __init__(self, name="run", **context):
+        self.name = name
+        self.run_id = uuid.uuid4().hex[:12]
+        self.context = context
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.spans = []     # dicts: name, start, seconds, depth, fields
+        self.counters = {}  # name -> summed value
+        self.gauges = {}    # name -> last value
+        self._depth = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **fields):
+        """
+        Time the enclosed block. Fields (row counts, sizes, ...) can be given
+        up front or added to the yielded dict inside the block.
+        """
+        record = {"name": name, "start": 0.0, "seconds": 0.0, "depth": self._depth,
+                  "fields": dict(fields)}
+        self._depth += 1
+        started = time.perf_counter()
+        record["start"] = started - self._t0
+        try:
+            yield record["fields"]
+        finally:
+            record["seconds"] = time.perf_counter() - started
+            self._depth -= 1
+            with self._lock:
+                self.spans.append(record)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    @contextmanager
+    def activate(self):
+        """
+        Make this the recorder seen by span()/count()/gauge().
+        """
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    @property
+    def total_seconds(self):
+        return time.perf_counter() - self._t0
+
+    def span_table(self):
+        """
+        Spans in start order as rows: name (indented by depth), seconds,
+        fields.
+        """
+        return [
+            {
+                "Stage": "  " * s["depth"] + s["name"],
+                "ms": round(s["seconds"] * 1000, 2),
+                "Details": ", ".join(f"{k}={v}" for k, v in s["fields"].items()),
+            }
+            for s in sorted(self.spans, key=lambda s: s["start"])
+        ]
+
+    def records(self):
+        """
+        Structured records: one per span, counter and gauge, then a summary.
+        """
+        base = {"run": self.run_id, "run_name": self.name}
+        out = [
+            {**base, "type": "span", "name": s["name"], "start": round(s["start"], 6),
+             "seconds": round(s["seconds"], 6), "depth": s["depth"], **s["fields"]}
+            for s in sorted(self.spans, key=lambda s: s["start"])
+        ]
+        out += [{**base, "type": "counter", "name": k, "value": v}
+                for k, v in sorted(self.counters.items())]
+        out += [{**base, "type": "gauge", "name": k, "value": v}
+                for k, v in sorted(self.gauges.items())]
+        out.append({
+            **base,
+            "type": "summary",
+            "started_at": self.started_at,
+            "seconds": round(self.total_seconds, 6),
+            **self.context,
+        })
+        return out
+
+    def to_jsonl(self):
+        return "".join(json.dumps(r, default=str) + "\n" for r in self.records())
+
+    def write_jsonl(self, path):
+        """
+        Append this run to a JSON lines file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a") as fh:
+            fh.write(self.to_jsonl())
+
+
+def current_recorder():
+    return _current.get()
+
+
+def span(name, **fields):
+    """
+    Span on the active recorder, or a no-op context (yielding a throwaway
+    dict) when none is active.
+    """
+    recorder = _current.get()
+    if recorder is None:
+        return nullcontext({})
+    return recorder.span(name, **fields)
+
+
+def count(name, value=1):
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.count(name, value)
+
+
+def gauge(name, value):
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.gauge(name, value)
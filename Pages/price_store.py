@@ -0,0 +1,626 @@
+import os
+import sqlite3
+import threading
+import datetime as dt
+from collections import namedtuple
+from contextlib import closing, contextmanager
+
+import numpy as np
+import pandas as pd
+
+from Pages import perf
+from Pages.providers import get_provider
+from Pages.scheduler import DownloadScheduler
+
+# --------------------------------------------------------------
+# LOCAL PRICE STORE (SQLite, keyed by ticker + date)
+# --------------------------------------------------------------
+DEFAULT_DB_PATH = os.environ.get(
+    "EVENT_STUDY_PRICE_DB", os.path.join("data", "prices.sqlite")
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    ticker TEXT NOT NULL,
+    date   TEXT NOT NULL,
+    close  REAL,
+    PRIMARY KEY (ticker, date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS coverage (
+    ticker TEXT NOT NULL,
+    start  TEXT NOT NULL,
+    end    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coverage_ticker ON coverage (ticker);
+
+-- Intraday bars: ts = bar start in exchange local time, as epoch seconds
+CREATE TABLE IF NOT EXISTS bars (
+    ticker   TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts       INTEGER NOT NULL,
+    close    REAL,
+    PRIMARY KEY (ticker, interval, ts)
+) WITHOUT ROWID;
+
+-- Same layout as coverage, keyed by "<ticker>@<interval>"
+CREATE TABLE IF NOT EXISTS bar_coverage (
+    ticker TEXT NOT NULL,
+    start  TEXT NOT NULL,
+    end    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bar_coverage_ticker ON bar_coverage (ticker);
+"""
+
+ONE_DAY = dt.timedelta(days=1)
+EPOCH = pd.Timestamp("1970-01-01")
+
+# Event windows closer together than this are fetched as one span: one
+# slightly larger request beats two round trips
+DEFAULT_MAX_GAP_DAYS = 30
+
+# A day of 1-minute bars is ~390 rows per ticker, so intraday windows are
+# only merged across a weekend or a holiday, never across idle weeks
+BAR_MAX_GAP_DAYS = 4
+
+# Constituent-level studies ask for hundreds of tickers at once: requests
+# are split into batches of this many tickers (so they download
+# concurrently), and stored prices are read this many tickers per query
+# (below SQLite's bound-parameter limit, and bounding the long rows held in
+# memory)
+MAX_TICKERS_PER_REQUEST = int(os.environ.get("EVENT_STUDY_TICKERS_PER_REQUEST", 100))
+SQL_TICKER_CHUNK = 100
+
+# Providers such as Yahoo serve closes adjusted for splits and dividends, so
+# the whole history of a ticker shifts after each one. Every daily request
+# reaches this many days back into what is already stored; if the stored
+# closes there no longer match (relative tolerance below), the ticker's
+# older rows are on the previous basis and are dropped to be fetched again
+ANCHOR_DAYS = 7
+ADJUSTMENT_TOLERANCE = 1e-5
+
+# A download that did not succeed; status is "no_data" or "transient"
+FailedFetch = namedtuple("FailedFetch", ["start", "end", "tickers", "status", "error"])
+
+
+def _to_date(value):
+    return pd.Timestamp(value).date()
+
+
+def _merge_ranges(ranges):
+    """
+    Merge overlapping or touching (start, end) date ranges.
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + ONE_DAY:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _bar_key(ticker, interval):
+    return f"{ticker}@{interval}"
+
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _overlaps(a, b):
+    """
+    True when two (start, end, tickers) requests share a ticker and a day.
+    """
+    return a[0] <= b[1] and b[0] <= a[1] and not set(a[2]).isdisjoint(b[2])
+
+
+def _within(a, b):
+    """
+    True when request `a` asks for nothing request `b` did not.
+    """
+    return b[0] <= a[0] and a[1] <= b[1] and set(a[2]) <= set(b[2])
+
+
+def _gaps(covered, start, end):
+    """
+    Parts of [start, end] outside the merged `covered` ranges; ranges
+    without a single weekday are dropped.
+    """
+    gaps = []
+    cursor = start
+    for cov_start, cov_end in covered:
+        if cov_end < cursor:
+            continue
+        if cov_start > end:
+            break
+        if cov_start > cursor:
+            gaps.append((cursor, min(cov_start - ONE_DAY, end)))
+        cursor = max(cursor, cov_end + ONE_DAY)
+    if cursor <= end:
+        gaps.append((cursor, end))
+
+    return [(s, e) for s, e in gaps if np.busday_count(s, e + ONE_DAY) > 0]
+
+
+def plan_download_spans(ranges, max_gap_days=DEFAULT_MAX_GAP_DAYS):
+    """
+    Collapse per-event (start, end) ranges into the fewest contiguous spans.
+    Ranges that overlap, touch, or sit within `max_gap_days` of each other
+    end up in the same span.
+    Returns a sorted list of (start, end) dates.
+    """
+    gap = dt.timedelta(days=max_gap_days)
+    spans = []
+    for start, end in sorted((_to_date(s), _to_date(e)) for s, e in ranges):
+        if spans and start <= spans[-1][1] + gap + ONE_DAY:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+    return spans
+
+
+class PriceStore:
+    """
+    On-disk cache of daily close prices.
+
+    Prices live in a `prices` table keyed by (ticker, date). A separate
+    `coverage` table records which date ranges have already been requested
+    for each ticker, so weekends, holidays and other gaps are not
+    re-downloaded on every run.
+
+    `get_close()` reads the store first and only fetches the date ranges that
+    are missing from `provider` (see Pages/providers.py), then appends them.
+    Missing ranges are downloaded concurrently through `scheduler` (see
+    Pages/scheduler.py). The store lock only covers planning and writing;
+    requests being downloaded are registered as in flight, and a caller
+    that needs an overlapping range waits for that download instead of
+    repeating it, while everything else proceeds in parallel.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, provider=None, scheduler=None):
+        self.path = path
+        self.provider = provider or get_provider()
+        self.scheduler = scheduler or DownloadScheduler()
+        self.download_calls = 0
+        self.bytes_downloaded = 0  # in-memory size of the returned frames
+        self.version = 0  # bumped on every write; keys derived caches
+        self._lock = threading.Lock()
+        self._in_flight = []  # (interval, request, threading.Event)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """
+        Connection that commits (or rolls back) and is closed on exit.
+        """
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            yield conn
+
+    # ---------- coverage bookkeeping ----------
+    def _coverage(self, conn, ticker, table="coverage"):
+        rows = conn.execute(
+            f"SELECT start, end FROM {table} WHERE ticker = ?", (ticker,)
+        ).fetchall()
+        return _merge_ranges(
+            (dt.date.fromisoformat(s), dt.date.fromisoformat(e)) for s, e in rows
+        )
+
+    def _coverage_many(self, conn, tickers, table="coverage"):
+        """
+        Merged covered ranges of every ticker, in one query per chunk.
+        """
+        rows = {ticker: [] for ticker in tickers}
+        for chunk in _chunks(list(tickers), SQL_TICKER_CHUNK):
+            placeholders = ",".join("?" for _ in chunk)
+            for ticker, s, e in conn.execute(
+                f"SELECT ticker, start, end FROM {table} WHERE ticker IN ({placeholders})",
+                chunk,
+            ):
+                rows[ticker].append((dt.date.fromisoformat(s), dt.date.fromisoformat(e)))
+        return {ticker: _merge_ranges(ranges) for ticker, ranges in rows.items()}
+
+    def _add_coverage(self, conn, ticker, start, end, table="coverage"):
+        merged = _merge_ranges(self._coverage(conn, ticker, table) + [(start, end)])
+        conn.execute(f"DELETE FROM {table} WHERE ticker = ?", (ticker,))
+        conn.executemany(
+            f"INSERT INTO {table} (ticker, start, end) VALUES (?, ?, ?)",
+            [(ticker, s.isoformat(), e.isoformat()) for s, e in merged],
+        )
+
+    def missing_ranges(self, ticker, start, end):
+        """
+        Date ranges inside [start, end] that have never been fetched for
+        `ticker`. Ranges without a single weekday are dropped.
+        """
+        start, end = _to_date(start), _to_date(end)
+        with self._connect() as conn:
+            covered = self._coverage(conn, ticker)
+        return _gaps(covered, start, end)
+
+    # ---------- fetch + write ----------
+    def _plan(self, tickers, spans, interval=None):
+        """
+        Missing (start, end, tickers) requests over all `spans`; tickers that
+        share the same missing range are fetched together, up to
+        MAX_TICKERS_PER_REQUEST per request. Daily requests start
+        ANCHOR_DAYS early so they overlap stored closes. With `interval`,
+        the bar coverage of that interval is planned instead of daily
+        closes.
+        """
+        with self._connect() as conn:
+            if interval is None:
+                covered = self._coverage_many(conn, tickers)
+            else:
+                keys = self._coverage_many(
+                    conn, [_bar_key(t, interval) for t in tickers], "bar_coverage"
+                )
+                covered = {t: keys[_bar_key(t, interval)] for t in tickers}
+        anchor = dt.timedelta(days=ANCHOR_DAYS if interval is None else 0)
+        by_range = {}
+        for start, end in spans:
+            for ticker in tickers:
+                for gap_start, gap_end in _gaps(covered[ticker], start, end):
+                    by_range.setdefault((gap_start - anchor, gap_end), []).append(ticker)
+        return [
+            (s, e, tuple(chunk))
+            for (s, e), gap_tickers in sorted(by_range.items())
+            for chunk in _chunks(gap_tickers, MAX_TICKERS_PER_REQUEST)
+        ]
+
+    def _download(self, request):
+        start, end, tickers = request
+        return self.provider.download_close(list(tickers), start, end)
+
+    def _download_bars(self, request, interval):
+        start, end, tickers = request
+        return self.provider.download_bars(list(tickers), start, end, interval)
+
+    def ensure_many(self, tickers, spans, interval=None):
+        """
+        Download whatever part of every (start, end) span is missing for
+        `tickers`. All missing requests run concurrently; whatever succeeds
+        is written even when other requests fail. With `interval` ("1m",
+        "5m"), intraday bars are downloaded instead of daily closes.
+        Returns list of FailedFetch for the requests that did not succeed.
+        """
+        spans = [(_to_date(s), _to_date(e)) for s, e in spans]
+        readjust = interval is None
+        if interval is None:
+            download, write = self._download, self._write
+        else:
+            def download(request):
+                return self._download_bars(request, interval)
+
+            def write(close, tickers, start, covered_end):
+                self._write_bars(close, tickers, interval, start, covered_end)
+
+        # Today's bar may still be moving; never mark it as final
+        last_final = dt.date.today() - ONE_DAY
+
+        failures, attempted = [], []
+        while True:
+            with self._lock:
+                requests = [
+                    r for r in self._plan(tickers, spans, interval)
+                    if not any(_within(r, a) for a in attempted)
+                ]
+                if not requests:
+                    return failures
+                busy = [
+                    (request, event) for iv, request, event in self._in_flight
+                    if iv == interval
+                ]
+                waits = set()
+                mine = []
+                for r in requests:
+                    blocking = [event for request, event in busy if _overlaps(r, request)]
+                    waits.update(blocking)
+                    if not blocking:
+                        mine.append(r)
+                done = threading.Event()
+                self._in_flight.extend((interval, r, done) for r in mine)
+
+            # Download our own requests, then wait for the overlapping ones
+            # someone else started and plan again: what they could not get
+            # is still missing and becomes ours on the next pass
+            try:
+                if mine:
+                    failures.extend(self._run(mine, download, write, last_final, readjust))
+            finally:
+                with self._lock:
+                    self._in_flight = [f for f in self._in_flight if f[2] is not done]
+                done.set()
+            attempted.extend(mine)
+            for event in waits:
+                event.wait()
+
+    def _run(self, requests, download, write, last_final, readjust=False):
+        """
+        Download `requests` through the scheduler (without the store lock)
+        and write every success (under it). With `readjust`, tickers whose
+        stored closes the downloads contradict are dropped first.
+        Returns list of FailedFetch.
+        """
+        failures = []
+        with perf.span("download", requests=len(requests)) as fields:
+            outcomes = self.scheduler.run(requests, download)
+
+            size = rows = attempts = 0
+            with self._lock:
+                if readjust:
+                    self._drop_readjusted(
+                        [o.value for o in outcomes.values() if o.status == "ok"]
+                    )
+                for (gap_start, gap_end, gap_tickers), outcome in outcomes.items():
+                    attempts += outcome.attempts
+                    if outcome.status == "ok":
+                        size += int(outcome.value.memory_usage(deep=True).sum())
+                        rows += len(outcome.value)
+                        write(outcome.value, gap_tickers, gap_start, min(gap_end, last_final))
+                    else:
+                        failures.append(
+                            FailedFetch(gap_start, gap_end, gap_tickers, outcome.status, outcome.error)
+                        )
+                self.download_calls += attempts
+                self.bytes_downloaded += size
+            fields.update(attempts=attempts, rows=rows, bytes=size, failed=len(failures))
+
+        perf.count("download.requests", len(requests))
+        perf.count("download.retries", attempts - len(requests))
+        perf.count("download.bytes", size)
+        perf.count("download.failed", len(failures))
+        return failures
+
+    def ensure(self, tickers, start, end):
+        """
+        Download whatever part of [start, end] is missing for `tickers`.
+        Returns list of FailedFetch.
+        """
+        return self.ensure_many(tickers, [(start, end)])
+
+    def _write(self, close, tickers, start, covered_end):
+        rows = []
+        fetched = set()
+        for ticker in tickers:
+            if ticker not in close.columns:
+                continue
+            series = close[ticker].dropna()
+            if series.empty:
+                continue
+            fetched.add(ticker)
+            rows.extend(
+                (ticker, ts.date().isoformat(), float(value))
+                for ts, value in series.items()
+            )
+
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO prices (ticker, date, close) VALUES (?, ?, ?)",
+                rows,
+            )
+            # Only tickers that actually returned data count as covered, so a
+            # failed request is retried on the next run
+            if covered_end >= start:
+                for ticker in fetched:
+                    self._add_coverage(conn, ticker, start, covered_end)
+        self.version += 1
+
+    def _drop_readjusted(self, frames):
+        """
+        Drop the stored closes and coverage of every ticker whose fresh
+        closes in `frames` contradict them: the provider re-adjusted its
+        history. Only the new downloads are kept (written next); the rest
+        is planned and fetched again.
+        """
+        with self._connect() as conn:
+            for close in frames:
+                for ticker in close.columns:
+                    if self._adjustment_changed(conn, ticker, close[ticker].dropna()):
+                        conn.execute("DELETE FROM prices WHERE ticker = ?", (ticker,))
+                        conn.execute("DELETE FROM coverage WHERE ticker = ?", (ticker,))
+                        perf.count("store.readjusted")
+
+    def _adjustment_changed(self, conn, ticker, series):
+        """
+        True when `series` disagrees with the stored closes of `ticker` on a
+        covered (final) day: the provider has re-adjusted its history.
+        """
+        covered = self._coverage(conn, ticker)
+        days = [
+            ts.date() for ts in series.index
+            if any(s <= ts.date() <= e for s, e in covered)
+        ]
+        if not days:
+            return False
+        stored = dict(conn.execute(
+            "SELECT date, close FROM prices WHERE ticker = ? AND date BETWEEN ? AND ?",
+            (ticker, min(days).isoformat(), max(days).isoformat()),
+        ).fetchall())
+        for day in days:
+            old = stored.get(day.isoformat())
+            new = float(series[pd.Timestamp(day)])
+            if old is not None and abs(new - old) > ADJUSTMENT_TOLERANCE * abs(old):
+                return True
+        return False
+
+    def _write_bars(self, close, tickers, interval, start, covered_end):
+        seconds = (pd.DatetimeIndex(close.index) - EPOCH) // pd.Timedelta(seconds=1)
+        rows = []
+        fetched = set()
+        for ticker in tickers:
+            if ticker not in close.columns:
+                continue
+            values = close[ticker].to_numpy(dtype=float)
+            keep = ~np.isnan(values)
+            if not keep.any():
+                continue
+            fetched.add(ticker)
+            rows.extend(
+                (ticker, interval, int(ts), float(value))
+                for ts, value in zip(seconds[keep], values[keep])
+            )
+
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO bars (ticker, interval, ts, close) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            if covered_end >= start:
+                for ticker in fetched:
+                    self._add_coverage(
+                        conn, _bar_key(ticker, interval), start, covered_end, "bar_coverage"
+                    )
+        self.version += 1
+
+    # ---------- read ----------
+    def stored_dates(self, ticker):
+        """
+        Covered ranges and stored trading dates for one ticker.
+        Returns:
+          (list of (start, end) dates, sorted DatetimeIndex)
+        """
+        with self._connect() as conn:
+            covered = self._coverage(conn, ticker)
+            rows = conn.execute(
+                "SELECT date FROM prices WHERE ticker = ? ORDER BY date", (ticker,)
+            ).fetchall()
+        return covered, pd.DatetimeIndex([r[0] for r in rows])
+
+    def load(self, tickers, start, end):
+        """
+        Read stored closes for [start, end].
+        Returns DataFrame with index = dates, columns = tickers.
+        """
+        start, end = _to_date(start), _to_date(end)
+        # One query + pivot per chunk of tickers: the long rows of only one
+        # chunk are in memory at a time
+        frames = []
+        with self._connect() as conn:
+            for chunk in _chunks(list(tickers), SQL_TICKER_CHUNK):
+                long = pd.read_sql_query(
+                    f"SELECT ticker, date, close FROM prices "
+                    f"WHERE ticker IN ({','.join('?' for _ in chunk)}) "
+                    f"AND date BETWEEN ? AND ? ",
+                    conn,
+                    params=[*chunk, start.isoformat(), end.isoformat()],
+                )
+                frames.append(long.pivot(index="date", columns="ticker", values="close"))
+
+        wide = pd.concat(frames, axis=1) if len(frames) > 1 else frames[0]
+        wide.index = pd.to_datetime(wide.index)
+        wide.columns.name = None
+        return wide.sort_index().reindex(columns=list(tickers)).dropna(how="all")
+
+    def load_bars(self, tickers, interval, start, end, dtype=np.float32):
+        """
+        Read stored bar closes for the sessions of [start, end].
+        Returns DataFrame with index = bar start times, columns = tickers,
+        values as `dtype`.
+        """
+        start, end = _to_date(start), _to_date(end)
+        lo = (pd.Timestamp(start) - EPOCH) // pd.Timedelta(seconds=1)
+        hi = (pd.Timestamp(end + ONE_DAY) - EPOCH) // pd.Timedelta(seconds=1)
+        frames = []
+        with self._connect() as conn:
+            for chunk in _chunks(list(tickers), SQL_TICKER_CHUNK):
+                long = pd.read_sql_query(
+                    f"SELECT ticker, ts, close FROM bars "
+                    f"WHERE ticker IN ({','.join('?' for _ in chunk)}) "
+                    f"AND interval = ? AND ts >= ? AND ts < ?",
+                    conn,
+                    params=[*chunk, interval, lo, hi],
+                )
+                long["close"] = long["close"].astype(dtype)
+                frames.append(long.pivot(index="ts", columns="ticker", values="close"))
+
+        wide = pd.concat(frames, axis=1) if len(frames) > 1 else frames[0]
+        wide.index = pd.to_datetime(wide.index.astype("int64"), unit="s").rename(None)
+        wide.columns.name = None
+        return wide.sort_index().reindex(columns=list(tickers)).dropna(how="all")
+
+    def fetch_bars(self, tickers, interval, ranges, max_gap_days=BAR_MAX_GAP_DAYS):
+        """
+        Bar closes for `tickers` covering every (start, end) date range in
+        `ranges`, downloading only the sessions never fetched at `interval`.
+        Returns:
+          (DataFrame of `interval` bars, list of FailedFetch)
+        """
+        tickers = list(tickers)
+        spans = plan_download_spans(ranges, max_gap_days)
+        failures = self.ensure_many(tickers, spans, interval)
+
+        with perf.span("store_read_bars", spans=len(spans)) as fields:
+            frames = [self.load_bars(tickers, interval, start, end) for start, end in spans]
+            fields["rows"] = sum(len(f) for f in frames)
+        if not frames:
+            return pd.DataFrame(columns=tickers, dtype=np.float32), failures
+        return pd.concat(frames).sort_index(), failures
+
+    def get_close(self, tickers, start, end):
+        """
+        Closes for `tickers` over [start, end], fetching only what is missing.
+        """
+        tickers = list(tickers)
+        self.ensure(tickers, start, end)
+        return self.load(tickers, start, end)
+
+    def fetch_many(self, tickers, ranges, max_gap_days=DEFAULT_MAX_GAP_DAYS):
+        """
+        Closes for `tickers` covering every (start, end) in `ranges`.
+
+        The ranges are planned into contiguous spans first, so the number of
+        downloads grows with the number of distinct time periods rather than
+        the number of events, and spans that still need downloading are
+        fetched concurrently. Returns one DataFrame for all spans; callers
+        cut their own windows out of it in memory.
+        Returns:
+          (DataFrame, list of FailedFetch)
+        """
+        tickers = list(tickers)
+        spans = plan_download_spans(ranges, max_gap_days)
+        failures = self.ensure_many(tickers, spans)
+
+        with perf.span("store_read", spans=len(spans)) as fields:
+            frames = [self.load(tickers, start, end) for start, end in spans]
+            fields["rows"] = sum(len(f) for f in frames)
+        if not frames:
+            return pd.DataFrame(columns=tickers), failures
+        return pd.concat(frames).sort_index(), failures
+
+    def get_close_many(self, tickers, ranges, max_gap_days=DEFAULT_MAX_GAP_DAYS):
+        """
+        Like fetch_many(), without the failure report.
+        """
+        return self.fetch_many(tickers, ranges, max_gap_days)[0]
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def configure_price_store(path=DEFAULT_DB_PATH, provider=None, scheduler=None):
+    """
+    Replace the process-wide store, e.g. to point it at a replay provider,
+    a scratch database or a differently tuned download scheduler.
+    """
+    global _default_store
+    with _default_store_lock:
+        _default_store = PriceStore(path, provider, scheduler)
+        return _default_store
+
+
+def get_price_store():
+    """
+    Process-wide PriceStore shared by every page and session.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = PriceStore()
+        return _default_store
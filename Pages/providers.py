@@ -0,0 +1,353 @@
+import hashlib
+import os
+import random
+import threading
+import time
+import zlib
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------------------
+# PRICE-DATA PROVIDERS
+# --------------------------------------------------------------
+# Every provider answers one question: daily closes for `tickers` over
+# [start, end] (both inclusive), as a DataFrame with index = dates and
+# columns = tickers. The price store is the only caller.
+#
+# Providers that have intraday data also answer download_bars(): bar closes
+# over the regular sessions of [start, end], index = bar start in exchange
+# local time (tz-naive), for an interval in BAR_MINUTES. Yahoo, synthetic
+# and flaky do; the others raise NotImplementedError.
+#
+# Choose one with EVENT_STUDY_PROVIDER:
+#   yfinance              live Yahoo data (default)
+#   local:<path>          CSV/Parquet snapshot file or directory
+#   record:<dir>          call Yahoo and save every response to <dir>
+#   replay:<dir>          serve saved responses only, never the network
+#   auto:<dir>            replay when a response is saved, record otherwise
+#   synthetic             deterministic random-walk prices, no network
+#   flaky:<rate>          synthetic prices with injected latency and failures
+
+ONE_DAY = dt.timedelta(days=1)
+
+# Supported bar intervals -> minutes per bar
+BAR_MINUTES = {"1m": 1, "5m": 5}
+
+# Regular session, exchange local time
+SESSION_OPEN = dt.time(9, 30)
+SESSION_MINUTES = 390
+EXCHANGE_TZ = "America/New_York"
+
+
+def _empty(tickers):
+    return pd.DataFrame(columns=list(tickers), index=pd.DatetimeIndex([]))
+
+
+def _read_frame(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path, index_col=0, parse_dates=True)
+
+
+class PriceProvider:
+    """
+    Base class for price sources.
+    """
+
+    name = "base"
+
+    def download_close(self, tickers, start, end):
+        raise NotImplementedError
+
+    def download_bars(self, tickers, start, end, interval):
+        raise NotImplementedError(f"The {self.name} provider has no intraday bars")
+
+
+def _yahoo_close(tickers, start, end, interval="1d"):
+    """
+    Closes of `tickers` over [start, end] from Yahoo, one history call per
+    ticker with errors raised instead of logged. A ticker Yahoo has no data
+    for is left out; the whole call fails with
+      LookupError      when no ticker has data (retrying cannot help)
+      ConnectionError  on any other error (rate limit, timeout, outage)
+    Returns DataFrame (None when the range holds no trading day), index =
+    date or exchange-local bar start (tz-naive), columns = tickers.
+    """
+    import yfinance as yf
+    from yfinance.exceptions import YFTickerMissingError
+
+    series, missing = [], []
+    for ticker in tickers:
+        try:
+            # yfinance treats `end` as exclusive. Concurrency comes from the
+            # download scheduler, so each call stays on one thread.
+            history = yf.Ticker(ticker).history(
+                start=start, end=end + ONE_DAY, interval=interval, prepost=False,
+                raise_errors=True,
+            )
+        except YFTickerMissingError as exc:
+            missing.append(f"{ticker}: {exc}")
+            continue
+        except Exception as exc:
+            raise ConnectionError(f"Yahoo request for {ticker} failed: {exc!r}") from exc
+        if history.empty:
+            continue
+        close = history["Close"].rename(ticker)
+        if interval == "1d":
+            close.index = pd.DatetimeIndex(close.index.tz_localize(None).normalize())
+        else:
+            close.index = close.index.tz_convert(EXCHANGE_TZ).tz_localize(None)
+        series.append(close)
+
+    if missing and not series:
+        raise LookupError("; ".join(missing))
+    if not series:
+        return None
+    return pd.concat(series, axis=1).reindex(columns=tickers)
+
+
+class YFinanceProvider(PriceProvider):
+    """
+    Live daily closes from Yahoo Finance.
+    """
+
+    name = "yfinance"
+
+    def download_close(self, tickers, start, end):
+        tickers = list(tickers)
+        close = _yahoo_close(tickers, start, end)
+        if close is None:
+            return _empty(tickers)
+        return close.dropna(how="all")
+
+    def download_bars(self, tickers, start, end, interval):
+        tickers = list(tickers)
+        # Yahoo keeps 1-minute bars for about 30 days and 5-minute bars for
+        # about 60; older ranges come back empty
+        close = _yahoo_close(tickers, start, end, interval)
+        if close is None:
+            return _empty(tickers)
+        return close.dropna(how="all")
+
+
+class LocalFileProvider(PriceProvider):
+    """
+    Closes from local snapshots. `path` is either
+      - one wide file (index = dates, columns = tickers), or
+      - a directory with one file per ticker: <TICKER>.csv or
+        <TICKER>.parquet, index = dates, a "Close" column.
+    """
+
+    name = "local"
+
+    def __init__(self, path):
+        self.path = path
+        self._wide = None
+
+    def _ticker_series(self, ticker):
+        for ext in (".parquet", ".csv"):
+            path = os.path.join(self.path, ticker + ext)
+            if os.path.exists(path):
+                frame = _read_frame(path)
+                column = "Close" if "Close" in frame.columns else frame.columns[0]
+                return frame[column].rename(ticker)
+        return None
+
+    def download_close(self, tickers, start, end):
+        tickers = list(tickers)
+        if os.path.isdir(self.path):
+            series = [self._ticker_series(t) for t in tickers]
+            series = [s for s in series if s is not None]
+            if not series:
+                return _empty(tickers)
+            close = pd.concat(series, axis=1)
+        else:
+            if self._wide is None:
+                self._wide = _read_frame(self.path)
+            close = self._wide.reindex(columns=tickers)
+
+        close.index = pd.to_datetime(close.index)
+        close = close.sort_index().loc[pd.Timestamp(start):pd.Timestamp(end)]
+        return close.dropna(how="all")
+
+
+class RecordReplayProvider(PriceProvider):
+    """
+    Captures responses of `inner` once and serves them deterministically.
+
+    Each request is saved as <cassette_dir>/<key>.csv, where the key hashes
+    the ticker list and date range. Modes:
+      record  always call `inner` and overwrite the saved response
+      replay  only serve saved responses; a miss raises LookupError
+      auto    replay when saved, otherwise record
+    """
+
+    name = "replay"
+    MODES = ("record", "replay", "auto")
+
+    def __init__(self, cassette_dir, inner=None, mode="auto"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown record/replay mode: {mode}")
+        self.cassette_dir = cassette_dir
+        self.inner = inner or YFinanceProvider()
+        self.mode = mode
+        os.makedirs(cassette_dir, exist_ok=True)
+
+    def _path(self, tickers, start, end):
+        key = "|".join([",".join(sorted(tickers)), str(start), str(end)])
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return os.path.join(self.cassette_dir, digest + ".csv")
+
+    def download_close(self, tickers, start, end):
+        tickers = list(tickers)
+        path = self._path(tickers, start, end)
+
+        if self.mode != "record" and os.path.exists(path):
+            close = pd.read_csv(path, index_col=0, parse_dates=True)
+            return close.reindex(columns=tickers).dropna(how="all")
+
+        if self.mode == "replay":
+            raise LookupError(
+                f"No recorded response for {tickers} {start}..{end} in {self.cassette_dir}"
+            )
+
+        close = self.inner.download_close(tickers, start, end)
+        close.to_csv(path, index_label="Date")
+        return close
+
+
+class SyntheticProvider(PriceProvider):
+    """
+    Deterministic random-walk closes for any ticker, without the network.
+
+    Each ticker's path is seeded from its name and anchored at `origin`, so
+    any date range of the same ticker returns the same prices.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, origin="1990-01-01", seed=0):
+        self.origin = pd.Timestamp(origin)
+        self.seed = seed
+
+    def download_close(self, tickers, start, end):
+        tickers = list(tickers)
+        start = max(pd.Timestamp(start), self.origin)
+        dates = pd.bdate_range(start, end)
+        if dates.empty:
+            return _empty(tickers)
+
+        # Business days since the origin, so a range's draws don't depend on
+        # where it starts
+        offset = int(np.busday_count(self.origin.date(), start.date()))
+        columns = {}
+        for ticker in tickers:
+            rng = np.random.default_rng([self.seed, zlib.crc32(ticker.encode())])
+            returns = rng.normal(0.0003, 0.012, offset + len(dates))
+            columns[ticker] = 100.0 * np.exp(np.cumsum(returns)[offset:])
+        return pd.DataFrame(columns, index=dates)
+
+    def download_bars(self, tickers, start, end, interval):
+        """
+        Minute random walks through each regular session, opening at the
+        previous synthetic daily close; 5-minute bars keep every 5th minute.
+        Each (ticker, session) is seeded on its own, so any range returns
+        the same bars.
+        """
+        from Pages.trading_calendar import projected_trading_days
+
+        tickers = list(tickers)
+        step = BAR_MINUTES[interval]
+        sessions = projected_trading_days(max(pd.Timestamp(start), self.origin), end)
+        if sessions.empty:
+            return _empty(tickers)
+
+        daily = self.download_close(tickers, sessions[0] - pd.Timedelta(days=10), sessions[-1])
+        previous = daily.shift(1).reindex(sessions)
+        minutes = np.arange(0, SESSION_MINUTES, step)
+        opening = pd.Timedelta(hours=SESSION_OPEN.hour, minutes=SESSION_OPEN.minute)
+        index = (
+            sessions.repeat(len(minutes))
+            + opening
+            + pd.to_timedelta(np.tile(minutes, len(sessions)), unit="min")
+        )
+
+        columns = {}
+        for ticker in tickers:
+            paths = []
+            for day, open_price in zip(sessions, previous[ticker].to_numpy()):
+                rng = np.random.default_rng(
+                    [self.seed, zlib.crc32(ticker.encode()), day.toordinal()]
+                )
+                returns = rng.normal(0.0, 0.012 / np.sqrt(SESSION_MINUTES), SESSION_MINUTES)
+                path = open_price * np.exp(np.cumsum(returns))
+                paths.append(path[step - 1::step])
+            columns[ticker] = np.concatenate(paths)
+        return pd.DataFrame(columns, index=index)
+
+
+class FlakyProvider(PriceProvider):
+    """
+    Wraps `inner` with injected latency and failures, for exercising the
+    download scheduler:
+      latency       seconds every call sleeps, plus up to `jitter` more
+      failure_rate  share of calls raising ConnectionError (transient)
+      no_data_rate  share of calls raising LookupError (permanent)
+    """
+
+    name = "flaky"
+
+    def __init__(self, inner=None, latency=0.2, jitter=0.1, failure_rate=0.2,
+                 no_data_rate=0.0, seed=None):
+        self.inner = inner or SyntheticProvider()
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.no_data_rate = no_data_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _call(self, tickers, start, end):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.uniform(0.0, self.jitter)
+            roll = self._rng.random()
+        time.sleep(delay)
+
+        if roll < self.no_data_rate:
+            raise LookupError(f"No data for {list(tickers)} {start}..{end}")
+        if roll < self.no_data_rate + self.failure_rate:
+            raise ConnectionError("Injected transient failure")
+
+    def download_close(self, tickers, start, end):
+        self._call(tickers, start, end)
+        return self.inner.download_close(tickers, start, end)
+
+    def download_bars(self, tickers, start, end, interval):
+        self._call(tickers, start, end)
+        return self.inner.download_bars(tickers, start, end, interval)
+
+
+def get_provider(spec=None):
+    """
+    Build a provider from a spec string such as "yfinance",
+    "local:snapshots/" or "replay:cassettes/". Defaults to the
+    EVENT_STUDY_PROVIDER environment variable, then to Yahoo.
+    """
+    spec = spec or os.environ.get("EVENT_STUDY_PROVIDER", "yfinance")
+    kind, _, arg = spec.partition(":")
+
+    if kind == "yfinance":
+        return YFinanceProvider()
+    if kind == "local":
+        return LocalFileProvider(arg)
+    if kind in RecordReplayProvider.MODES:
+        return RecordReplayProvider(arg, mode=kind)
+    if kind == "synthetic":
+        return SyntheticProvider()
+    if kind == "flaky":
+        return FlakyProvider(failure_rate=float(arg or 0.2))
+    raise ValueError(f"Unknown price provider: {spec}")
@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# --------------------------------------------------------------
+# PROCESS-WIDE RESULT CACHE (LRU + TTL + single-flight)
+# --------------------------------------------------------------
+# Streamlit runs every session in the same process, so a module-level cache
+# is shared by all analysts. Entries are per (event, ticker, config); when
+# several sessions ask for the same missing keys at once, the first one
+# computes them and the others wait for its result instead of downloading
+# the same data again.
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("EVENT_STUDY_CACHE_ENTRIES", 50_000))
+DEFAULT_TTL_SECONDS = float(os.environ.get("EVENT_STUDY_CACHE_TTL", 6 * 3600))
+
+# "No data" answers expire quickly so a transient outage is retried soon
+NEGATIVE_TTL_SECONDS = 300
+
+
+class ResultCache:
+    """
+    Size-bounded LRU with per-entry expiry and in-flight coalescing.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 negative_ttl_seconds=NEGATIVE_TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}         # key -> threading.Event
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def _lookup(self, key, now):
+        """
+        Caller holds the lock. Returns (found, value).
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._data[key]
+            self.expirations += 1
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def _store(self, key, value, now):
+        """
+        Caller holds the lock.
+        """
+        ttl = self.negative_ttl_seconds if value is None else self.ttl_seconds
+        self._data[key] = (now + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, keys, compute):
+        """
+        Values for every key in `keys`.
+
+        `compute(missing_keys)` is called at most once per call, only for
+        keys that are neither cached nor being computed by another thread,
+        and must return {key: value}. Keys another thread is already
+        computing are waited on, not recomputed. A value of None is cached
+        as a short-lived negative answer.
+        """
+        keys = list(dict.fromkeys(keys))
+        results = {}
+        pending = keys
+
+        while pending:
+            claimed, waiting = [], []
+            with self._lock:
+                now = self._clock()
+                for key in pending:
+                    found, value = self._lookup(key, now)
+                    if found:
+                        self.hits += 1
+                        results[key] = value
+                    elif key in self._inflight:
+                        self.coalesced += 1
+                        waiting.append((key, self._inflight[key]))
+                    else:
+                        self.misses += 1
+                        self._inflight[key] = threading.Event()
+                        claimed.append(key)
+
+            if claimed:
+                computed = {}
+                try:
+                    computed = compute(claimed)
+                finally:
+                    with self._lock:
+                        now = self._clock()
+                        for key in claimed:
+                            if key in computed:
+                                self._store(key, computed[key], now)
+                            self._inflight.pop(key).set()
+                for key in claimed:
+                    results[key] = computed.get(key)
+
+            # Whatever the other thread could not produce (e.g. it raised)
+            # is picked up on the next loop and claimed by us
+            pending = []
+            for key, event in waiting:
+                event.wait()
+                with self._lock:
+                    found, value = self._lookup(key, self._clock())
+                if found:
+                    results[key] = value
+                else:
+                    pending.append(key)
+
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """
+        Counters for monitoring.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "in_flight": len(self._inflight),
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """
+    Process-wide cache shared by every Streamlit session.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+        return _default_cache
@@ -0,0 +1,179 @@
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# --------------------------------------------------------------
+# DOWNLOAD SCHEDULER (thread pool + token bucket + retries)
+# --------------------------------------------------------------
+# Provider calls are network-bound, so the price store hands every missing
+# (range, tickers) request to one scheduler that runs them side by side on a
+# bounded thread pool. A shared token bucket keeps the request rate under the
+# provider's limit no matter how many sessions are fetching, and transient
+# errors are retried with exponential backoff and full jitter.
+
+DEFAULT_MAX_WORKERS = int(os.environ.get("EVENT_STUDY_FETCH_WORKERS", 16))
+DEFAULT_RATE = float(os.environ.get("EVENT_STUDY_FETCH_RATE", 8.0))     # requests / second
+DEFAULT_BURST = int(os.environ.get("EVENT_STUDY_FETCH_BURST", 16))
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BASE_DELAY = 0.5   # seconds before the first retry (before jitter)
+DEFAULT_MAX_DELAY = 8.0
+
+# Errors that say the data does not exist (e.g. a replay miss); retrying
+# cannot help. Anything else (timeouts, connection resets, rate-limit pages
+# that fail to parse) is transient.
+NO_DATA_ERRORS = (LookupError,)
+
+FETCH_STATUSES = ("ok", "no_data", "transient")
+
+FetchOutcome = namedtuple(
+    "FetchOutcome",
+    [
+        "status",    # one of FETCH_STATUSES
+        "value",     # what the call returned, or None
+        "error",     # last exception text, or None
+        "attempts",  # calls made, including the successful one
+        "seconds",   # wall time spent on this request, waits included
+    ],
+)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, up to `burst` saved.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take one token, sleeping until one is available.
+        Returns the seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                delay = (1.0 - self._tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+
+def backoff_delay(attempt, base=DEFAULT_BASE_DELAY, cap=DEFAULT_MAX_DELAY, rng=random):
+    """
+    Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)].
+    `attempt` counts failures so far, starting at 0.
+    """
+    return rng.uniform(0.0, min(cap, base * 2 ** attempt))
+
+
+def classify_error(exc):
+    """
+    "no_data" for errors retrying cannot fix, "transient" otherwise.
+    """
+    return "no_data" if isinstance(exc, NO_DATA_ERRORS) else "transient"
+
+
+class DownloadScheduler:
+    """
+    Runs independent provider calls concurrently under one rate limit.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY, seed=None, sleep=time.sleep):
+        self.max_workers = max(1, int(max_workers))
+        self.bucket = TokenBucket(rate, burst, sleep=sleep)
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._sleep = sleep
+
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self._stats_lock = threading.Lock()
+
+    def _jitter(self, attempt):
+        with self._rng_lock:
+            return backoff_delay(attempt, self.base_delay, self.max_delay, self._rng)
+
+    def _attempt(self, fn, request):
+        started = time.perf_counter()
+        error = None
+        for attempt in range(self.max_attempts):
+            self.bucket.acquire()
+            with self._stats_lock:
+                self.calls += 1
+                self.retries += attempt > 0
+            try:
+                value = fn(request)
+            except Exception as exc:
+                error = exc
+                if classify_error(exc) == "no_data":
+                    break
+                if attempt + 1 < self.max_attempts:
+                    self._sleep(self._jitter(attempt))
+                continue
+            return FetchOutcome("ok", value, None, attempt + 1, time.perf_counter() - started)
+
+        with self._stats_lock:
+            self.failures += 1
+        return FetchOutcome(
+            classify_error(error),
+            None,
+            f"{type(error).__name__}: {error}",
+            attempt + 1,
+            time.perf_counter() - started,
+        )
+
+    def run(self, requests, fn):
+        """
+        Call `fn(request)` for every request, concurrently.
+
+        Failures never raise: each request gets a FetchOutcome saying whether
+        it succeeded, found nothing, or kept failing after every retry, so
+        the caller can keep the partial result.
+        Returns:
+          {request: FetchOutcome}, in the order of `requests`
+        """
+        requests = list(dict.fromkeys(requests))
+        if not requests:
+            return {}
+        if len(requests) == 1 or self.max_workers == 1:
+            return {request: self._attempt(fn, request) for request in requests}
+
+        workers = min(self.max_workers, len(requests))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="price-fetch") as pool:
+            futures = [pool.submit(self._attempt, fn, request) for request in requests]
+            return {request: future.result() for request, future in zip(requests, futures)}
+
+    def stats(self):
+        """
+        Counters for monitoring.
+        """
+        with self._stats_lock:
+            return {
+                "max_workers": self.max_workers,
+                "rate": self.bucket.rate,
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+            }
@@ -0,0 +1,206 @@
+import streamlit as st
+import pandas as pd
+import altair as alt
+
+from Pages import perf
+from Pages.chart_payload import compact_frame
+from Pages.event_study import ALIGNMENT_OPTIONS, select_events
+from Pages.intervals import format_windows, parse_windows
+from Pages.perf import PERF_LOG_PATH, PerfRecorder
+from Pages.study import INTERVAL_WINDOWS, MAX_EVENT_WINDOW, disaster_events, industry_map
+from Pages.sweep import (
+    DEFAULT_POST,
+    DEFAULT_PRE,
+    DEFAULT_SWEEP_RESAMPLES,
+    SWEEP_BENCHMARKS,
+    WHOLE_WINDOW,
+    run_sweep,
+    sweep_grid,
+)
+
+# Sidebar label -> abnormal-return model
+MODEL_OPTIONS = {
+    "Simple subtraction (ticker − benchmark)": "market",
+    "Market model (α + β·benchmark)": "market_model",
+}
+
+# Event-window lengths offered on either side of T
+WINDOW_CHOICES = sorted({1, 2, 3, 5, 10, 20, 40, 60, 120, *DEFAULT_PRE, *DEFAULT_POST})
+
+# Heatmap cell height (px) per configuration row
+ROW_HEIGHT = 14
+
+
+def _stars(p):
+    if pd.isna(p):
+        return ""
+    return "***" if p < 0.01 else "**" if p < 0.05 else "*" if p < 0.10 else ""
+
+
+def _session_sweep(event_labels, tickers, configs, events, windows, n_resamples):
+    """
+    Sweep for the selection; the last one is kept in session state so
+    switching the displayed measure does not recompute it.
+    """
+    key = (tuple(event_labels), tuple(events[label] for label in event_labels),
+           tuple(tickers), tuple(configs), tuple(windows.values()), n_resamples)
+    cached = st.session_state.get("sensitivity_sweep")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    frame = run_sweep(event_labels, tickers, configs, events, windows, n_resamples)
+    st.session_state["sensitivity_sweep"] = (key, frame)
+    return frame
+
+
+def _heatmaps(frame, configurations, industries):
+    """
+    CAAR heatmap (diverging around 0, significance stars in the cells) and
+    bootstrap p-value heatmap, one row per configuration.
+    """
+    frame = frame.assign(Stars=frame["Bootstrap p"].map(_stars))
+    height = ROW_HEIGHT * len(configurations)
+    y = alt.Y("Configuration:N", sort=configurations, title=None)
+    x = alt.X("Industry:N", sort=industries, title=None, axis=alt.Axis(labelAngle=-30))
+    tooltip = ["Configuration", "Industry", "Events", "CAAR (%)", "t-stat", "Bootstrap p"]
+
+    base = alt.Chart(compact_frame(frame)).encode(y=y, x=x, tooltip=tooltip)
+    caar = alt.layer(
+        base.mark_rect().encode(
+            color=alt.Color(
+                "CAAR (%):Q",
+                scale=alt.Scale(scheme="redblue", domainMid=0),
+                legend=alt.Legend(title="CAAR (%)", orient="top"),
+            )
+        ),
+        base.mark_text(fontSize=9).encode(text="Stars:N"),
+    ).properties(title="CAAR (%) — * p<0.10, ** p<0.05, *** p<0.01", height=height)
+
+    p_values = base.mark_rect().encode(
+        y=alt.Y("Configuration:N", sort=configurations, axis=None),
+        color=alt.Color(
+            "Bootstrap p:Q",
+            scale=alt.Scale(scheme="viridis", domain=[0, 1]),
+            legend=alt.Legend(title="Bootstrap p", orient="top"),
+        ),
+    ).properties(title="Bootstrap p-value", height=height)
+
+    return alt.hconcat(caar, p_values).resolve_scale(color="independent")
+
+
+# --------------------------------------------------------------
+# MAIN PAGE FUNCTION
+# --------------------------------------------------------------
+def show_sensitivity():
+    st.title("Parameter Sensitivity")
+    st.write(
+        """
+        How much do the results depend on the choices behind them? Every combination of
+        T=0 alignment, event window, benchmark and abnormal-return model is evaluated over
+        the selected events and industries, and its CAAR and significance shown side by side.
+        """
+    )
+    st.write("---")
+
+    # ---------- SIDEBAR CONTROLS ----------
+    selected_industries = st.sidebar.multiselect(
+        "Select Industries:", options=list(industry_map.keys()), default=list(industry_map.keys())
+    )
+    selected_disasters, events = select_events(default=disaster_events)
+
+    alignments = st.sidebar.multiselect(
+        "T=0 alignments:", list(ALIGNMENT_OPTIONS), default=list(ALIGNMENT_OPTIONS)
+    )
+    pre = st.sidebar.multiselect(
+        "Days before T:", [d for d in WINDOW_CHOICES if d <= MAX_EVENT_WINDOW],
+        default=list(DEFAULT_PRE),
+    )
+    post = st.sidebar.multiselect(
+        "Days after T:", [d for d in WINDOW_CHOICES if d <= MAX_EVENT_WINDOW],
+        default=list(DEFAULT_POST),
+    )
+    benchmarks = st.sidebar.multiselect(
+        "Benchmarks:", list(SWEEP_BENCHMARKS), default=list(SWEEP_BENCHMARKS),
+        format_func=SWEEP_BENCHMARKS.get,
+    )
+    models = st.sidebar.multiselect(
+        "Abnormal return models:", list(MODEL_OPTIONS), default=list(MODEL_OPTIONS)
+    )
+
+    windows_text = st.sidebar.text_input(
+        "Interval windows:",
+        value=format_windows(INTERVAL_WINDOWS),
+        help="Any number of first:last event days separated by ';', e.g. -1:1; -10:20.",
+    )
+    try:
+        windows = parse_windows(windows_text) or INTERVAL_WINDOWS
+    except ValueError as exc:
+        st.sidebar.error(f"{exc}. Using the default windows.")
+        windows = INTERVAL_WINDOWS
+
+    n_resamples = int(
+        st.sidebar.number_input(
+            "Bootstrap resamples:", min_value=0, max_value=20_000,
+            value=DEFAULT_SWEEP_RESAMPLES, step=500, help="0 skips the bootstrap p-values.",
+        )
+    )
+
+    configs = sweep_grid(
+        [ALIGNMENT_OPTIONS[a] for a in alignments], pre, post, benchmarks,
+        [MODEL_OPTIONS[m] for m in models],
+    )
+    st.sidebar.write(f"**{len(configs)}** configuration(s).")
+
+    if not (selected_industries and selected_disasters and configs):
+        st.info("Select at least one industry, event and value of every parameter.")
+        return
+
+    if st.sidebar.button("Run Sweep"):
+        st.session_state["sensitivity_active"] = True
+    if not st.session_state.get("sensitivity_active"):
+        return
+
+    tickers = [industry_map[name] for name in selected_industries]
+    recorder = PerfRecorder(
+        "sensitivity", configs=len(configs), events=len(selected_disasters),
+        tickers=len(tickers), windows=len(windows), resamples=n_resamples,
+    )
+    with recorder.activate():
+        with st.spinner(f"Sweeping {len(configs)} configuration(s)..."):
+            with perf.span("sweep", configs=len(configs)) as fields:
+                frame = _session_sweep(
+                    selected_disasters, tickers, configs, events, windows, n_resamples
+                )
+                fields["rows"] = len(frame)
+    if PERF_LOG_PATH:
+        recorder.write_jsonl(PERF_LOG_PATH)
+
+    if frame.empty:
+        st.error("No configuration has usable events. Try different selections.")
+        return
+    st.caption(
+        f"{len(configs)} configuration(s) × {len(tickers)} industr(ies) in "
+        f"{recorder.total_seconds:.2f}s."
+    )
+
+    measure = st.selectbox(
+        "Measure:", [WHOLE_WINDOW, *windows],
+        help=f"'{WHOLE_WINDOW}' is the CAAR on the last day of each configuration's window; "
+             "the others are average CAR inside an interval window.",
+    )
+    shown = frame[frame["Measure"] == measure].drop(columns="Measure")
+    configurations = [c for c in frame["Configuration"].cat.categories
+                      if c in set(shown["Configuration"])]
+
+    st.altair_chart(
+        _heatmaps(shown, configurations, selected_industries), use_container_width=True
+    )
+
+    with st.expander("Sweep results"):
+        st.dataframe(shown.round(4), use_container_width=True, hide_index=True)
+    st.download_button(
+        "Download sweep CSV",
+        frame.to_csv(index=False),
+        file_name="sensitivity_sweep.csv",
+        mime="text/csv",
+    )
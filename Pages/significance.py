@@ -0,0 +1,143 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# --------------------------------------------------------------
+# RESAMPLING SIGNIFICANCE TESTS FOR CAAR
+# --------------------------------------------------------------
+# Both tests work on the CAR tensor (events, t, tickers) and express every
+# resample as a row of draw counts, so a whole chunk of resampled CAARs is a
+# single matrix product:
+#     counts (resamples, events) @ car (events, t * tickers)
+# Chunks are independent and are spread over a process pool.
+
+DEFAULT_RESAMPLES = 10_000
+CHUNK_SIZE = 1_000
+
+# Below this many (resamples x events) a process pool costs more than it saves
+PARALLEL_MIN_WORK = 2_000_000
+
+
+def _resample_chunk(car_flat, finite_flat, n_draws, n_resamples, seed):
+    """
+    One chunk of resampled mean CARs. Each resample draws `n_draws` rows of
+    `car_flat` with replacement.
+    Returns (n_resamples, t * tickers).
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = car_flat.shape[0]
+    counts = rng.multinomial(n_draws, np.full(n_rows, 1.0 / n_rows), size=n_resamples)
+    counts = counts.astype(float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (counts @ car_flat) / (counts @ finite_flat)
+
+
+def resample_mean_car(car, n_draws, n_resamples=DEFAULT_RESAMPLES, seed=None, workers=None):
+    """
+    Resampled CAARs: each is the mean of `n_draws` rows of `car` drawn with
+    replacement. NaNs (e.g. tickers without a market-model fit) are ignored.
+
+    car: (rows, t, tickers)
+    Returns (n_resamples, t, tickers), float32.
+    """
+    car = np.asarray(car, dtype=float)
+    n_rows, n_t, n_tickers = car.shape
+    finite = np.isfinite(car).reshape(n_rows, -1).astype(float)
+    car_flat = np.where(np.isfinite(car), car, 0.0).reshape(n_rows, -1)
+
+    sizes = [CHUNK_SIZE] * (n_resamples // CHUNK_SIZE)
+    if n_resamples % CHUNK_SIZE:
+        sizes.append(n_resamples % CHUNK_SIZE)
+    # Seeds depend only on `seed` and the chunk layout, never on `workers`
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    args = [(car_flat, finite, n_draws, size, s) for size, s in zip(sizes, seeds)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(sizes) > 1 and n_resamples * n_rows >= PARALLEL_MIN_WORK:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes))) as pool:
+            chunks = list(pool.map(_resample_chunk, *zip(*args)))
+    else:
+        chunks = [_resample_chunk(*a) for a in args]
+
+    samples = np.concatenate(chunks, axis=0).astype(np.float32)
+    return samples.reshape(n_resamples, n_t, n_tickers)
+
+
+def bootstrap_caar(car, n_resamples=DEFAULT_RESAMPLES, seed=None, workers=None):
+    """
+    Bootstrap of events: resample the observed events with replacement.
+    """
+    return resample_mean_car(car, len(car), n_resamples, seed, workers)
+
+
+def placebo_caar(placebo_car, n_events, n_resamples=DEFAULT_RESAMPLES, seed=None, workers=None):
+    """
+    Placebo (permutation) null: each resample averages `n_events` CARs drawn
+    from event windows centred on non-event days.
+    """
+    return resample_mean_car(placebo_car, n_events, n_resamples, seed, workers)
+
+
+def placebo_candidates(n_dates, event_idx, pre, post, lead=None, exclusion=None):
+    """
+    Rows of the price matrix usable as placebo T=0: the full window (and
+    `lead` days before it) must fit, and the day must be more than
+    `exclusion` rows away from every real event.
+    """
+    lead = pre if lead is None else lead
+    exclusion = max(pre, post) if exclusion is None else exclusion
+
+    rows = np.arange(lead, n_dates - post)
+    event_idx = np.asarray(event_idx)
+    event_idx = np.sort(event_idx[event_idx >= 0])
+    if len(event_idx) == 0:
+        return rows
+
+    # Distance to the closest real event via one searchsorted
+    pos = np.searchsorted(event_idx, rows)
+    left = event_idx[np.clip(pos - 1, 0, len(event_idx) - 1)]
+    right = event_idx[np.clip(pos, 0, len(event_idx) - 1)]
+    distance = np.minimum(np.abs(rows - left), np.abs(right - rows))
+    return rows[distance > exclusion]
+
+
+def confidence_band(samples, level=0.95):
+    """
+    Percentile band over the resample axis.
+    Returns (lower, upper), each shaped like one resample.
+    """
+    tail = (1.0 - level) / 2 * 100
+    lower, upper = np.nanpercentile(samples, [tail, 100 - tail], axis=0)
+    return lower, upper
+
+
+def bootstrap_p_values(samples):
+    """
+    Two-sided bootstrap p-value for "mean is zero": twice the share of
+    resamples on the far side of zero. NaN resamples are left out; where
+    none is finite (e.g. a ticker without a market-model fit) p is NaN.
+    """
+    samples = np.asarray(samples, dtype=float)
+    finite = np.isfinite(samples)
+    n = finite.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        below = np.sum(finite & (samples <= 0), axis=0) / n
+        above = np.sum(finite & (samples >= 0), axis=0) / n
+    return np.where(n > 0, np.minimum(1.0, 2 * np.minimum(below, above)), np.nan)
+
+
+def placebo_p_values(observed, null_samples):
+    """
+    Two-sided permutation p-value: share of placebo statistics at least as
+    extreme as the observed one (with the usual +1 correction). NaN where
+    the observed value or every placebo statistic is not finite.
+    """
+    observed = np.asarray(observed, dtype=float)
+    null_samples = np.asarray(null_samples, dtype=float)
+    finite = np.isfinite(null_samples)
+    n = finite.sum(axis=0)
+    extreme = np.sum(finite & (np.abs(null_samples) >= np.abs(observed)), axis=0)
+    return np.where((n > 0) & np.isfinite(observed), (extreme + 1) / (n + 1), np.nan)
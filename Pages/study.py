@@ -0,0 +1,597 @@
+import datetime as dt
+import warnings
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from Pages import perf
+from Pages.car_engine import compute_car_tensor, estimation_window
+from Pages.cube_store import get_car_cube
+from Pages.intervals import DEFAULT_WINDOWS, interval_means, interval_sums, make_windows
+from Pages.price_store import get_price_store
+from Pages.result_cache import get_result_cache
+from Pages.significance import (
+    DEFAULT_RESAMPLES,
+    bootstrap_caar,
+    bootstrap_p_values,
+    confidence_band,
+    placebo_caar,
+    placebo_candidates,
+    placebo_p_values,
+)
+from Pages.trading_calendar import TradingCalendar, get_trading_calendar
+
+# --------------------------------------------------------------
+# HEADLESS EVENT STUDY (no Streamlit)
+# --------------------------------------------------------------
+# Everything the dashboard computes lives here so it can be imported by the
+# batch CLI, worker processes and profilers without a browser session.
+
+# --------------------------------------------------------------
+# NATURAL DISASTERS + DATES
+# --------------------------------------------------------------
+disaster_events = {
+    # Hurricanes
+    "Hurricane Ida (Aug 29, 2021)": "2021-08-29",
+    "Hurricane Harvey (Aug 25, 2017)": "2017-08-25",
+    "Hurricane Irma (Sep 10, 2017)": "2017-09-10",
+    # Winter Storms
+    "Texas Winter Storm (Feb 13, 2021)": "2021-02-13",
+    "Winter Storm Elliott (Dec 21, 2022)": "2022-12-21",
+    "Winter Storm Jonas (Jan 22, 2016)": "2016-01-22",
+    # Wildfires
+    "California Wildfires Start (Aug 14, 2020)": "2020-08-14",
+    "Camp Fire California (Nov 8, 2018)": "2018-11-08",
+    "Dixie Fire California (Jul 13, 2021)": "2021-07-13",
+    # Floods
+    "Louisiana Flooding (Aug 12, 2016)": "2016-08-12",
+    "Midwest Flooding (Mar 14, 2019)": "2019-03-14",
+    "Houston Flooding (May 7, 2019)": "2019-05-07",
+}
+
+# Disaster category of each curated event (same groups as the catalog)
+disaster_categories = {
+    "Hurricane Ida (Aug 29, 2021)": "Hurricane",
+    "Hurricane Harvey (Aug 25, 2017)": "Hurricane",
+    "Hurricane Irma (Sep 10, 2017)": "Hurricane",
+    "Texas Winter Storm (Feb 13, 2021)": "Winter Storm",
+    "Winter Storm Elliott (Dec 21, 2022)": "Winter Storm",
+    "Winter Storm Jonas (Jan 22, 2016)": "Winter Storm",
+    "California Wildfires Start (Aug 14, 2020)": "Wildfire",
+    "Camp Fire California (Nov 8, 2018)": "Wildfire",
+    "Dixie Fire California (Jul 13, 2021)": "Wildfire",
+    "Louisiana Flooding (Aug 12, 2016)": "Flood",
+    "Midwest Flooding (Mar 14, 2019)": "Flood",
+    "Houston Flooding (May 7, 2019)": "Flood",
+}
+
+# --------------------------------------------------------------
+# INDUSTRIES (ETF REPRESENTATIVES)
+# --------------------------------------------------------------
+industry_map = {
+    "Electric Utilities": "XLU",
+    "Multi-Utilities": "IDU",
+    "Renewable Energy (Solar)": "TAN",
+    "Water Utilities": "PHO",
+    "Oil & Gas": "XLE",
+}
+
+BENCHMARK = "SPY"
+FIXED_WINDOW = 20  # default event window: T-20 to T+20
+T_VALUES = list(range(-FIXED_WINDOW, FIXED_WINDOW + 1))  # [-20, ..., +20]
+
+# Longest pre / post event window accepted from the dashboard and CLI
+MAX_EVENT_WINDOW = 250
+
+# Default interval summary windows, {label: (first t, last t)} inclusive;
+# users can replace them with any windows (see Pages/intervals.py)
+INTERVAL_WINDOWS = make_windows(DEFAULT_WINDOWS)  # T-5 → T, T → T+3, T → T+10
+
+# Placebo events are drawn from non-event days in this much history
+PLACEBO_HISTORY_DAYS = 365
+MAX_PLACEBO_EVENTS = 1000
+
+StudyResult = namedtuple(
+    "StudyResult",
+    [
+        "tickers",       # tickers in the last axis of every array
+        "kept",          # usable event labels, in cube order
+        "skipped",       # event labels without usable price data
+        "car_cube",      # (kept events, t, tickers) CAR in percent
+        "caar",          # DataFrame: index = t, columns = tickers
+        "significance",  # dict from significance(), or None
+        "truncated",     # event labels whose window runs off the calendar
+        "failed",        # event labels whose download kept failing (retry later)
+        "t_values",      # event time of the car_cube / caar rows
+    ],
+    defaults=((), (), T_VALUES),
+)
+
+
+def event_t_values(pre=FIXED_WINDOW, post=FIXED_WINDOW):
+    """
+    Event time of a [T-pre, T+post] window: [-pre, ..., post].
+    """
+    return list(range(-pre, post + 1))
+
+
+def lead_days(model, pre=FIXED_WINDOW):
+    """
+    Trading days needed before T=0: the event window, or the estimation
+    window (which starts before it) when the market model is used.
+    """
+    if model == "market_model":
+        return -estimation_window(pre)[0]
+    return pre
+
+
+def event_ranges(event_labels, model="market", events=None, alignment="nearest",
+                 pre=FIXED_WINDOW, post=FIXED_WINDOW):
+    """
+    Download range for every event, read off the trading calendar: exactly
+    the lead (window or market-model estimation period) before T=0 and
+    `post` trading days after it, plus a few days of slack.
+    Returns:
+      (starts, ends, truncated) arrays in the order of `event_labels`;
+      truncated events would not have a full window and are not fetched.
+    """
+    events = disaster_events if events is None else events
+    calendar = get_trading_calendar(get_price_store(), BENCHMARK)
+    event_dates = pd.to_datetime([events[label] for label in event_labels])
+    return calendar.fetch_ranges(event_dates, lead_days(model, pre), post, alignment)
+
+
+def load_event_prices(event_labels, tickers, model="market", events=None,
+                      alignment="nearest", pre=FIXED_WINDOW, post=FIXED_WINDOW):
+    """
+    One price frame covering every selected event. Event ranges are merged
+    into contiguous spans so each distinct time period is fetched once for
+    the union of tickers. The market model reuses the same frame, just with
+    a longer lead before each event. Days already in the price store are not
+    downloaded again, so widening the window only fetches the extra days.
+    The benchmark is always included, since every CAR is measured against it.
+    """
+    starts, ends, truncated = event_ranges(event_labels, model, events, alignment, pre, post)
+    ranges = [(s, e) for s, e, cut in zip(starts, ends, truncated) if not cut]
+    columns = list(dict.fromkeys([*tickers, BENCHMARK]))
+    return get_price_store().get_close_many(columns, ranges)
+
+
+def align_event_index(event_labels, dates, model="market", events=None,
+                      alignment="nearest", pre=FIXED_WINDOW, post=FIXED_WINDOW):
+    """
+    Row of T=0 in `dates` (the trading days of a shared price frame) for
+    every event, with one searchsorted. Events whose window (and estimation
+    period) is not complete inside their own download range get -1.
+    """
+    events = disaster_events if events is None else events
+    event_dates = pd.to_datetime([events[label] for label in event_labels])
+    calendar = TradingCalendar(dates)
+    event_index = calendar.align(event_dates, alignment)
+
+    # Require the full window inside the event's own download range
+    starts, ends, _ = event_ranges(event_labels, model, events, alignment, pre, post)
+    first, last, truncated = calendar.windows(event_index, lead_days(model, pre), post)
+    in_range = ~truncated & (first >= starts) & (last <= ends)
+    return np.where(in_range, event_index, -1)
+
+
+def fetch_event_cars(event_labels, tickers, prices, model="market", events=None,
+                     alignment="nearest", pre=FIXED_WINDOW, post=FIXED_WINDOW):
+    """
+    For every event at once:
+      - align T=0 to the trading days in the shared `prices` frame with one
+        searchsorted (nearest, next or previous trading day)
+      - gather T-pre..T+post windows into one (events, t, tickers) array
+      - compute CAR for each ticker vs benchmark, either market-adjusted or
+        with a market model fit over the estimation window
+    Events whose window (and estimation period) is incomplete inside their
+    own download range are marked invalid.
+    Returns:
+      (CarTensor, kept event labels, skipped event labels)
+    """
+    columns = list(dict.fromkeys([*tickers, BENCHMARK]))
+    close_prices = prices.reindex(columns=columns).dropna(how="all")
+    if close_prices.empty or not len(event_labels):
+        return None, [], list(event_labels)
+
+    event_index = align_event_index(
+        event_labels, close_prices.index, model, events, alignment, pre, post
+    )
+    tensor = compute_car_tensor(
+        close_prices.to_numpy(),
+        event_index,
+        ticker_cols=[columns.index(t) for t in tickers],
+        bench_col=columns.index(BENCHMARK),
+        pre=pre,
+        post=post,
+        model=model,
+    )
+
+    kept = [label for label, ok in zip(event_labels, tensor.valid) if ok]
+    skipped = [label for label, ok in zip(event_labels, tensor.valid) if not ok]
+    return tensor, kept, skipped
+
+
+def fetch_event_car(event_label, tickers, prices=None, model="market", events=None,
+                    alignment="nearest", pre=FIXED_WINDOW, post=FIXED_WINDOW):
+    """
+    Single-event CAR.
+    Returns:
+      DataFrame with index = t (-pre..+post), columns = tickers
+      or None if data is unusable.
+    """
+    if prices is None:
+        prices = load_event_prices([event_label], tickers, model, events, alignment, pre, post)
+
+    tensor, kept, _ = fetch_event_cars(
+        [event_label], tickers, prices, model, events, alignment, pre, post
+    )
+    if not kept:
+        return None
+    return pd.DataFrame(tensor.car[0], index=event_t_values(pre, post), columns=tickers)
+
+
+def placebo_car(tickers, model, n_placebo=MAX_PLACEBO_EVENTS, seed=0, events=None,
+                pre=FIXED_WINDOW, post=FIXED_WINDOW):
+    """
+    CAR tensor for placebo events: T=0 drawn from trading days that are not
+    near any catalogued disaster, over the history spanned by the catalog.
+    Returns:
+      (placebo events, pre + post + 1, tickers) array
+    """
+    events = disaster_events if events is None else events
+    columns = list(dict.fromkeys([*tickers, BENCHMARK]))
+    all_dates = pd.to_datetime(list(events.values()))
+    start_dt = all_dates.min() - dt.timedelta(
+        days=PLACEBO_HISTORY_DAYS + lead_days(model, pre) * 2
+    )
+    end_dt = all_dates.max() + dt.timedelta(days=post * 2)
+
+    close_prices = get_price_store().get_close(columns, start_dt, end_dt)
+    close_prices = close_prices.dropna(how="all")
+    if close_prices.empty:
+        return np.empty((0, pre + post + 1, len(tickers)))
+
+    real_index = TradingCalendar(close_prices.index).align(all_dates, "nearest")
+    candidates = placebo_candidates(
+        len(close_prices), real_index, pre, post, lead=lead_days(model, pre)
+    )
+    rng = np.random.default_rng(seed)
+    drawn = rng.choice(candidates, size=min(n_placebo, len(candidates)), replace=False)
+
+    tensor = compute_car_tensor(
+        close_prices.to_numpy(),
+        np.sort(drawn),
+        ticker_cols=[columns.index(t) for t in tickers],
+        bench_col=columns.index(BENCHMARK),
+        pre=pre,
+        post=post,
+        model=model,
+    )
+    return tensor.car[tensor.valid]
+
+
+def significance(car_cube, tickers, model, n_resamples=DEFAULT_RESAMPLES, events=None,
+                 windows=None, pre=FIXED_WINDOW, post=FIXED_WINDOW):
+    """
+    Bootstrap band for the CAAR curve plus bootstrap and placebo p-values
+    for each interval window (INTERVAL_WINDOWS unless given). `car_cube`
+    covers the event window [T-pre, T+post].
+    Returns:
+      dict with "lower"/"upper" (t, tickers) and
+      "bootstrap_p"/"placebo_p" (windows, tickers)
+    """
+    windows = INTERVAL_WINDOWS if windows is None else windows
+    t_values = event_t_values(pre, post)
+    boot = bootstrap_caar(car_cube, n_resamples, seed=0)
+    lower, upper = confidence_band(boot)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        observed = interval_means(np.nanmean(car_cube, axis=0), t_values, windows)
+    result = {
+        "lower": lower,
+        "upper": upper,
+        "bootstrap_p": bootstrap_p_values(interval_means(boot, t_values, windows)),
+        "placebo_p": np.full(observed.shape, np.nan),
+    }
+
+    placebo = placebo_car(tickers, model, events=events, pre=pre, post=post)
+    if len(placebo):
+        null = placebo_caar(placebo, len(car_cube), n_resamples, seed=1)
+        result["placebo_p"] = placebo_p_values(
+            observed, interval_means(null, t_values, windows)
+        )
+    return result
+
+
+def _transient_labels(event_labels, starts, ends, tickers, failures):
+    """
+    Events whose range overlaps a download that kept failing for one of
+    `tickers` (or the benchmark).
+    """
+    wanted = {*tickers, BENCHMARK}
+    failed = [
+        f for f in failures
+        if f.status == "transient" and wanted & set(f.tickers)
+    ]
+    out = set()
+    for label, start, end in zip(event_labels, starts, ends):
+        start, end = pd.Timestamp(start).date(), pd.Timestamp(end).date()
+        if any(f.start <= end and start <= f.end for f in failed):
+            out.add(label)
+    return out
+
+
+def cached_event_cars(event_labels, tickers, model="market", events=None,
+                      alignment="nearest", pre=FIXED_WINDOW, post=FIXED_WINDOW):
+    """
+    Per-event CAR through the process-wide result cache.
+
+    Entries are keyed per (event, date, ticker, model, alignment, window,
+    benchmark); only missing keys are computed, in one bulk load, and
+    concurrent sessions asking for the same keys share one computation.
+    Events whose download kept failing are reported separately and not
+    cached, so the next run retries them. Events found in a precomputed
+    cube (see Pages/cube_store.py) whose window contains [T-pre, T+post]
+    are sliced out of the mapped file instead.
+    Returns:
+      ({event label: (pre + post + 1, tickers) CAR array, or None when
+        unusable},
+       list of event labels that failed transiently)
+    """
+    events = disaster_events if events is None else events
+    config = (model, alignment, (pre, post), BENCHMARK)
+    n_t = pre + post + 1
+    transient = set()
+
+    car_by_event = {}
+    cube = get_car_cube(model, alignment)
+    if (cube is not None and cube.covers(model, alignment, pre, post, BENCHMARK)
+            and cube.has_tickers(tickers)):
+        with perf.span("cube_read") as fields:
+            rows, cols = cube.select(event_labels, tickers=tickers, events=events)
+            subset = cube.car_subset(rows, cols, pre, post)
+            fields["events"] = len(rows)
+        for i, row in enumerate(rows):
+            car_by_event[cube.events[row]] = subset[i]
+        event_labels = [label for label in event_labels if label not in car_by_event]
+        perf.count("cube.events", len(rows))
+
+    def compute(missing):
+        perf.count("result_cache.computed", len(missing))
+        labels = list(dict.fromkeys(key[0] for key in missing))
+        need = list(dict.fromkeys(key[2] for key in missing))
+        starts, ends, cut = event_ranges(labels, model, events, alignment, pre, post)
+        ranges = [(s, e) for s, e, c in zip(starts, ends, cut) if not c]
+        with perf.span("load_prices", events=len(labels), tickers=len(need)) as fields:
+            prices, failures = get_price_store().fetch_many([*need, BENCHMARK], ranges)
+            fields["rows"] = len(prices)
+        with perf.span("car_engine", events=len(labels), tickers=len(need)):
+            tensor, _, _ = fetch_event_cars(
+                labels, need, prices, model, events, alignment, pre, post
+            )
+
+        out = {}
+        for key in missing:
+            i, j = labels.index(key[0]), need.index(key[2])
+            usable = tensor is not None and tensor.valid[i]
+            out[key] = tensor.car[i, :, j].copy() if usable else None
+
+        # Unusable because a download failed, not because data is missing:
+        # leave those keys out so nothing is cached for them
+        failed = _transient_labels(labels, starts, ends, need, failures)
+        for key in missing:
+            if key[0] in failed and out[key] is None:
+                del out[key]
+                transient.add(key[0])
+        return out
+
+    keys = {
+        (label, ticker): (label, str(events[label]), ticker) + config
+        for label in event_labels
+        for ticker in tickers
+    }
+    perf.count("result_cache.keys", len(keys))
+    values = get_result_cache().get_many(list(keys.values()), compute)
+
+    for label in event_labels:
+        columns = [values[keys[(label, ticker)]] for ticker in tickers]
+        if all(c is None for c in columns):
+            car_by_event[label] = None
+            continue
+        car_by_event[label] = np.column_stack(
+            [np.full(n_t, np.nan) if c is None else c for c in columns]
+        )
+    failed = [label for label in event_labels if label in transient and car_by_event[label] is None]
+    return car_by_event, failed
+
+
+def split_truncated(event_labels, model="market", events=None, alignment="nearest",
+                    pre=FIXED_WINDOW, post=FIXED_WINDOW):
+    """
+    Separate events whose window runs off the trading calendar; those are
+    reported instead of fetched.
+    Returns:
+      (usable labels, truncated labels)
+    """
+    _, _, cut = event_ranges(event_labels, model, events, alignment, pre, post)
+    usable = [label for label, c in zip(event_labels, cut) if not c]
+    truncated = [label for label, c in zip(event_labels, cut) if c]
+    return usable, truncated
+
+
+def assemble_study(event_labels, tickers, car_by_event, truncated=(), failed=(),
+                   pre=FIXED_WINDOW, post=FIXED_WINDOW):
+    """
+    StudyResult (without significance) from per-event CAR arrays over
+    [T-pre, T+post]. Events in `failed` are reported as download failures
+    rather than skipped.
+    """
+    t_values = event_t_values(pre, post)
+    failed = [label for label in event_labels if label in set(failed)]
+    kept = [label for label in event_labels if car_by_event.get(label) is not None]
+    skipped = [
+        label for label in event_labels
+        if car_by_event.get(label) is None and label not in failed
+    ]
+
+    if not kept:
+        empty = np.empty((0, len(t_values), len(tickers)))
+        return StudyResult(
+            tickers, [], skipped, empty, None, None, list(truncated), failed, t_values
+        )
+
+    car_cube = np.stack([car_by_event[label] for label in kept])
+    with warnings.catch_warnings():
+        # a ticker without a market-model fit in every event stays NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        caar = pd.DataFrame(np.nanmean(car_cube, axis=0), index=t_values, columns=tickers)
+
+    return StudyResult(
+        tickers, kept, skipped, car_cube, caar, None, list(truncated), failed, t_values
+    )
+
+
+def run_event_study(event_labels, tickers, model="market", with_significance=False,
+                    n_resamples=DEFAULT_RESAMPLES, events=None, alignment="nearest",
+                    windows=None, pre=FIXED_WINDOW, post=FIXED_WINDOW):
+    """
+    Full pipeline for one selection: truncation check on the trading
+    calendar, per-event CAR over [T-pre, T+post] (cached, bulk-loaded when
+    missing), CAAR and (optionally) significance tests over the interval
+    `windows`.
+    """
+    tickers = list(tickers)
+    event_labels, truncated = split_truncated(event_labels, model, events, alignment, pre, post)
+    car_by_event, failed = cached_event_cars(
+        event_labels, tickers, model, events, alignment, pre, post
+    )
+    result = assemble_study(event_labels, tickers, car_by_event, truncated, failed, pre, post)
+
+    if with_significance and result.kept:
+        stats = significance(
+            result.car_cube, tickers, model, n_resamples, events, windows, pre, post
+        )
+        result = result._replace(significance=stats)
+    return result
+
+
+# --------------------------------------------------------------
+# LONG FORMAT + SUMMARIES (chart / file payloads)
+# --------------------------------------------------------------
+def caar_long_frame(caar_wide, ticker_to_industry=None):
+    """
+    CAAR (index = t, columns = tickers) as long rows: t, Ticker, CAR, Industry.
+    """
+    ticker_to_industry = ticker_to_industry or {v: k for k, v in industry_map.items()}
+    caar_long = (
+        caar_wide.reset_index()
+        .rename(columns={"index": "t"})
+        .melt("t", var_name="Ticker", value_name="CAR")
+    )
+    caar_long["Industry"] = caar_long["Ticker"].map(ticker_to_industry)
+    return caar_long
+
+
+def car_long_frame(car_cube, event_labels, tickers, ticker_to_industry=None, t_values=None):
+    """
+    Per-event CAR as long rows: t, Ticker, CAR, Industry, Event (event, then
+    ticker, then t order). Built in one reshape with categorical label
+    columns instead of one melt per event. `t_values` defaults to T_VALUES.
+    """
+    columns = ["t", "Ticker", "CAR", "Industry", "Event"]
+    if not len(event_labels):
+        return pd.DataFrame(columns=columns)
+
+    ticker_to_industry = ticker_to_industry or {v: k for k, v in industry_map.items()}
+    t_values = T_VALUES if t_values is None else t_values
+    car_cube = np.asarray(car_cube)
+    n_events, n_t, n_tickers = car_cube.shape
+    ticker_col = pd.Categorical.from_codes(
+        np.tile(np.repeat(np.arange(n_tickers), n_t), n_events), categories=pd.Index(tickers)
+    )
+    return pd.DataFrame(
+        {
+            "t": np.tile(np.asarray(t_values), n_events * n_tickers),
+            "Ticker": ticker_col,
+            "CAR": car_cube.transpose(0, 2, 1).ravel(),
+            "Industry": ticker_col.map(ticker_to_industry),
+            "Event": pd.Categorical.from_codes(
+                np.repeat(np.arange(n_events), n_tickers * n_t),
+                categories=pd.Index(event_labels),
+            ),
+        },
+        columns=columns,
+    )
+
+
+def interval_summary(caar_wide, stats=None, windows=None):
+    """
+    Average CAR inside each interval window for every ticker, from one
+    prefix-sum pass over the CAAR. Windows reaching past the event window
+    are left out.
+    Returns long rows: Ticker, Period, Average CAR (%), Bootstrap p, Placebo p.
+    """
+    windows = INTERVAL_WINDOWS if windows is None else windows
+    columns = ["Ticker", "Period", "Average CAR (%)", "Bootstrap p", "Placebo p"]
+    if not windows:
+        return pd.DataFrame(columns=columns)
+
+    _, counts, means = interval_sums(caar_wide.to_numpy(), list(caar_wide.index), windows)
+    n_windows, n_tickers = means.shape
+    boot_p = placebo_p = np.full(means.shape, np.nan)
+    if stats is not None:
+        boot_p, placebo_p = stats["bootstrap_p"], stats["placebo_p"]
+
+    # ticker-major, window order inside each ticker
+    frame = pd.DataFrame(
+        {
+            "Ticker": np.repeat(np.asarray(caar_wide.columns, dtype=object), n_windows),
+            "Period": np.tile(np.asarray(list(windows), dtype=object), n_tickers),
+            "Average CAR (%)": means.T.ravel(),
+            "Bootstrap p": boot_p.T.ravel(),
+            "Placebo p": placebo_p.T.ravel(),
+        },
+        columns=columns,
+    )
+    return frame[counts.T.ravel() > 0].reset_index(drop=True)
+
+
+def event_interval_frame(car_cube, event_labels, tickers, windows=None,
+                         ticker_to_industry=None, t_values=None):
+    """
+    Sum and average CAR inside every window for every event and ticker, all
+    from one cumulative sum over the CAR cube (rows at `t_values`, T_VALUES
+    by default).
+    Returns long rows: Event, Ticker, Industry, Period, Start, End,
+    Sum CAR (%), Average CAR (%).
+    """
+    windows = INTERVAL_WINDOWS if windows is None else windows
+    t_values = T_VALUES if t_values is None else t_values
+    ticker_to_industry = ticker_to_industry or {v: k for k, v in industry_map.items()}
+    sums, counts, means = interval_sums(car_cube, t_values, windows)  # (events, windows, tickers)
+
+    n_events, n_windows, n_tickers = means.shape
+    bounds = np.array(list(windows.values()), dtype=np.int64).reshape(-1, 2)
+    # Label columns as categoricals built from codes: no per-row strings
+    event_codes = np.repeat(np.arange(n_events), n_windows * n_tickers)
+    window_codes = np.tile(np.repeat(np.arange(n_windows), n_tickers), n_events)
+    ticker_codes = np.tile(np.arange(n_tickers), n_events * n_windows)
+    ticker_col = pd.Categorical.from_codes(ticker_codes, categories=pd.Index(tickers))
+
+    frame = pd.DataFrame(
+        {
+            "Event": pd.Categorical.from_codes(event_codes, categories=pd.Index(event_labels)),
+            "Ticker": ticker_col,
+            "Industry": ticker_col.map(ticker_to_industry),
+            "Period": pd.Categorical.from_codes(window_codes, categories=pd.Index(list(windows))),
+            "Start": bounds[window_codes, 0],
+            "End": bounds[window_codes, 1],
+            "Sum CAR (%)": sums.ravel(),
+            "Average CAR (%)": means.ravel(),
+        }
+    )
+    return frame[counts.ravel() > 0].reset_index(drop=True)
@@ -0,0 +1,22 @@
+import streamlit as st
+
+# Tighter top padding and no Streamlit top bar, on every page
+PAGE_CSS = """
+    <style>
+        .block-container {
+            padding-top: 0rem !important;
+            padding-bottom: 6rem !important;
+        }
+        header {visibility: hidden;}
+    </style>
+"""
+
+
+def inject_styles():
+    """
+    Tighten top padding and hide the default header. Called once per
+    script run (by app.py), never at import time: a module is imported once
+    per process, so CSS injected on import would be missing on every later
+    rerun and session.
+    """
+    st.markdown(PAGE_CSS, unsafe_allow_html=True)
@@ -0,0 +1,338 @@
+import argparse
+import itertools
+import os
+import tempfile
+import warnings
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from Pages import perf
+from Pages.car_engine import ABNORMAL_MODELS, compute_car_tensor
+from Pages.intervals import interval_means, make_windows, parse_window
+from Pages.price_store import get_price_store
+from Pages.significance import bootstrap_caar, bootstrap_p_values
+from Pages.study import (
+    BENCHMARK,
+    INTERVAL_WINDOWS,
+    align_event_index,
+    disaster_events,
+    event_ranges,
+    event_t_values,
+    industry_map,
+    lead_days,
+)
+from Pages.trading_calendar import ALIGNMENT_POLICIES
+
+# --------------------------------------------------------------
+# PARAMETER SENSITIVITY SWEEP
+# --------------------------------------------------------------
+# Every combination of T=0 alignment x event window x benchmark x
+# abnormal-return model is evaluated over every event and industry:
+#   - prices for all tickers and benchmarks are loaded once, covering the
+#     widest window of every configuration
+#   - T=0 rows are aligned once per (alignment, lead, post), with the same
+#     rules as the dashboard, so each configuration keeps exactly the
+#     events a single run of it would keep
+#   - configurations are spread over a process pool; workers map the one
+#     price matrix from a temporary .npy instead of receiving a copy
+# Each configuration reports, per ticker, the CAAR over the whole window
+# and the average CAR inside each interval window, with a cross-sectional
+# t-stat and a bootstrap p-value.
+#
+# Usage:
+#   python -m Pages.sweep --out sweep.csv
+#   python -m Pages.sweep --pre 5,10,20,60 --post 5,10,20,60,120 --resamples 2000
+
+# Benchmarks offered for the sweep: S&P 500, total market, equal-weight S&P 500
+SWEEP_BENCHMARKS = {
+    "SPY": "S&P 500 (SPY)",
+    "VTI": "Total market (VTI)",
+    "RSP": "Equal-weight S&P 500 (RSP)",
+}
+DEFAULT_PRE = (5, 10, 20)
+DEFAULT_POST = (5, 10, 20, 40)
+DEFAULT_SWEEP_RESAMPLES = 1_000
+
+# Measure name of the CAAR at the last day of each configuration's window
+WHOLE_WINDOW = "Whole window"
+
+# Below this many (configurations x events) a process pool costs more than
+# it saves
+PARALLEL_MIN_WORK = 20_000
+
+SweepConfig = namedtuple("SweepConfig", ["alignment", "pre", "post", "benchmark", "model"])
+
+
+def sweep_grid(alignments=ALIGNMENT_POLICIES, pre=DEFAULT_PRE, post=DEFAULT_POST,
+               benchmarks=tuple(SWEEP_BENCHMARKS), models=ABNORMAL_MODELS):
+    """
+    Every combination of the given choices, as SweepConfigs.
+    """
+    return [
+        SweepConfig(alignment, int(p), int(q), benchmark, model)
+        for model, benchmark, p, q, alignment in itertools.product(
+            models, benchmarks, pre, post, alignments
+        )
+    ]
+
+
+def config_label(config):
+    return (
+        f"{config.model} | {config.benchmark} | T-{config.pre}..T+{config.post} | "
+        f"{config.alignment}"
+    )
+
+
+# --------------------------------------------------------------
+# WORKERS
+# --------------------------------------------------------------
+_worker_matrix = None
+
+
+def _init_worker(path):
+    global _worker_matrix
+    _worker_matrix = np.load(path, mmap_mode="r")
+
+
+def _config_stats(matrix, config, event_index, ticker_cols, bench_col, windows, n_resamples):
+    """
+    Statistics of one configuration.
+    Returns dict of (measures, tickers) arrays: events, caar, t_stat,
+    bootstrap_p (measure 0 is the whole window, then `windows`).
+    """
+    tensor = compute_car_tensor(
+        matrix, event_index, ticker_cols, bench_col, config.pre, config.post, config.model
+    )
+    car = tensor.car[tensor.valid]
+    n_measures = len(windows) + 1
+    if not len(car):
+        empty = np.full((n_measures, len(ticker_cols)), np.nan)
+        return {"events": np.zeros(empty.shape, dtype=int), "caar": empty,
+                "t_stat": empty, "bootstrap_p": empty}
+
+    t_values = event_t_values(config.pre, config.post)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        values = np.concatenate(
+            [car[:, -1:, :], interval_means(car, t_values, windows)], axis=1
+        )  # (events, measures, tickers)
+        n = np.isfinite(values).sum(axis=0)
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0, ddof=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_stat = mean / (std / np.sqrt(n))
+
+    p = np.full(mean.shape, np.nan)
+    if n_resamples:
+        boot = bootstrap_caar(values, n_resamples, seed=0, workers=1)
+        p = bootstrap_p_values(boot)
+    p = np.where(n > 0, p, np.nan)
+    return {"events": n, "caar": mean, "t_stat": t_stat, "bootstrap_p": p}
+
+
+def _sweep_chunk(tasks, ticker_cols, bench_cols, windows, n_resamples, matrix=None):
+    """
+    One chunk of (config, event_index) tasks, against `matrix` or the
+    worker's mapped one.
+    """
+    matrix = _worker_matrix if matrix is None else matrix
+    return [
+        _config_stats(
+            matrix, config, event_index, ticker_cols, bench_cols[config.benchmark],
+            windows, n_resamples,
+        )
+        for config, event_index in tasks
+    ]
+
+
+# --------------------------------------------------------------
+# SWEEP
+# --------------------------------------------------------------
+def _shared_prices(event_labels, tickers, configs, events):
+    """
+    One price frame for every configuration: the union of each event's
+    download range over all (alignment, lead, post) combinations.
+    """
+    benchmarks = list(dict.fromkeys(c.benchmark for c in configs))
+    ranges = []
+    for alignment, model, pre, post in {(c.alignment, c.model, c.pre, c.post) for c in configs}:
+        starts, ends, cut = event_ranges(event_labels, model, events, alignment, pre, post)
+        ranges += [(s, e) for s, e, c in zip(starts, ends, cut) if not c]
+
+    columns = list(dict.fromkeys([*tickers, BENCHMARK, *benchmarks]))
+    if not ranges:
+        return pd.DataFrame(columns=columns), []
+    prices, failures = get_price_store().fetch_many(columns, ranges)
+    return prices.reindex(columns=columns).dropna(how="all"), failures
+
+
+def run_sweep(event_labels, tickers, configs, events=None, windows=None,
+              n_resamples=DEFAULT_SWEEP_RESAMPLES, workers=None):
+    """
+    Evaluate every configuration over every event x ticker.
+    Returns long rows: Configuration, Model, Benchmark, Pre, Post,
+    Alignment, Ticker, Industry, Measure, Events, CAAR (%), t-stat,
+    Bootstrap p.
+    """
+    events = disaster_events if events is None else events
+    windows = INTERVAL_WINDOWS if windows is None else windows
+    tickers = list(tickers)
+    event_labels = list(event_labels)
+    columns = ["Configuration", "Model", "Benchmark", "Pre", "Post", "Alignment", "Ticker",
+               "Industry", "Measure", "Events", "CAAR (%)", "t-stat", "Bootstrap p"]
+    if not (configs and tickers and event_labels):
+        return pd.DataFrame(columns=columns)
+
+    with perf.span("sweep_prices", events=len(event_labels)) as fields:
+        prices, _ = _shared_prices(event_labels, tickers, configs, events)
+        fields["rows"] = len(prices)
+    if prices.empty:
+        return pd.DataFrame(columns=columns)
+
+    # T=0 rows per (alignment, model lead, post), shared by the benchmarks
+    with perf.span("sweep_align", configs=len(configs)):
+        index_cache = {}
+        tasks = []
+        for config in configs:
+            key = (config.alignment, lead_days(config.model, config.pre), config.pre, config.post)
+            if key not in index_cache:
+                index_cache[key] = align_event_index(
+                    event_labels, prices.index, config.model, events, config.alignment,
+                    config.pre, config.post,
+                )
+            tasks.append((config, index_cache[key]))
+
+    names = list(prices.columns)
+    ticker_cols = [names.index(t) for t in tickers]
+    bench_cols = {c.benchmark: names.index(c.benchmark) for c in configs}
+    matrix = prices.to_numpy(float)
+
+    workers = workers or os.cpu_count() or 1
+    parallel = (
+        workers > 1 and len(configs) > 1
+        and len(configs) * len(event_labels) >= PARALLEL_MIN_WORK
+    )
+    with perf.span("sweep_configs", configs=len(configs), workers=workers if parallel else 1):
+        if parallel:
+            n_chunks = min(len(tasks), workers * 4)
+            chunks = [tasks[i::n_chunks] for i in range(n_chunks)]
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "prices.npy")
+                np.save(path, matrix)
+                with ProcessPoolExecutor(
+                    max_workers=min(workers, n_chunks), initializer=_init_worker, initargs=(path,)
+                ) as pool:
+                    results = list(pool.map(
+                        _sweep_chunk,
+                        chunks,
+                        [ticker_cols] * n_chunks,
+                        [bench_cols] * n_chunks,
+                        [windows] * n_chunks,
+                        [n_resamples] * n_chunks,
+                    ))
+            # undo the round-robin split
+            stats = [None] * len(tasks)
+            for i, chunk_stats in enumerate(results):
+                stats[i::n_chunks] = chunk_stats
+        else:
+            stats = _sweep_chunk(tasks, ticker_cols, bench_cols, windows, n_resamples, matrix)
+
+    return _sweep_frame(configs, tickers, windows, stats, columns)
+
+
+def _sweep_frame(configs, tickers, windows, stats, columns):
+    """
+    Long rows from per-configuration statistics, configuration-major.
+    """
+    ticker_to_industry = {v: k for k, v in industry_map.items()}
+    measures = [WHOLE_WINDOW, *windows]
+    n_measures, n_tickers = len(measures), len(tickers)
+    per_config = n_measures * n_tickers
+
+    config_codes = np.repeat(np.arange(len(configs)), per_config)
+    measure_codes = np.tile(np.repeat(np.arange(n_measures), n_tickers), len(configs))
+    ticker_codes = np.tile(np.arange(n_tickers), len(configs) * n_measures)
+    ticker_col = pd.Categorical.from_codes(ticker_codes, categories=pd.Index(tickers))
+    config_table = pd.DataFrame(configs)
+
+    def stacked(name):
+        return np.concatenate([s[name].ravel() for s in stats])
+
+    frame = pd.DataFrame(
+        {
+            "Configuration": pd.Categorical.from_codes(
+                config_codes, categories=pd.Index([config_label(c) for c in configs])
+            ),
+            "Model": config_table["model"].to_numpy()[config_codes],
+            "Benchmark": config_table["benchmark"].to_numpy()[config_codes],
+            "Pre": config_table["pre"].to_numpy()[config_codes],
+            "Post": config_table["post"].to_numpy()[config_codes],
+            "Alignment": config_table["alignment"].to_numpy()[config_codes],
+            "Ticker": ticker_col,
+            "Industry": ticker_col.map(ticker_to_industry),
+            "Measure": pd.Categorical.from_codes(measure_codes, categories=pd.Index(measures)),
+            "Events": stacked("events"),
+            "CAAR (%)": stacked("caar"),
+            "t-stat": stacked("t_stat"),
+            "Bootstrap p": stacked("bootstrap_p"),
+        },
+        columns=columns,
+    )
+    return frame[frame["Events"] > 0].reset_index(drop=True)
+
+
+def _int_list(text):
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def main(argv=None):
+    from Pages.price_store import DEFAULT_DB_PATH, configure_price_store
+    from Pages.providers import get_provider
+
+    parser = argparse.ArgumentParser(description="Parameter sensitivity sweep.")
+    parser.add_argument("--out", default="sweep.csv")
+    parser.add_argument("--alignment", action="append", choices=ALIGNMENT_POLICIES)
+    parser.add_argument("--pre", type=_int_list, default=list(DEFAULT_PRE),
+                        help="Comma-separated days before T, e.g. 5,10,20.")
+    parser.add_argument("--post", type=_int_list, default=list(DEFAULT_POST),
+                        help="Comma-separated days after T, e.g. 5,10,20,40.")
+    parser.add_argument("--benchmark", action="append", choices=list(SWEEP_BENCHMARKS))
+    parser.add_argument("--model", action="append", choices=ABNORMAL_MODELS)
+    parser.add_argument("--window", action="append", dest="windows", type=parse_window,
+                        help="Interval window first:last (repeatable), e.g. --window=-1:1.")
+    parser.add_argument("--event", action="append", dest="events")
+    parser.add_argument("--industry", action="append", dest="industries",
+                        choices=list(industry_map))
+    parser.add_argument("--resamples", type=int, default=DEFAULT_SWEEP_RESAMPLES)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--provider", default=None)
+    parser.add_argument("--price-db", default=DEFAULT_DB_PATH)
+    args = parser.parse_args(argv)
+
+    configure_price_store(args.price_db, get_provider(args.provider))
+    configs = sweep_grid(
+        args.alignment or ALIGNMENT_POLICIES, args.pre, args.post,
+        args.benchmark or list(SWEEP_BENCHMARKS), args.model or ABNORMAL_MODELS,
+    )
+    tickers = [industry_map[name] for name in args.industries or list(industry_map)]
+    windows = make_windows(args.windows) if args.windows else INTERVAL_WINDOWS
+
+    recorder = perf.PerfRecorder("sweep")
+    with recorder.activate():
+        frame = run_sweep(
+            args.events or list(disaster_events), tickers, configs, windows=windows,
+            n_resamples=args.resamples, workers=args.workers,
+        )
+    frame.to_csv(args.out, index=False)
+    print(
+        f"{len(configs)} configuration(s) x {len(tickers)} ticker(s) in "
+        f"{recorder.total_seconds:.2f}s -> {args.out}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,169 @@
+import datetime as dt
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+)
+
+# --------------------------------------------------------------
+# TRADING CALENDAR INDEX
+# --------------------------------------------------------------
+# One sorted array of trading days, built once per price store. Whole arrays
+# of event dates are aligned to it with a single searchsorted, and event
+# windows (and their download ranges) are read straight off the array, so no
+# calendar-day padding or per-event lookups are needed.
+
+CALENDAR_START = "1993-01-29"  # first SPY trading day
+
+# Extra calendar days added to each download range to absorb unscheduled
+# closures the projected calendar does not know about
+CALENDAR_SLACK_DAYS = 5
+
+ALIGNMENT_POLICIES = ("nearest", "next", "previous")
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """
+    Regular NYSE full-day holidays.
+    """
+
+    rules = [
+        Holiday("New Year's Day", month=1, day=1, observance=nearest_workday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+def projected_trading_days(start, end):
+    """
+    Weekdays minus regular NYSE holidays.
+    """
+    holidays = NYSEHolidayCalendar().holidays(start, end)
+    days = pd.bdate_range(start, end)
+    return days[~days.isin(holidays)]
+
+
+class TradingCalendar:
+    """
+    Sorted trading days with vectorized event alignment.
+    """
+
+    def __init__(self, dates):
+        self.dates = np.unique(pd.DatetimeIndex(dates).normalize().to_numpy("datetime64[D]"))
+
+    def __len__(self):
+        return len(self.dates)
+
+    def align(self, event_dates, policy="nearest"):
+        """
+        Row of T=0 for every event date, in one searchsorted:
+          nearest   closest trading day (ties go to the later day)
+          next      first trading day on or after the date
+          previous  last trading day on or before the date
+        Returns int64 array, -1 where the date falls off the calendar.
+        """
+        if policy not in ALIGNMENT_POLICIES:
+            raise ValueError(f"Unknown alignment policy: {policy}")
+
+        targets = pd.DatetimeIndex(event_dates).normalize().to_numpy("datetime64[D]")
+        n = len(self.dates)
+        if n == 0:
+            return np.full(len(targets), -1, dtype=np.int64)
+
+        if policy == "previous":
+            pos = np.searchsorted(self.dates, targets, side="right") - 1
+            return np.where(pos >= 0, pos, -1).astype(np.int64)
+
+        pos = np.searchsorted(self.dates, targets, side="left")
+        if policy == "next":
+            return np.where(pos < n, pos, -1).astype(np.int64)
+
+        before = np.clip(pos - 1, 0, n - 1)
+        after = np.clip(pos, 0, n - 1)
+        take_before = (targets - self.dates[before]) < (self.dates[after] - targets)
+        pos = np.where(take_before, before, after)
+        # Nearest is only meaningful inside the calendar
+        inside = (targets >= self.dates[0]) & (targets <= self.dates[-1])
+        return np.where(inside, pos, -1).astype(np.int64)
+
+    def windows(self, positions, lead, post):
+        """
+        First and last trading day of [T-lead, T+post] for every event.
+        Returns:
+          (first dates, last dates, truncated mask); dates are NaT where
+          truncated.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        first = positions - lead
+        last = positions + post
+        truncated = (positions < 0) | (first < 0) | (last >= len(self.dates))
+
+        first_dates = self.dates[np.clip(first, 0, len(self.dates) - 1)].astype("datetime64[ns]")
+        last_dates = self.dates[np.clip(last, 0, len(self.dates) - 1)].astype("datetime64[ns]")
+        first_dates[truncated] = np.datetime64("NaT")
+        last_dates[truncated] = np.datetime64("NaT")
+        return first_dates, last_dates, truncated
+
+    def fetch_ranges(self, event_dates, lead, post, policy="nearest",
+                     slack_days=CALENDAR_SLACK_DAYS):
+        """
+        Exact download range per event: [T-lead, T+post] trading days plus a
+        few days of slack. Truncated events are flagged before anything is
+        fetched.
+        Returns:
+          (starts, ends, truncated mask)
+        """
+        positions = self.align(event_dates, policy)
+        first, last, truncated = self.windows(positions, lead, post)
+        slack = np.timedelta64(slack_days, "D")
+        return first - slack, last + slack, truncated
+
+
+_calendar_cache = {}
+_calendar_lock = threading.Lock()
+
+
+def get_trading_calendar(store=None, ticker="SPY"):
+    """
+    Calendar for a price store: the projected NYSE calendar from
+    CALENDAR_START to yesterday, with the days the store actually holds for
+    `ticker` substituted inside every range it has covered. Cached per store
+    and rebuilt only after the store has written new prices.
+    """
+    key = (getattr(store, "path", None), ticker)
+    version = getattr(store, "version", 0)
+
+    with _calendar_lock:
+        cached = _calendar_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        end = dt.date.today() - dt.timedelta(days=1)
+        days = projected_trading_days(CALENDAR_START, end)
+
+        if store is not None:
+            covered, stored = store.stored_dates(ticker)
+            for start, stop in covered:
+                days = days[(days < pd.Timestamp(start)) | (days > pd.Timestamp(stop))]
+            days = days.union(pd.DatetimeIndex(stored))
+
+        calendar = TradingCalendar(days)
+        _calendar_cache[key] = (version, calendar)
+        return calendar
@@ -0,0 +1,57 @@
+import importlib
+import os
+import threading
+
+# --------------------------------------------------------------
+# BACKGROUND IMPORT WARM-UP
+# --------------------------------------------------------------
+# The Home, Methodology and Analysis pages only need Streamlit; the data
+# and charting stack (NumPy, pandas, Altair, the study engine) is imported
+# by the pages that use it. Once the first page has been drawn, a daemon
+# thread imports that stack so the first visit to the dashboard does not
+# pay for it. Python's per-module import locks make a page that imports a
+# module mid-warm-up wait for it rather than import it twice.
+#
+# EVENT_STUDY_WARM_IMPORTS=0 turns the warm-up off (e.g. when measuring
+# cold start with python -m benchmarks.startup).
+
+WARM_MODULES = (
+    "numpy",
+    "pandas",
+    "altair",
+    "Pages.study",
+    "Pages.event_study",
+    "Pages.sensitivity",
+)
+
+WARM_IMPORTS = os.environ.get("EVENT_STUDY_WARM_IMPORTS", "1") != "0"
+
+_thread = None
+_lock = threading.Lock()
+
+
+def _warm(modules):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            # The page importing it for real reports the error where it can
+            # be seen
+            pass
+
+
+def warm_in_background(modules=WARM_MODULES):
+    """
+    Import `modules` on a daemon thread, once per process.
+    Returns the thread (None when the warm-up is turned off).
+    """
+    global _thread
+    if not WARM_IMPORTS:
+        return None
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(
+                target=_warm, args=(tuple(modules),), name="import-warmup", daemon=True
+            )
+            _thread.start()
+    return _thread
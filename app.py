@@ -2,26 +2,22 @@
 
 import streamlit as st
 
-st.markdown("""
-    <style>
-        .block-container {
-            padding-top: 0rem !important;
-            padding-bottom: 6rem !important;
-        }
-        header {visibility: hidden;}   /* removes Streamlit top bar */
-    </style>
-""", unsafe_allow_html=True)
+from Pages.styles import inject_styles
+from Pages.warmup import warm_in_background
 
+# Page modules are imported only when their page is chosen: Home,
+# Methodology and Analysis never load the data and charting stack
 
 st.set_page_config(
     page_title="Natural Disaster Impact Dashboard",
     layout="wide",
     initial_sidebar_state="expanded"
 )
+inject_styles()
 
 # Sidebar Navigation
 st.sidebar.title("Navigation")
-page = st.sidebar.radio("Go to:", ["Home", "Event Study Dashboard", "Methodology", "Analysis"])
+page = st.sidebar.radio("Go to:", ["Home", "Event Study Dashboard", "Sensitivity Sweep", "Live Monitor", "Methodology", "Analysis"])
 
 
 # -------------------- HOME PAGE --------------------
@@ -44,8 +40,10 @@ using an event study methodology.
 ### Navigation  
 Use the sidebar to access:
 1. Event Study Dashboard – Run the analysis 
-2. Methodology – Processes involved in event study
-3. Analysis – Summary of findings  
+2. Sensitivity Sweep – How results change with the study's parameters
+3. Live Monitor – Track a disaster that is still unfolding
+4. Methodology – Processes involved in event study
+5. Analysis – Summary of findings  
 
 ---
 
@@ -62,6 +60,18 @@ elif page == "Event Study Dashboard":
     show_event_study()
 
 
+# -------------------- SENSITIVITY PAGE --------------------
+elif page == "Sensitivity Sweep":
+    from Pages.sensitivity import show_sensitivity
+    show_sensitivity()
+
+
+# -------------------- LIVE MONITOR PAGE --------------------
+elif page == "Live Monitor":
+    from Pages.monitor import show_live_monitor
+    show_live_monitor()
+
+
 # -------------------- REPORT PAGE --------------------
 elif page == "Methodology":
     from Pages.report import show_report
@@ -72,3 +82,6 @@ elif page == "Analysis":
     from Pages.analysis import show_analysis
     show_analysis()
 
+
+# Page drawn: import the heavy modules for the next page in the background
+warm_in_background()
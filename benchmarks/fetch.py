@@ -0,0 +1,87 @@
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from Pages.price_store import PriceStore
+from Pages.providers import FlakyProvider, SyntheticProvider
+from Pages.scheduler import DownloadScheduler
+
+# --------------------------------------------------------------
+# DOWNLOAD SCHEDULER BENCHMARK
+# --------------------------------------------------------------
+# Usage:
+#   python -m benchmarks.fetch
+#   python -m benchmarks.fetch --events 100 --latency 0.3 --failure-rate 0.2
+#
+# Fetches one window per event, spaced far enough apart that no two can be
+# merged into one download, from a fake provider that sleeps and fails on
+# purpose. Sequential fetching (one worker) is compared with the concurrent
+# scheduler; with enough workers the concurrent wall time approaches the
+# slowest single request (retries included) instead of the sum.
+
+
+def event_ranges(n_events, spacing_days=90, start="2000-01-03", window_days=60):
+    first = pd.Timestamp(start)
+    return [
+        (first + pd.Timedelta(days=i * spacing_days),
+         first + pd.Timedelta(days=i * spacing_days + window_days))
+        for i in range(n_events)
+    ]
+
+
+def fetch_once(ranges, tickers, workers, rate, latency, failure_rate, seed=0):
+    """
+    Fetch every range into a fresh store.
+    Returns dict with wall seconds, provider calls and failures.
+    """
+    provider = FlakyProvider(
+        SyntheticProvider(), latency=latency, jitter=latency / 2,
+        failure_rate=failure_rate, seed=seed,
+    )
+    scheduler = DownloadScheduler(
+        max_workers=workers, rate=rate, burst=len(ranges), base_delay=latency / 2, seed=seed
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceStore(os.path.join(tmp, "prices.sqlite"), provider, scheduler)
+        started = time.perf_counter()
+        _, failures = store.fetch_many(tickers, ranges, max_gap_days=0)
+        seconds = time.perf_counter() - started
+
+    return {
+        "seconds": seconds,
+        "calls": provider.calls,
+        "retries": scheduler.retries,
+        "failed": len(failures),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark concurrent price fetching.")
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--tickers", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--rate", type=float, default=1000.0)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    ranges = event_ranges(args.events)
+    tickers = [f"T{i:04d}" for i in range(args.tickers)] + ["SPY"]
+    single = args.latency * 1.5
+
+    for label, workers in (("sequential", 1), ("concurrent", args.workers)):
+        stats = fetch_once(ranges, tickers, workers, args.rate, args.latency, args.failure_rate)
+        print(
+            f"{label:>11}  {stats['seconds']:7.2f} s  "
+            f"calls {stats['calls']:4d}  retries {stats['retries']:3d}  "
+            f"failed {stats['failed']:3d}  "
+            f"({stats['seconds'] / single:5.1f}x the slowest clean call)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
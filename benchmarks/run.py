@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_attributes, synthetic_event_indices, synthetic_market
+from Pages.car_engine import compute_car_tensor, gather_windows
+from Pages.chart_payload import quantile_band_frame
+from Pages.intervals import make_windows
+from Pages.panel import panel_regression
+from Pages.study import (
+    FIXED_WINDOW,
+    T_VALUES,
+    car_long_frame,
+    caar_long_frame,
+    event_interval_frame,
+    interval_summary,
+)
+
+# --------------------------------------------------------------
+# EVENT-STUDY PIPELINE BENCHMARKS
+# --------------------------------------------------------------
+# Usage:
+#   python -m benchmarks.run
+#   python -m benchmarks.run --events 10,1000,10000 --tickers 5,500
+#   python -m benchmarks.run --save-baseline main
+#   python -m benchmarks.run --compare main --tolerance 0.25
+#
+# Every stage of the dashboard pipeline is timed (best of --repeat) and its
+# peak traced memory recorded, on synthetic prices of the requested sizes.
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+DEFAULT_EVENTS = [10, 100, 1000]
+DEFAULT_TICKERS = [5, 50]
+
+# Long-format frames above this many rows are skipped: they would never be
+# sent to a chart and only measure swap
+MAX_LONG_ROWS = 5_000_000
+
+# Sensitivity-analysis sized window set: every (start, end) on a 2-day grid
+SWEEP_WINDOWS = make_windows(
+    (start, end)
+    for start in range(-FIXED_WINDOW, 1, 2)
+    for end in range(0, FIXED_WINDOW + 1, 2)
+)
+
+
+def _measure(fn, repeat):
+    """
+    Best wall time over `repeat` runs and peak traced memory of one run.
+    Returns (seconds, peak_bytes, last result).
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def bench_case(n_events, n_tickers, repeat=3, seed=0):
+    """
+    Run every stage for one (events, tickers) size.
+    Returns {stage: {"seconds": ..., "peak_mb": ...}}.
+    """
+    n_dates = max(2520, n_events // 4)
+    prices = synthetic_market(n_dates, n_tickers, seed=seed)
+    matrix = prices.to_numpy()
+    event_idx = synthetic_event_indices(n_events, n_dates, FIXED_WINDOW, FIXED_WINDOW, seed)
+    ticker_cols = list(range(n_tickers))
+    bench_col = n_tickers
+    tickers = list(prices.columns[:n_tickers])
+    labels = [f"E{i}" for i in range(n_events)]
+
+    stages = {}
+
+    def record(name, fn):
+        seconds, peak, result = _measure(fn, repeat)
+        stages[name] = {"seconds": round(seconds, 6), "peak_mb": round(peak / 2**20, 3)}
+        return result
+
+    record("window_slicing", lambda: gather_windows(matrix, event_idx, FIXED_WINDOW, FIXED_WINDOW))
+    tensor = record(
+        "car",
+        lambda: compute_car_tensor(matrix, event_idx, ticker_cols, bench_col, FIXED_WINDOW, FIXED_WINDOW),
+    )
+    record(
+        "car_market_model",
+        lambda: compute_car_tensor(
+            matrix, event_idx, ticker_cols, bench_col, FIXED_WINDOW, FIXED_WINDOW,
+            model="market_model",
+        ),
+    )
+    caar = record(
+        "caar",
+        lambda: pd.DataFrame(tensor.car[tensor.valid].mean(axis=0), index=T_VALUES, columns=tickers),
+    )
+
+    long_rows = n_events * len(T_VALUES) * n_tickers
+    if long_rows <= MAX_LONG_ROWS:
+        record("melt_caar", lambda: caar_long_frame(caar))
+        record("melt_events", lambda: car_long_frame(tensor.car, labels, tickers))
+    record(
+        "quantile_bands",
+        lambda: quantile_band_frame(tensor.car[tensor.valid], T_VALUES, tickers, {}),
+    )
+    record("intervals", lambda: interval_summary(caar))
+    if n_events * len(SWEEP_WINDOWS) * n_tickers <= MAX_LONG_ROWS:
+        record(
+            "intervals_sweep",
+            lambda: event_interval_frame(tensor.car, labels, tickers, SWEEP_WINDOWS),
+        )
+    attributes = synthetic_attributes(labels, seed)
+    record("panel_regression", lambda: panel_regression(tensor.car, labels, tickers, attributes))
+    return stages
+
+
+def run_suite(events, tickers, repeat=3):
+    results = {}
+    for n_events in events:
+        for n_tickers in tickers:
+            key = f"{n_events}x{n_tickers}"
+            results[key] = bench_case(n_events, n_tickers, repeat)
+            total = sum(s["seconds"] for s in results[key].values())
+            print(f"{key:>12}  total {total * 1000:9.2f} ms")
+            for stage, stats in results[key].items():
+                print(
+                    f"{'':>12}  {stage:<18} {stats['seconds'] * 1000:9.2f} ms"
+                    f"  peak {stats['peak_mb']:9.2f} MB"
+                )
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Stages slower than baseline by more than `tolerance` (fraction).
+    Tiny timings (< 1 ms) are ignored; they are mostly noise.
+    """
+    regressions = []
+    for key, stages in results.items():
+        for stage, stats in stages.items():
+            base = baseline.get(key, {}).get(stage)
+            if base is None or base["seconds"] < 1e-3:
+                continue
+            ratio = stats["seconds"] / base["seconds"]
+            if ratio > 1 + tolerance:
+                regressions.append((key, stage, base["seconds"], stats["seconds"], ratio))
+    return regressions
+
+
+def _int_list(text):
+    return [int(x) for x in text.split(",") if x]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the event-study pipeline.")
+    parser.add_argument("--events", type=_int_list, default=DEFAULT_EVENTS)
+    parser.add_argument("--tickers", type=_int_list, default=DEFAULT_TICKERS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.events, args.tickers, args.repeat)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, args.save_baseline + ".json")
+        payload = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(path, "w") as fh:
+            json.dump(payload, fh, indent=2)
+        print(f"Baseline saved to {path}")
+
+    if args.compare:
+        path = os.path.join(BASELINE_DIR, args.compare + ".json")
+        with open(path) as fh:
+            baseline = json.load(fh)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for key, stage, before, after, ratio in regressions:
+            print(
+                f"REGRESSION {key} {stage}: {before * 1000:.2f} ms -> "
+                f"{after * 1000:.2f} ms ({ratio:.2f}x)"
+            )
+        if regressions:
+            return 1
+        print(f"No regressions against '{args.compare}' (tolerance {args.tolerance:.0%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+# --------------------------------------------------------------
+# COLD-START IMPORT BUDGET
+# --------------------------------------------------------------
+# Usage:
+#   python -m benchmarks.startup
+#   python -m benchmarks.startup --save-baseline main
+#   python -m benchmarks.startup --compare main --tolerance 0.25
+#   python -m benchmarks.startup --budget 1.0
+#
+# Every target is imported in a fresh interpreter (--repeat times, median
+# kept), the way a new container or worker process meets it. Exits 1 when
+#   - a light page pulls in one of HEAVY_MODULES,
+#   - the app's cold start exceeds --budget seconds, or
+#   - a target is slower than the --compare baseline by more than
+#     --tolerance.
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported at startup and by the pages that must stay light
+HEAVY_MODULES = ("numpy", "pandas", "altair", "pyarrow", "yfinance")
+
+# target -> (statement, must stay light)
+TARGETS = {
+    "app (Home page)": ("import app", True),
+    "Methodology page": ("import Pages.report", True),
+    "Analysis page": ("import Pages.analysis", True),
+    "Event Study page": ("import Pages.event_study", False),
+    "Sensitivity page": ("import Pages.sensitivity", False),
+}
+
+# Seconds for the app's cold start (streamlit + app.py + the Home page)
+DEFAULT_BUDGET = float(os.environ.get("EVENT_STUDY_STARTUP_BUDGET", 1.5))
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(statement, repeat=5):
+    """
+    Median wall time of `statement` in fresh interpreters, and the heavy
+    modules it loaded.
+    Returns dict with seconds and heavy.
+    """
+    env = {**os.environ, "EVENT_STUDY_WARM_IMPORTS": "0"}
+    probe = _PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", probe], cwd=REPO_ROOT, env=env,
+            capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "seconds": round(statistics.median(r["seconds"] for r in runs), 4),
+        "heavy": runs[-1]["heavy"],
+    }
+
+
+def run_suite(repeat=5):
+    results = {}
+    for name, (statement, _) in TARGETS.items():
+        results[name] = measure_import(statement, repeat)
+        heavy = ", ".join(results[name]["heavy"]) or "-"
+        print(f"{name:<20} {results[name]['seconds'] * 1000:9.1f} ms   heavy: {heavy}")
+    return results
+
+
+def check(results, budget, baseline=None, tolerance=0.25):
+    """
+    Budget failures as printable lines (empty when everything passes).
+    """
+    failures = []
+    for name, (_, light) in TARGETS.items():
+        if light and results[name]["heavy"]:
+            failures.append(f"{name} imports {', '.join(results[name]['heavy'])}")
+
+    app_seconds = results["app (Home page)"]["seconds"]
+    if app_seconds > budget:
+        failures.append(f"app cold start {app_seconds:.3f}s exceeds the {budget:.3f}s budget")
+
+    for name, stats in (baseline or {}).items():
+        if name not in results:
+            continue
+        ratio = results[name]["seconds"] / stats["seconds"]
+        if ratio > 1 + tolerance:
+            failures.append(
+                f"{name}: {stats['seconds'] * 1000:.1f} ms -> "
+                f"{results[name]['seconds'] * 1000:.1f} ms ({ratio:.2f}x)"
+            )
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start import budget.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET,
+                        help="Seconds allowed for the app's cold start.")
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.repeat)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"startup-{args.save_baseline}.json")
+        payload = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(path, "w") as fh:
+            json.dump(payload, fh, indent=2)
+        print(f"Baseline saved to {path}")
+
+    baseline = None
+    if args.compare:
+        path = os.path.join(BASELINE_DIR, f"startup-{args.compare}.json")
+        with open(path) as fh:
+            baseline = json.load(fh)["results"]
+
+    failures = check(results, args.budget, baseline, args.tolerance)
+    for line in failures:
+        print(f"REGRESSION {line}")
+    if failures:
+        return 1
+    print(f"Cold start within budget ({args.budget:.2f}s).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------------------
+# SYNTHETIC MARKET GENERATOR
+# --------------------------------------------------------------
+# One-factor market: every ticker's daily return is
+#     alpha_i + beta_i * market + noise_i
+# so the pipeline sees realistic cross-correlated prices of any size without
+# touching the network.
+
+
+def synthetic_market(n_dates=2520, n_tickers=5, seed=0, start="2010-01-04",
+                     benchmark="SPY", dtype=np.float64):
+    """
+    Random daily closes on a business-day calendar.
+    Returns DataFrame with index = dates, columns = T0000..Tnnnn + benchmark
+    (benchmark last).
+    """
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0003, 0.01, n_dates)
+    beta = rng.uniform(0.3, 1.6, n_tickers)
+    alpha = rng.normal(0.0, 0.0002, n_tickers)
+    noise = rng.normal(0.0, 0.012, (n_dates, n_tickers))
+
+    returns = np.empty((n_dates, n_tickers + 1))
+    returns[:, :n_tickers] = alpha + market[:, None] * beta + noise
+    returns[:, n_tickers] = market
+    returns[0] = 0.0
+
+    prices = 100.0 * np.cumprod(1.0 + returns, axis=0)
+    columns = [f"T{i:04d}" for i in range(n_tickers)] + [benchmark]
+    index = pd.bdate_range(start, periods=n_dates)
+    return pd.DataFrame(prices.astype(dtype), index=index, columns=columns)
+
+
+def synthetic_event_indices(n_events, n_dates, lead=20, post=20, seed=0):
+    """
+    Random T=0 rows that leave room for `lead` days before and `post` after.
+    """
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.integers(lead, n_dates - post, n_events))
+
+
+def synthetic_events(prices, n_events, lead=20, post=20, seed=0):
+    """
+    Event catalog (label -> ISO date) on the synthetic calendar, in the same
+    shape as `disaster_events`.
+    """
+    rows = synthetic_event_indices(n_events, len(prices), lead, post, seed)
+    return {
+        f"Synthetic event {i:05d}": prices.index[row].strftime("%Y-%m-%d")
+        for i, row in enumerate(rows)
+    }
+
+
+def synthetic_attributes(event_labels, seed=0):
+    """
+    Random disaster attributes in the shape of Pages.panel.event_attributes():
+    Category, Season, Region, Log damage and Deaths per event label.
+    """
+    from Pages.panel import FACTORS
+
+    rng = np.random.default_rng(seed)
+    n = len(event_labels)
+    frame = pd.DataFrame(
+        {name: rng.choice(levels, n) for name, levels in FACTORS.items()},
+        index=pd.Index(list(event_labels)),
+    )
+    frame["Log damage"] = rng.uniform(5.0, 10.0, n)
+    frame["Deaths"] = rng.poisson(1.0, n).astype(float)
+    return frame